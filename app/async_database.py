@@ -0,0 +1,207 @@
+"""
+API asyncio sobre la base de datos.
+
+sqlite3 es bloqueante y cada conexión pertenece a un hilo (ver el pool de
+Database). AsyncDatabase mantiene unos pocos hilos de base de datos, cada uno
+con su conexión persistente, y los presta a las corrutinas: cientos de ellas
+pueden consultar a la vez sin bloquear el bucle de eventos, esperando su turno
+en una cola en lugar de en un lock de SQLite.
+
+    adb = AsyncDatabase()
+    rows = await adb.fetch("SELECT * FROM customers WHERE id = ?", (1,))
+    async for row in adb.iter_named("report.revenue_by_day", ("", "9999")):
+        ...
+    async with adb.transaction(immediate=True):
+        await adb.payments.create(order_id, 1500, "Efectivo")
+        await adb.orders.update_status(order_id, "Listo")
+
+Una transacción reserva su hilo hasta terminar: todo lo que la corrutina
+ejecute dentro del bloque (incluidos los métodos de los modelos) va a la misma
+conexión y entra en el mismo COMMIT.
+"""
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from itertools import islice
+
+from app.database import db as default_db
+from app.models.customer import Customer
+from app.models.orders import Order
+from app.models.payment import Payment
+from app.models.service import Service
+
+# Hilos (y conexiones) por defecto: SQLite admite un solo escritor a la vez,
+# así que más hilos solo ayudan a las lecturas concurrentes
+DEFAULT_CONNECTIONS = 4
+
+# Hilo reservado por la transacción async en curso de la corrutina actual
+_pinned = contextvars.ContextVar("async_db_worker", default=None)
+
+
+def _take(rows, count):
+    return list(islice(rows, count))
+
+
+class AsyncModel:
+    """
+    Versión async de un modelo: cada método estático se ejecuta en un hilo
+    de base de datos (`await adb.customers.get_by_id(1)`). Los métodos de
+    instancia se llaman con run(): `await adb.run(customer.update)`.
+    """
+    def __init__(self, adb, model):
+        self._adb = adb
+        self._model = model
+
+    def __getattr__(self, name):
+        attr = getattr(self._model, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def call(*args, **kwargs):
+            return await self._adb.run(attr, *args, **kwargs)
+
+        return call
+
+    def __repr__(self):
+        return f"AsyncModel({self._model.__name__})"
+
+
+class AsyncDatabase:
+    """
+    Envoltorio async de una Database con `connections` hilos de base de datos.
+    Los modelos async (customers, services, orders, payments) ejecutan los
+    métodos de los modelos, que usan la instancia global `db`: para que entren
+    en las transacciones async, `database` tiene que ser esa misma instancia.
+    """
+    def __init__(self, database=None, connections=DEFAULT_CONNECTIONS):
+        self.db = database or default_db
+        # Un hilo por conexión: el pool de Database le da a cada uno la suya
+        self._workers = [
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"async-db-{i}")
+            for i in range(connections)
+        ]
+        self._idle = None  # asyncio.Queue con los hilos libres (se crea dentro del bucle)
+
+        self.customers = AsyncModel(self, Customer)
+        self.services = AsyncModel(self, Service)
+        self.orders = AsyncModel(self, Order)
+        self.payments = AsyncModel(self, Payment)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    # -----------------------------
+    # HILOS DE BASE DE DATOS
+    # -----------------------------
+    @asynccontextmanager
+    async def _acquire(self):
+        """Presta un hilo libre (o el de la transacción en curso) mientras dure el bloque."""
+        worker = _pinned.get()
+        if worker is not None:
+            yield worker
+            return
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+            for w in self._workers:
+                self._idle.put_nowait(w)
+        worker = await self._idle.get()
+        try:
+            yield worker
+        finally:
+            # Si la corrutina se canceló, el hilo puede seguir con su trabajo; lo
+            # próximo que se le envíe queda en su cola y corre después, en orden
+            self._idle.put_nowait(worker)
+
+    @staticmethod
+    async def _call(worker, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(worker, functools.partial(fn, *args, **kwargs))
+
+    async def run(self, fn, *args, **kwargs):
+        """Ejecuta fn(*args, **kwargs) en un hilo de base de datos y retorna su resultado."""
+        async with self._acquire() as worker:
+            return await self._call(worker, fn, *args, **kwargs)
+
+    async def close(self):
+        """Espera a que terminen los trabajos enviados y cierra los hilos."""
+        await asyncio.gather(*(asyncio.to_thread(w.shutdown, True) for w in self._workers))
+
+    # -----------------------------
+    # CONSULTAS
+    # -----------------------------
+    async def execute(self, query, params=()):
+        return await self.run(self.db.execute, query, params)
+
+    async def execute_many(self, query, seq_of_params, chunk_size=500):
+        return await self.run(self.db.execute_many, query, list(seq_of_params), chunk_size)
+
+    async def fetch(self, query, params=(), row_factory=dict):
+        return await self.run(self.db.fetch, query, params, row_factory)
+
+    async def execute_named(self, key, params=()):
+        return await self.run(self.db.execute_named, key, params)
+
+    async def execute_many_named(self, key, seq_of_params, chunk_size=500):
+        return await self.run(self.db.execute_many_named, key, list(seq_of_params), chunk_size)
+
+    async def fetch_named(self, key, params=(), row_factory=dict):
+        return await self.run(self.db.fetch_named, key, params, row_factory)
+
+    def iter(self, query, params=(), batch_size=500, row_factory=dict):
+        """
+        Generador async sobre iter_fetch(): las filas se leen en el hilo de base
+        de datos de a `batch_size`. El hilo queda reservado hasta agotar o
+        cerrar el generador (el cursor pertenece a su conexión).
+        """
+        return self._iter(self.db.iter_fetch, (query, params, batch_size, row_factory), batch_size)
+
+    def iter_named(self, key, params=(), batch_size=500, row_factory=dict):
+        """Como iter(), pero con una sentencia registrada."""
+        return self._iter(self.db.iter_fetch_named, (key, params, batch_size, row_factory), batch_size)
+
+    async def _iter(self, open_rows, args, batch_size):
+        async with self._acquire() as worker:
+            # El generador se crea en el hilo de base de datos: usa su conexión
+            rows = await self._call(worker, open_rows, *args)
+            try:
+                while True:
+                    batch = await self._call(worker, _take, rows, batch_size)
+                    if not batch:
+                        break
+                    for row in batch:
+                        yield row
+            finally:
+                await self._call(worker, rows.close)
+
+    # -----------------------------
+    # TRANSACCIONES
+    # -----------------------------
+    @asynccontextmanager
+    async def transaction(self, immediate=False):
+        """
+        Versión async de Database.transaction(): reserva un hilo, abre la
+        transacción en su conexión y dirige ahí todo lo que se ejecute dentro
+        del bloque. Los bloques anidados son SAVEPOINTs, como en la versión síncrona.
+        Las tareas creadas dentro del bloque heredan el hilo y también entran en
+        la transacción.
+        """
+        async with self._acquire() as worker:
+            block = self.db.transaction(immediate)
+            await self._call(worker, block.__enter__)
+            token = _pinned.set(worker)
+            try:
+                yield self
+            except BaseException as e:
+                _pinned.reset(token)
+                # ROLLBACK en el mismo hilo; __exit__ retorna False y la excepción sigue
+                if not await self._call(worker, block.__exit__, type(e), e, e.__traceback__):
+                    raise
+            else:
+                _pinned.reset(token)
+                await self._call(worker, block.__exit__, None, None, None)
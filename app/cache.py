@@ -0,0 +1,159 @@
+"""
+Cachés en memoria para lecturas frecuentes de la base de datos.
+
+Son por proceso: cada terminal tiene la suya. Por eso, además de invalidarse
+cuando el propio proceso escribe, las entradas vencen después de un TTL como
+red de seguridad ante cambios hechos desde otras terminales.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+def invalidate_on_write(db, invalidate, *args):
+    """
+    Llama a invalidate(*args) ahora, para que el hilo que escribe vea su propio
+    cambio, y otra vez al terminar la transacción en curso, por si otro hilo
+    volvió a cargar el dato viejo antes del COMMIT (o hubo ROLLBACK).
+    """
+    invalidate(*args)
+    db.after_transaction(lambda: invalidate(*args))
+
+
+class ReadThroughCache:
+    """
+    Caché de lectura con TTL: get(key, loader) retorna el valor guardado si no
+    venció, o llama a loader() y guarda el resultado. Lleva contadores de
+    aciertos y fallos.
+    """
+    def __init__(self, ttl=300, clock=time.monotonic):
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = {}  # clave -> (vence_en, valor)
+        # Cambia con cada invalidación: un loader que empezó antes no guarda su resultado
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, loader):
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            generation = self._generation
+
+        # La consulta corre fuera del lock para no bloquear a otros lectores
+        value = loader()
+        with self._lock:
+            if generation == self._generation:
+                self._entries[key] = (now + self.ttl, value)
+        return value
+
+    def invalidate(self, key=None):
+        """Descarta una clave, o todo el contenido si no se indica ninguna."""
+        with self._lock:
+            self._generation += 1
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            hits, misses, size = self.hits, self.misses, len(self._entries)
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / total if total else 0.0,
+            "size": size,
+        }
+
+
+class IdentityMap:
+    """
+    Mapa de identidad LRU acotado, con claves (tabla, id). Las búsquedas
+    puntuales repetidas (get_by_id) se resuelven con un acceso a diccionario.
+    Los modelos lo invalidan al escribir (write-through); maxsize=0 lo desactiva.
+    Las entradas vencen a los `ttl` segundos (None: nunca), por los pagos y
+    cambios de estado que registran otras terminales. Los valores se comparten
+    entre hilos: tienen que ser inmutables (registros de app.models.records).
+    """
+    def __init__(self, maxsize=2048, ttl=5, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # (tabla, id) -> (vence_en, objeto), del menos al más usado
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, table, row_id, loader):
+        """Retorna el objeto de (table, row_id) o lo carga con loader(); None no se guarda."""
+        key = (table, row_id)
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[0] is None or entry[0] > now):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self._entries.pop(key, None)  # vencida
+            self.misses += 1
+            generation = self._generation
+
+        value = loader()
+        if value is not None and self.maxsize > 0:
+            expires = None if self.ttl is None else now + self.ttl
+            with self._lock:
+                if generation == self._generation:
+                    self._entries[key] = (expires, value)
+                    self._evict()
+        return value
+
+    def invalidate(self, table, row_id):
+        with self._lock:
+            self._generation += 1
+            self._entries.pop((table, row_id), None)
+
+    def invalidate_table(self, table):
+        with self._lock:
+            self._generation += 1
+            for key in [k for k in self._entries if k[0] == table]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def resize(self, maxsize):
+        """Cambia la capacidad máxima, descartando los menos usados si sobran."""
+        with self._lock:
+            self.maxsize = maxsize
+            self._evict()
+
+    def _evict(self):
+        while len(self._entries) > max(self.maxsize, 0):
+            self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            hits, misses, size = self.hits, self.misses, len(self._entries)
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / total if total else 0.0,
+            "size": size,
+            "maxsize": self.maxsize,
+        }
+
+
+# Instancia compartida por los modelos (Customer, Order, Payment)
+identity_map = IdentityMap()
@@ -1,116 +1,525 @@
 import sqlite3
 import os
+import atexit
+import threading
+import time
+from contextlib import contextmanager
+from itertools import islice
+
+from app import migrations
+
+# -------------------------------------------------------------
+# PERFILES DE PRAGMAS
+# Se aplican a cada conexión al abrirla. "durable" prioriza no perder datos
+# ante un corte de luz; "fast" relaja el fsync y usa más memoria/mmap.
+# En ambos WAL permite que los lectores no esperen a los escritores.
+# -------------------------------------------------------------
+PRAGMA_PROFILES = {
+    "durable": {
+        "busy_timeout": 5000,
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -8000,        # negativo = KiB (~8 MB)
+        "mmap_size": 0,
+        "temp_store": "MEMORY",
+        "foreign_keys": True,
+    },
+    "fast": {
+        "busy_timeout": 5000,
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -64000,       # ~64 MB
+        "mmap_size": 268435456,     # 256 MB
+        "temp_store": "MEMORY",
+        "foreign_keys": True,
+    },
+}
+
+# -------------------------------------------------------------
+# REGISTRO DE SENTENCIAS CON NOMBRE
+# Los modelos registran sus consultas una vez al importarse y luego las
+# ejecutan por clave. Al repetirse siempre el mismo texto SQL sobre la misma
+# conexión persistente, SQLite reutiliza la sentencia ya preparada (sin
+# volver a parsear ni planificar). El registro es global: el SQL no depende
+# del archivo de base de datos.
+# -------------------------------------------------------------
+STATEMENTS = {}
+
+# Tamaño mínimo de la caché de sentencias preparadas por conexión (el de sqlite3 es 128)
+DEFAULT_CACHED_STATEMENTS = 128
+
+# Segundos entre health-checks (SELECT 1) de una conexión que no dio errores
+HEALTH_CHECK_INTERVAL = 30
+
+
+def register_statements(statements):
+    """Registra un diccionario {clave: sql}. Una clave no puede cambiar de SQL."""
+    for key, sql in statements.items():
+        if STATEMENTS.get(key, sql) != sql:
+            raise ValueError(f"La sentencia '{key}' ya está registrada con otro SQL")
+        STATEMENTS[key] = sql
+
+
+# Valores simbólicos que SQLite reporta como enteros al consultarlos
+_PRAGMA_ALIASES = {
+    "synchronous": {"OFF": 0, "NORMAL": 1, "FULL": 2, "EXTRA": 3},
+    "temp_store": {"DEFAULT": 0, "FILE": 1, "MEMORY": 2},
+}
+
+
+def _normalize_pragma(name, value):
+    """Lleva un valor de PRAGMA a la forma en que SQLite lo reporta, para compararlo."""
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, str):
+        alias = _PRAGMA_ALIASES.get(name, {}).get(value.upper())
+        return alias if alias is not None else value.lower()
+    return value
+
 
 class Database:
     """Clase para manejar la conexión y operaciones de la base de datos SQLite."""
-    def __init__(self, db_name="lavanderia.db"):
+    def __init__(self, db_name="lavanderia.db", profile="durable"):
         # Obtener la ruta base (donde se encuentra el archivo database.py)
         base_path = os.path.dirname(os.path.abspath(__file__))
         self.db_path = os.path.join(base_path, db_name)
-        
-        # Inicializa las tablas la primera vez que se crea la instancia
-        self.initialize_tables()
+
+        # Perfil de PRAGMAs: nombre de un preset de PRAGMA_PROFILES o un diccionario propio
+        if isinstance(profile, str):
+            if profile not in PRAGMA_PROFILES:
+                raise ValueError(f"Perfil de PRAGMAs desconocido: {profile}")
+            profile = PRAGMA_PROFILES[profile]
+        self.pragmas = dict(profile)
+
+        # Pool de conexiones: una conexión persistente por hilo, reutilizada
+        # entre llamadas a execute/fetch en lugar de abrir una por consulta.
+        self._local = threading.local()
+        self._pool_lock = threading.Lock()
+        self._connections = {}  # hilo -> conexión abierta
+        # close() se registra para la salida solo mientras hay conexiones: una
+        # instancia cerrada no queda retenida por atexit hasta el final
+        self._close_at_exit = False
+
+        # Contadores de la caché de sentencias con nombre (ver statement_stats)
+        self._stats_lock = threading.Lock()
+        self.statement_hits = 0
+        self.statement_misses = 0
+
+        # Crear la instancia no toca el disco: las migraciones pendientes se
+        # aplican una sola vez, al abrir la primera conexión (ver get_connection).
+        self._schema_lock = threading.RLock()
+        self._schema_ready = False
 
     def connect(self):
-        """Establece y retorna una conexión a la base de datos."""
-        conn = sqlite3.connect(self.db_path)
+        """Establece y retorna una conexión nueva a la base de datos."""
+        # check_same_thread=False solo para poder cerrarla desde close() al
+        # apagar; durante su vida cada conexión la usa únicamente su hilo.
+        # isolation_level=None: modo autocommit; las transacciones se abren de
+        # forma explícita con transaction() en lugar de implícitamente.
+        # cached_statements: alcanza para todas las sentencias registradas, con holgura
+        # para las consultas dinámicas, así ninguna registrada sale de la caché.
+        cached = max(DEFAULT_CACHED_STATEMENTS, 2 * len(STATEMENTS))
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None,
+                               cached_statements=cached)
         # CRÍTICO: Configurar row_factory para que las consultas devuelvan resultados 
         # accesibles por nombre de columna (como si fueran diccionarios).
         conn.row_factory = sqlite3.Row 
+        self._apply_pragmas(conn)
         return conn
 
-    def initialize_tables(self):
+    def _apply_pragmas(self, conn):
+        """Aplica el perfil de PRAGMAs de esta instancia a una conexión recién abierta."""
+        for name, value in self.pragmas.items():
+            if isinstance(value, bool):
+                value = int(value)
+            conn.execute(f"PRAGMA {name} = {value}")
+
+    def verify_profile(self):
         """
-        Crea todas las tablas necesarias si no existen. 
-        Se ejecuta una sola vez durante la inicialización de la clase.
+        Lee de vuelta cada PRAGMA del perfil en la conexión del hilo actual.
+        Retorna un diccionario {pragma: (esperado, actual)} con los que no coinciden.
         """
+        conn = self.get_connection()
+        mismatches = {}
+        for name, value in self.pragmas.items():
+            actual = conn.execute(f"PRAGMA {name}").fetchone()[0]
+            if _normalize_pragma(name, actual) != _normalize_pragma(name, value):
+                mismatches[name] = (value, actual)
+        return mismatches
+
+    # -----------------------------
+    # POOL DE CONEXIONES
+    # -----------------------------
+    def get_connection(self):
+        """
+        Retorna la conexión persistente del hilo actual, creándola si no existe
+        o si la anterior dejó de responder. El health-check (SELECT 1) no corre
+        en cada llamada: solo después de un error o cada HEALTH_CHECK_INTERVAL
+        segundos; en el camino rápido basta ver que no esté cerrada.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            try:
+                conn.in_transaction  # lanza ProgrammingError si se cerró
+                if time.monotonic() >= self._local.check_after:
+                    conn.execute("SELECT 1")
+                    self._local.check_after = time.monotonic() + HEALTH_CHECK_INTERVAL
+            except sqlite3.Error:
+                self._discard(conn)
+            else:
+                # Si la migración de la primera conexión falló (p. ej. "database is
+                # locked"), se reintenta en la próxima consulta en lugar de seguir sin esquema
+                if not self._schema_ready:
+                    self._ensure_schema()
+                return conn
+
         conn = self.connect()
-        cursor = conn.cursor()
-        
-        # Tabla Clientes
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS customers (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                phone TEXT
-            )
-        """)
-        
-        # Tabla Servicios
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS services (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                price REAL NOT NULL
-            )
-        """)
-
-        # Tabla Órdenes (Pedidos)
-        # Nota: En una BD real compleja, los ítems de la orden irían en otra tabla (order_items).
-        # Por ahora, usamos campos simples.
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS orders (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                customer_id INTEGER NOT NULL,
-                total REAL NOT NULL,
-                date TEXT NOT NULL,
-                status TEXT NOT NULL,
-                paid REAL DEFAULT 0.0,
-                FOREIGN KEY (customer_id) REFERENCES customers(id)
-            )
-        """)
-        
-        # Tabla Pagos
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS payments (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                order_id INTEGER NOT NULL,
-                amount REAL NOT NULL,
-                method TEXT NOT NULL,
-                date TEXT NOT NULL,
-                FOREIGN KEY (order_id) REFERENCES orders(id)
-            )
-        """)
-        
-        conn.commit()
-        conn.close()
+        self._local.conn = conn
+        # Cursor reutilizado por execute/fetch y claves ya preparadas en esta conexión
+        self._local.cursor = conn.cursor()
+        self._local.prepared = set()
+        self._local.check_after = time.monotonic() + HEALTH_CHECK_INTERVAL
+        with self._pool_lock:
+            self._prune_dead_threads()
+            self._connections[threading.current_thread()] = conn
+            if not self._close_at_exit:
+                atexit.register(self.close)
+                self._close_at_exit = True
+
+        if not self._schema_ready:
+            self._ensure_schema()
+        return conn
+
+    def _ensure_schema(self):
+        """
+        Aplica las migraciones pendientes una sola vez por instancia. Si fallan,
+        _schema_ready sigue en False y la próxima get_connection() lo reintenta.
+        """
+        if getattr(self._local, "migrating", False):
+            return  # migrate() usa get_connection() en este mismo hilo
+        with self._schema_lock:
+            # Otro hilo pudo haber migrado mientras esperábamos el lock
+            if self._schema_ready:
+                return
+            self._local.migrating = True
+            try:
+                self.migrate()
+                self._schema_ready = True
+            finally:
+                self._local.migrating = False
+
+    def _suspect(self):
+        """Tras un error, la próxima get_connection() verifica la conexión con SELECT 1."""
+        self._local.check_after = 0
+
+    def _discard(self, conn):
+        """Saca una conexión del pool y la cierra sin propagar errores."""
+        self._local.conn = None
+        self._local.prepared = None
+        with self._pool_lock:
+            for thread, c in list(self._connections.items()):
+                if c is conn:
+                    del self._connections[thread]
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def _prune_dead_threads(self):
+        """Cierra las conexiones de hilos que ya terminaron (llamar con el lock tomado)."""
+        for thread in [t for t in self._connections if not t.is_alive()]:
+            try:
+                self._connections.pop(thread).close()
+            except sqlite3.Error:
+                pass
+
+    def close(self):
+        """Cierra todas las conexiones del pool. Se llama automáticamente al salir."""
+        with self._pool_lock:
+            connections = list(self._connections.values())
+            self._connections.clear()
+            if self._close_at_exit:
+                atexit.unregister(self.close)
+                self._close_at_exit = False
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+
+    def migrate(self):
+        """
+        Lleva el esquema a la última versión (ver app/migrations.py) y verifica
+        el perfil de PRAGMAs. Retorna la versión de esquema resultante.
+        """
+        version = migrations.migrate(self)
+
+        # Verificar que el perfil de PRAGMAs realmente quedó aplicado
+        for name, (expected, actual) in self.verify_profile().items():
+            print(f"Aviso: PRAGMA {name} = {actual} (se esperaba {expected})")
+        return version
+
+    def initialize_tables(self):
+        """Compatibilidad: el esquema ahora lo administran las migraciones versionadas."""
+        return self.migrate()
+
+    # -----------------------------
+    # PLAN DE CONSULTAS
+    # -----------------------------
+    def query_plan(self, query, params=()):
+        """Retorna las líneas de EXPLAIN QUERY PLAN de una consulta (p. ej. 'SEARCH o USING INDEX ...')."""
+        conn = self.get_connection()
+        return [row["detail"] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params)]
+
+    def scans(self, query, params=()):
+        """
+        Retorna los pasos del plan que recorren una tabla o índice completo (SCAN).
+        Una consulta filtrada por columnas indexadas debe retornar una lista vacía.
+        """
+        return [detail for detail in self.query_plan(query, params) if detail.startswith("SCAN")]
+
+    # -----------------------------
+    # TRANSACCIONES
+    # -----------------------------
+    def in_transaction(self):
+        """Indica si el hilo actual tiene una transacción abierta con transaction()."""
+        return getattr(self._local, "depth", 0) > 0
+
+    @contextmanager
+    def transaction(self, immediate=False):
+        """
+        Unidad de trabajo: todo lo ejecutado dentro del bloque `with` (incluidos
+        los métodos de los modelos, que usan la misma conexión del hilo) se
+        confirma con un único COMMIT, o se deshace completo si hay una excepción.
+
+        Los bloques anidados se convierten en SAVEPOINTs, así que un modelo puede
+        abrir su propia transacción y a la vez unirse a una exterior.
+        Con immediate=True se toma el bloqueo de escritura al empezar (BEGIN IMMEDIATE).
+        """
+        conn = self.get_connection()
+        depth = getattr(self._local, "depth", 0)
+        savepoint = f"sp_{depth}"
+
+        if depth == 0:
+            conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+        else:
+            conn.execute(f"SAVEPOINT {savepoint}")
+        self._local.depth = depth + 1
+
+        try:
+            yield conn
+        except BaseException:
+            self._local.depth = depth
+            if depth == 0:
+                conn.rollback()
+                self._run_after_transaction()
+            else:
+                conn.execute(f"ROLLBACK TO {savepoint}")
+                conn.execute(f"RELEASE {savepoint}")
+            raise
+
+        self._local.depth = depth
+        if depth == 0:
+            try:
+                conn.commit()
+            except sqlite3.Error:
+                conn.rollback()
+                raise
+            finally:
+                self._run_after_transaction()
+        else:
+            conn.execute(f"RELEASE {savepoint}")
+
+    def after_transaction(self, callback):
+        """
+        Ejecuta `callback` cuando termine (COMMIT o ROLLBACK) la transacción del hilo
+        actual, o de inmediato si no hay ninguna abierta. Lo usan las cachés para
+        invalidarse recién cuando los cambios son visibles para otras conexiones.
+        """
+        if not self.in_transaction():
+            callback()
+            return
+        pending = getattr(self._local, "after_transaction", None)
+        if pending is None:
+            pending = self._local.after_transaction = []
+        pending.append(callback)
+
+    def _run_after_transaction(self):
+        pending = getattr(self._local, "after_transaction", None)
+        self._local.after_transaction = None
+        for callback in pending or ():
+            callback()
 
 
     def execute(self, query, params=()):
-        """Ejecuta una consulta de modificación (INSERT, UPDATE, DELETE) y retorna el ID insertado."""
+        """
+        Ejecuta una consulta de modificación (INSERT, UPDATE, DELETE) y retorna el ID insertado.
+        Fuera de una transacción cada sentencia se confirma sola (autocommit); dentro
+        de transaction() el error se propaga para que el bloque completo se deshaga.
+        """
         try:
-            conn = self.connect()
-            cursor = conn.cursor()
+            self.get_connection()
+            cursor = self._local.cursor
             cursor.execute(query, params)
-            last_id = cursor.lastrowid
-            conn.commit()
-            conn.close()
-            return last_id
+            return cursor.lastrowid
         except sqlite3.Error as e:
             print(f"Error al ejecutar consulta: {query} - {e}")
+            self._suspect()
+            if self.in_transaction():
+                raise
             return None
 
 
-    def fetch(self, query, params=()):
+    def execute_many(self, query, seq_of_params, chunk_size=500):
+        """
+        Ejecuta la misma sentencia para cada juego de parámetros con executemany,
+        en bloques de `chunk_size` filas y dentro de una única transacción.
+        Para INSERT retorna la lista de IDs generados, en el mismo orden de entrada.
+        """
+        ids = []
+        params_iter = iter(seq_of_params)
+        # No basta comparar last_insert_rowid antes y después: si la sentencia
+        # anterior insertó en otra tabla, el nuevo ID puede coincidir con el viejo.
+        is_insert = query.lstrip().upper().startswith(("INSERT", "REPLACE"))
+        try:
+            with self.transaction() as conn:
+                while True:
+                    chunk = list(islice(params_iter, chunk_size))
+                    if not chunk:
+                        break
+                    conn.executemany(query, chunk)
+                    # Dentro de la transacción tenemos el bloqueo de escritura, así que
+                    # los IDs de un INSERT por bloque son consecutivos y terminan en el último.
+                    if is_insert:
+                        last = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+                        ids.extend(range(last - len(chunk) + 1, last + 1))
+            return ids
+        except sqlite3.Error as e:
+            print(f"Error al ejecutar consulta: {query} - {e}")
+            self._suspect()
+            if self.in_transaction():
+                raise
+            return []
+
+
+    def fetch(self, query, params=(), row_factory=dict):
         """
         Ejecuta una consulta de lectura (SELECT) y retorna todos los resultados 
         como una lista de diccionarios (gracias a row_factory).
+
+        `row_factory` elige el tipo de fila para esta consulta: dict (por defecto),
+        tuple para tuplas sin procesar, o cualquier fábrica (cursor, fila) de sqlite3,
+        como las de app/models/records.py.
         """
         try:
-            conn = self.connect()
-            cursor = conn.cursor()
+            self.get_connection()
+            cursor = self._local.cursor
+            self._set_row_factory(cursor, row_factory)
             cursor.execute(query, params)
             rows = cursor.fetchall()
-            conn.close()
+            if row_factory is not dict:
+                return rows
             # Convertir objetos sqlite3.Row a diccionarios puros antes de retornarlos
             return [dict(row) for row in rows] 
         except sqlite3.Error as e:
             print(f"Error al ejecutar consulta: {query} - {e}")
+            self._suspect()
+            if self.in_transaction():
+                raise
             return []
 
+    def iter_fetch(self, query, params=(), batch_size=500, row_factory=dict):
+        """
+        Versión en streaming de fetch(): generador que entrega las filas como
+        diccionarios (o con `row_factory`), leyéndolas de a `batch_size` con
+        fetchmany. La memoria usada no depende del tamaño del resultado.
+        """
+        try:
+            # Cursor propio (no el reutilizado): el generador puede quedar
+            # suspendido mientras se ejecutan otras consultas en el mismo hilo.
+            cursor = self.get_connection().cursor()
+            self._set_row_factory(cursor, row_factory)
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                if row_factory is dict:
+                    rows = [dict(row) for row in rows]
+                yield from rows
+        except sqlite3.Error as e:
+            print(f"Error al ejecutar consulta: {query} - {e}")
+            self._suspect()
+            if self.in_transaction():
+                raise
+
+    @staticmethod
+    def _set_row_factory(cursor, row_factory):
+        """Configura el tipo de fila del cursor: dict -> sqlite3.Row, tuple -> tupla sin procesar."""
+        if row_factory is dict:
+            cursor.row_factory = sqlite3.Row
+        elif row_factory is tuple:
+            cursor.row_factory = None
+        else:
+            cursor.row_factory = row_factory
+
+    # -----------------------------
+    # SENTENCIAS CON NOMBRE
+    # -----------------------------
+    def _named(self, key):
+        """Retorna el SQL registrado para `key` y actualiza los contadores de la caché."""
+        sql = STATEMENTS[key]
+        # execute/fetch obtienen la conexión enseguida: acá solo hace falta la
+        # primera vez en el hilo, para tener el conjunto de claves preparadas
+        prepared = getattr(self._local, "prepared", None)
+        if prepared is None:
+            self.get_connection()
+            prepared = self._local.prepared
+        with self._stats_lock:
+            if key in prepared:
+                self.statement_hits += 1
+            else:
+                self.statement_misses += 1
+                prepared.add(key)
+        return sql
+
+    def execute_named(self, key, params=()):
+        """Como execute(), pero con una sentencia registrada con register_statements()."""
+        return self.execute(self._named(key), params)
+
+    def execute_many_named(self, key, seq_of_params, chunk_size=500):
+        """Como execute_many(), pero con una sentencia registrada."""
+        return self.execute_many(self._named(key), seq_of_params, chunk_size)
+
+    def fetch_named(self, key, params=(), row_factory=dict):
+        """Como fetch(), pero con una sentencia registrada."""
+        return self.fetch(self._named(key), params, row_factory)
+
+    def iter_fetch_named(self, key, params=(), batch_size=500, row_factory=dict):
+        """Como iter_fetch(), pero con una sentencia registrada."""
+        return self.iter_fetch(self._named(key), params, batch_size, row_factory)
+
+    def statement_stats(self):
+        """
+        Aciertos/fallos de las sentencias con nombre. Un fallo es la primera
+        ejecución de una clave en una conexión (hay que prepararla); las
+        siguientes reutilizan la sentencia ya preparada por SQLite.
+        """
+        with self._stats_lock:
+            hits, misses = self.statement_hits, self.statement_misses
+        total = hits + misses
+        return {
+            "registered": len(STATEMENTS),
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / total if total else 0.0,
+        }
+
 # -------------------------------------------------------------
 # INSTANCIA GLOBAL DE LA BASE DE DATOS
-# Otros módulos (como Customer, Order) pueden importar y usar esta instancia.
-# Al crearla aquí, también se ejecuta initialize_tables() por primera vez.
+# Única instancia compartida por todos los modelos: importarla no abre
+# conexiones ni ejecuta DDL; eso ocurre en la primera consulta real.
+# LAVANDERIA_DB permite apuntarla a otro archivo (p. ej. en las pruebas).
 # -------------------------------------------------------------
-db = Database()
\ No newline at end of file
+db = Database(os.environ.get("LAVANDERIA_DB", "lavanderia.db"))
\ No newline at end of file
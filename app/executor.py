@@ -0,0 +1,137 @@
+"""
+Ejecutor de consultas en segundo plano para la GUI.
+
+Tkinter no es seguro entre hilos y su bucle de eventos se congela mientras una
+consulta espera un bloqueo o el disco. QueryExecutor corre las funciones de los
+modelos en un hilo de base de datos propio (que abre su conexión del pool como
+cualquier otro hilo) y entrega los resultados de vuelta en el hilo de Tk:
+attach(widget) sondea con after() la cola de resultados y llama ahí a los
+callbacks, así los widgets solo se tocan desde su hilo.
+
+Un trabajo enviado con `key` reemplaza al anterior con la misma clave: si no
+empezó se cancela, y si ya corrió su resultado se descarta (p. ej. el refresco
+de una pestaña que el usuario ya dejó).
+"""
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Intervalo de sondeo (~60 cuadros por segundo) y tiempo máximo que cada
+# sondeo dedica a los callbacks antes de devolverle el control a Tk
+POLL_INTERVAL_MS = 16
+DELIVERY_BUDGET = 0.008
+
+
+class QueryExecutor:
+    """
+    Corre funciones en `workers` hilos de base de datos y retorna Futures.
+    Con un solo hilo (por defecto) los trabajos se ejecutan en el orden en que
+    se enviaron: un refresco pedido después de una escritura ya la ve.
+    """
+    def __init__(self, workers=1, name="db"):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+        self._results = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._latest = {}  # clave -> último Future enviado con esa clave
+        self._poll_job = None
+        self._widget = None
+
+    def submit(self, fn, *args, key=None, on_done=None, on_error=None, **kwargs):
+        """
+        Programa fn(*args, **kwargs) en el hilo de base de datos y retorna su
+        Future. on_done(resultado) u on_error(excepción) se llaman desde
+        deliver(), en el hilo que la llame (el de Tk si se usó attach).
+        """
+        future = self._pool.submit(fn, *args, **kwargs)
+        if key is not None:
+            with self._lock:
+                previous = self._latest.get(key)
+                self._latest[key] = future
+            if previous is not None:
+                previous.cancel()
+        if on_done is not None or on_error is not None:
+            future.add_done_callback(lambda f: self._results.put((key, f, on_done, on_error)))
+        return future
+
+    def cancel(self, key):
+        """Cancela (o descarta, si ya empezó) el último trabajo enviado con `key`."""
+        with self._lock:
+            future = self._latest.pop(key, None)
+        if future is not None:
+            future.cancel()
+
+    def pending(self, key):
+        """Indica si hay un trabajo vigente con `key` cuyo resultado aún no se entregó."""
+        with self._lock:
+            return key in self._latest
+
+    def _take(self, key, future):
+        """True si `future` sigue siendo el vigente para `key` (y deja de estar pendiente)."""
+        if key is None:
+            return True
+        with self._lock:
+            if self._latest.get(key) is not future:
+                return False
+            del self._latest[key]
+            return True
+
+    def deliver(self, budget=None):
+        """
+        Llama a los callbacks de los trabajos terminados, en el hilo actual.
+        Con `budget` (segundos) se detiene al agotarlo y deja el resto para la
+        próxima llamada. Retorna cuántos resultados entregó.
+        """
+        deadline = None if budget is None else time.monotonic() + budget
+        delivered = 0
+        while deadline is None or time.monotonic() < deadline:
+            try:
+                key, future, on_done, on_error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if future.cancelled() or not self._take(key, future):
+                continue
+            error = future.exception()
+            if error is None:
+                if on_done is not None:
+                    on_done(future.result())
+            elif on_error is not None:
+                on_error(error)
+            else:
+                print(f"Error al ejecutar consulta: {error}")
+            delivered += 1
+        return delivered
+
+    # -----------------------------
+    # INTEGRACIÓN CON TKINTER
+    # -----------------------------
+    def attach(self, widget, interval_ms=POLL_INTERVAL_MS):
+        """Entrega los resultados en el bucle de eventos de `widget`, sondeando con after()."""
+        self.detach()
+        self._widget = widget
+
+        def poll():
+            self.deliver(DELIVERY_BUDGET)
+            self._poll_job = widget.after(interval_ms, poll)
+
+        self._poll_job = widget.after(interval_ms, poll)
+
+    def detach(self):
+        if self._poll_job is not None:
+            self._widget.after_cancel(self._poll_job)
+        self._poll_job = None
+        self._widget = None
+
+    def shutdown(self, wait=True):
+        """
+        Deja de sondear y cierra el hilo de base de datos. Los trabajos con clave
+        (refrescos) que aún no empezaron se cancelan; los demás, como las
+        escrituras, se ejecutan igual. Con wait=True se espera a que terminen.
+        """
+        self.detach()
+        with self._lock:
+            superseded = list(self._latest.values())
+            self._latest.clear()
+        for future in superseded:
+            future.cancel()
+        self._pool.shutdown(wait=wait)
@@ -0,0 +1,471 @@
+"""
+Migraciones versionadas del esquema de la base de datos.
+
+La versión aplicada se guarda en PRAGMA user_version. Cada paso corre dentro de
+su propia transacción junto con el cambio de versión, así que o se aplica
+completo o no se aplica. Los pasos son idempotentes: también funcionan sobre
+bases creadas por versiones anteriores de database.py o de setup_db.py, cuyos
+esquemas no coincidían entre sí.
+"""
+
+# -------------------------------------------------------------
+# ÍNDICES SECUNDARIOS
+# Claves foráneas y columnas de filtro frecuentes. (status, date) sirve al
+# tablero de órdenes abiertas y, por ser prefijo, a los filtros por estado.
+# -------------------------------------------------------------
+INDEXES = {
+    "idx_orders_customer_id": "orders (customer_id)",
+    "idx_orders_status_date": "orders (status, date)",
+    "idx_orders_date": "orders (date)",
+    "idx_payments_order_id": "payments (order_id)",
+}
+
+# Índices de migraciones posteriores (se crean en su propio paso)
+ORDER_ITEM_INDEXES = {
+    "idx_order_items_order_id": "order_items (order_id)",
+    "idx_order_items_service_id": "order_items (service_id)",
+}
+
+# Índices de los reportes (migración 7). El de pagos es "cubriente": el reporte
+# de ingresos por día y método se resuelve leyendo solo el índice. El de órdenes
+# es parcial: solo indexa las órdenes con saldo, que son las que mira la
+# antigüedad de cuentas por cobrar.
+REPORT_INDEXES = {
+    "idx_payments_date_method": "payments (date, method, amount_cents)",
+    "idx_orders_open_balance": "orders (customer_id, date) WHERE paid_cents < total_cents",
+}
+
+# Importes REAL que pasan a centavos enteros: (tabla, columna vieja, columna nueva)
+MONEY_COLUMNS = [
+    ("services", "price", "price_cents"),
+    ("orders", "total", "total_cents"),
+    ("orders", "paid", "paid_cents"),
+    ("payments", "amount", "amount_cents"),
+    ("order_items", "unit_price", "unit_price_cents"),
+]
+
+# Estados que los triggers de pagos asignan a la orden: pasa a pagada cuando el
+# saldo llega al total y vuelve a pendiente si un pago editado o borrado la deja corta.
+PAID_STATUS = "Pagado y Terminado"
+REOPENED_STATUS = "Pendiente"
+
+
+def _columns(conn, table):
+    """Nombres de las columnas actuales de una tabla."""
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def _add_column(conn, table, column, definition):
+    """ALTER TABLE ... ADD COLUMN solo si la columna no existe (no copia la tabla)."""
+    if column not in _columns(conn, table):
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+# -----------------------------
+# PASOS
+# -----------------------------
+def _v1_base_schema(conn):
+    """Esquema unificado para instalaciones nuevas (no toca tablas ya existentes)."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS customers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            phone TEXT,
+            email TEXT,
+            created_at TEXT,
+            updated_at TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS services (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            price REAL NOT NULL
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS orders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            customer_id INTEGER NOT NULL,
+            service_id INTEGER,
+            total REAL NOT NULL DEFAULT 0,
+            paid REAL NOT NULL DEFAULT 0,
+            date TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            FOREIGN KEY (customer_id) REFERENCES customers(id),
+            FOREIGN KEY (service_id) REFERENCES services(id)
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS payments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            order_id INTEGER NOT NULL,
+            amount REAL NOT NULL,
+            method TEXT NOT NULL DEFAULT 'Efectivo',
+            date TEXT,
+            created_at TEXT,
+            updated_at TEXT,
+            FOREIGN KEY (order_id) REFERENCES orders(id)
+        )
+    """)
+
+
+def _v2_reconcile_legacy_columns(conn):
+    """
+    Lleva al esquema unificado las bases creadas con los esquemas anteriores,
+    en el lugar: solo ADD COLUMN / RENAME COLUMN y UPDATE, sin copiar tablas.
+    """
+    # Esquema viejo de database.py: clientes sin email ni auditoría
+    _add_column(conn, "customers", "email", "TEXT")
+    _add_column(conn, "customers", "created_at", "TEXT")
+    _add_column(conn, "customers", "updated_at", "TEXT")
+
+    # database.py no tenía service_id; setup_db.py no tenía total ni paid
+    _add_column(conn, "orders", "service_id", "INTEGER REFERENCES services(id)")
+    _add_column(conn, "orders", "total", "REAL NOT NULL DEFAULT 0")
+    _add_column(conn, "orders", "paid", "REAL NOT NULL DEFAULT 0")
+
+    # setup_db.py llamaba 'payment' al método de pago y no tenía 'date';
+    # database.py no tenía campos de auditoría
+    payment_columns = _columns(conn, "payments")
+    if "payment" in payment_columns and "method" not in payment_columns:
+        conn.execute("ALTER TABLE payments RENAME COLUMN payment TO method")
+    _add_column(conn, "payments", "method", "TEXT NOT NULL DEFAULT 'Efectivo'")
+    _add_column(conn, "payments", "date", "TEXT")
+    _add_column(conn, "payments", "created_at", "TEXT")
+    _add_column(conn, "payments", "updated_at", "TEXT")
+    conn.execute("""
+        UPDATE payments
+        SET date = substr(replace(created_at, 'T', ' '), 1, 16)
+        WHERE date IS NULL AND created_at IS NOT NULL
+    """)
+
+
+def _v3_indexes(conn):
+    """Índices secundarios declarados en INDEXES."""
+    for name, target in INDEXES.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+
+
+def _v4_order_items(conn):
+    """
+    Detalle de cada orden: una fila por servicio del carrito. El nombre y el
+    precio se copian al momento de la venta, así cambiar el catálogo no altera
+    órdenes pasadas; por eso service_id puede quedar en NULL si el servicio se borra.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS order_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            order_id INTEGER NOT NULL,
+            service_id INTEGER,
+            description TEXT NOT NULL,
+            quantity REAL NOT NULL,
+            unit_price REAL NOT NULL,
+            FOREIGN KEY (order_id) REFERENCES orders(id) ON DELETE CASCADE,
+            FOREIGN KEY (service_id) REFERENCES services(id) ON DELETE SET NULL
+        )
+    """)
+    for name, target in ORDER_ITEM_INDEXES.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+
+
+def _v5_money_as_cents(conn):
+    """
+    Pasa los importes de REAL a centavos INTEGER. Cada columna se reemplaza en
+    el lugar: ADD COLUMN *_cents, se copia el valor redondeado y DROP COLUMN de
+    la vieja (SQLite 3.35+). order_items gana además el importe de cada línea ya
+    calculado, para que los totales sean un SUM entero.
+    """
+    for table, old, new in MONEY_COLUMNS:
+        columns = _columns(conn, table)
+        if new not in columns:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {new} INTEGER NOT NULL DEFAULT 0")
+            if old in columns:
+                conn.execute(f"""
+                    UPDATE {table} SET {new} = CAST(ROUND({old} * 100) AS INTEGER)
+                    WHERE {old} IS NOT NULL
+                """)
+        if old in columns:
+            conn.execute(f"ALTER TABLE {table} DROP COLUMN {old}")
+
+    if "line_total_cents" not in _columns(conn, "order_items"):
+        conn.execute("ALTER TABLE order_items ADD COLUMN line_total_cents INTEGER NOT NULL DEFAULT 0")
+        conn.execute("""
+            UPDATE order_items
+            SET line_total_cents = CAST(ROUND(quantity * unit_price_cents) AS INTEGER)
+        """)
+
+
+def _apply_payment_sql(order_id, delta, condition="1"):
+    """UPDATE que suma `delta` centavos al pagado de una orden y ajusta su estado."""
+    return f"""
+        UPDATE orders
+        SET paid_cents = paid_cents + ({delta}),
+            status = CASE
+                WHEN paid_cents + ({delta}) >= total_cents AND paid_cents + ({delta}) > 0
+                    THEN '{PAID_STATUS}'
+                WHEN status = '{PAID_STATUS}' THEN '{REOPENED_STATUS}'
+                ELSE status
+            END
+        WHERE id = {order_id} AND {condition};
+    """
+
+
+def _v6_balance_triggers(conn):
+    """
+    orders.paid_cents pasa a mantenerlo SQLite: cada INSERT/UPDATE/DELETE de
+    payments ajusta el pagado y el estado de su orden dentro de la misma
+    sentencia, sin importar desde dónde se escriba el pago. Antes de crear los
+    triggers se recalcula el pagado de todas las órdenes desde sus pagos, para
+    que los ajustes incrementales partan de un valor correcto.
+    """
+    conn.execute("""
+        UPDATE orders
+        SET paid_cents = COALESCE((SELECT SUM(amount_cents) FROM payments
+                                   WHERE order_id = orders.id), 0)
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_payments_insert AFTER INSERT ON payments
+        BEGIN
+            {_apply_payment_sql("NEW.order_id", "NEW.amount_cents")}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_payments_delete AFTER DELETE ON payments
+        BEGIN
+            {_apply_payment_sql("OLD.order_id", "-OLD.amount_cents")}
+        END
+    """)
+    # Si el pago sigue en la misma orden se aplica solo la diferencia; si cambió
+    # de orden, se descuenta de la vieja y se suma a la nueva.
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_payments_update
+        AFTER UPDATE OF order_id, amount_cents ON payments
+        BEGIN
+            {_apply_payment_sql("NEW.order_id", "NEW.amount_cents - OLD.amount_cents",
+                                "OLD.order_id IS NEW.order_id")}
+            {_apply_payment_sql("OLD.order_id", "-OLD.amount_cents",
+                                "OLD.order_id IS NOT NEW.order_id")}
+            {_apply_payment_sql("NEW.order_id", "NEW.amount_cents",
+                                "OLD.order_id IS NOT NEW.order_id")}
+        END
+    """)
+
+
+def _v7_report_indexes(conn):
+    """Índices declarados en REPORT_INDEXES."""
+    for name, target in REPORT_INDEXES.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+
+
+def _rollup_add_sql(table, keys, values, condition):
+    """
+    INSERT ... ON CONFLICT que suma `values` (columna -> expresión) a la fila
+    de `keys` (columna -> expresión), creándola si no existe.
+    """
+    columns = list(keys) + list(values)
+    select = ", ".join(list(keys.values()) + list(values.values()))
+    updates = ", ".join(f"{c} = {c} + excluded.{c}" for c in values)
+    return f"""
+        INSERT INTO {table} ({", ".join(columns)})
+        SELECT {select} WHERE {condition}
+        ON CONFLICT ({", ".join(keys)}) DO UPDATE SET {updates};
+    """
+
+
+def _rollup_remove_sql(table, keys, values, condition, count_column):
+    """Resta `values` de la fila de `keys` y la borra si su contador llega a cero."""
+    where = " AND ".join(f"{c} = {e}" for c, e in keys.items())
+    updates = ", ".join(f"{c} = {c} - ({e})" for c, e in values.items())
+    return f"""
+        UPDATE {table} SET {updates} WHERE {where} AND {condition};
+        DELETE FROM {table} WHERE {where} AND {count_column} <= 0;
+    """
+
+
+def rebuild_rollups(conn):
+    """
+    Recalcula desde cero las tablas de resumen a partir de payments y orders.
+    La llaman la migración 8 y `python -m app.reports rebuild`.
+    """
+    conn.execute("DELETE FROM daily_revenue")
+    conn.execute("""
+        INSERT INTO daily_revenue (day, method, payments, revenue_cents)
+        SELECT substr(date, 1, 10), method, COUNT(*), SUM(amount_cents)
+        FROM payments
+        WHERE date IS NOT NULL
+        GROUP BY substr(date, 1, 10), method
+    """)
+    conn.execute("DELETE FROM status_counts")
+    conn.execute("""
+        INSERT INTO status_counts (status, orders)
+        SELECT status, COUNT(*) FROM orders WHERE status IS NOT NULL GROUP BY status
+    """)
+
+
+def _v8_rollups(conn):
+    """
+    Tablas de resumen para el tablero: ingresos por día y método (daily_revenue)
+    y cantidad de órdenes por estado (status_counts). Los triggers las ajustan
+    en cada escritura, así que el tablero lee unas pocas filas sin importar
+    cuánta historia haya. Los cambios de estado que hacen los triggers de saldo
+    (migración 6) también disparan los de status_counts.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS daily_revenue (
+            day TEXT NOT NULL,
+            method TEXT NOT NULL,
+            payments INTEGER NOT NULL,
+            revenue_cents INTEGER NOT NULL,
+            PRIMARY KEY (day, method)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS status_counts (
+            status TEXT PRIMARY KEY,
+            orders INTEGER NOT NULL
+        ) WITHOUT ROWID
+    """)
+
+    def revenue(prefix):
+        keys = {"day": f"substr({prefix}.date, 1, 10)", "method": f"{prefix}.method"}
+        values = {"payments": "1", "revenue_cents": f"{prefix}.amount_cents"}
+        return keys, values, f"{prefix}.date IS NOT NULL"
+
+    def status(prefix):
+        return {"status": f"{prefix}.status"}, {"orders": "1"}, f"{prefix}.status IS NOT NULL"
+
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_daily_revenue_insert AFTER INSERT ON payments
+        BEGIN
+            {_rollup_add_sql("daily_revenue", *revenue("NEW"))}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_daily_revenue_delete AFTER DELETE ON payments
+        BEGIN
+            {_rollup_remove_sql("daily_revenue", *revenue("OLD"), "payments")}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_daily_revenue_update
+        AFTER UPDATE OF date, method, amount_cents ON payments
+        BEGIN
+            {_rollup_remove_sql("daily_revenue", *revenue("OLD"), "payments")}
+            {_rollup_add_sql("daily_revenue", *revenue("NEW"))}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_status_counts_insert AFTER INSERT ON orders
+        BEGIN
+            {_rollup_add_sql("status_counts", *status("NEW"))}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_status_counts_delete AFTER DELETE ON orders
+        BEGIN
+            {_rollup_remove_sql("status_counts", *status("OLD"), "orders")}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_status_counts_update
+        AFTER UPDATE OF status ON orders WHEN OLD.status IS NOT NEW.status
+        BEGIN
+            {_rollup_remove_sql("status_counts", *status("OLD"), "orders")}
+            {_rollup_add_sql("status_counts", *status("NEW"))}
+        END
+    """)
+    rebuild_rollups(conn)
+
+
+def _fts5_available(conn):
+    return any(row[0] == "ENABLE_FTS5" for row in conn.execute("PRAGMA compile_options"))
+
+
+def _v9_customer_search(conn):
+    """
+    Búsqueda de clientes: índice por nombre para los listados ordenados y una
+    tabla FTS5 de contenido externo (customers_fts) sobre nombre, teléfono y
+    email. Solo guarda el índice de palabras; los triggers la mantienen al día.
+    unicode61 con remove_diacritics hace que "jose" encuentre "José". Si esta
+    compilación de SQLite no trae FTS5, Customer.search() usa LIKE.
+    """
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_customers_name ON customers (name)")
+    if not _fts5_available(conn):
+        return
+    conn.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS customers_fts USING fts5(
+            name, phone, email,
+            content='customers', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_customers_fts_insert AFTER INSERT ON customers
+        BEGIN
+            INSERT INTO customers_fts (rowid, name, phone, email)
+            VALUES (NEW.id, NEW.name, NEW.phone, NEW.email);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_customers_fts_delete AFTER DELETE ON customers
+        BEGIN
+            INSERT INTO customers_fts (customers_fts, rowid, name, phone, email)
+            VALUES ('delete', OLD.id, OLD.name, OLD.phone, OLD.email);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_customers_fts_update
+        AFTER UPDATE OF name, phone, email ON customers
+        BEGIN
+            INSERT INTO customers_fts (customers_fts, rowid, name, phone, email)
+            VALUES ('delete', OLD.id, OLD.name, OLD.phone, OLD.email);
+            INSERT INTO customers_fts (rowid, name, phone, email)
+            VALUES (NEW.id, NEW.name, NEW.phone, NEW.email);
+        END
+    """)
+    conn.execute("INSERT INTO customers_fts (customers_fts) VALUES ('rebuild')")
+
+
+# (versión, descripción, paso) en orden. No modificar pasos ya publicados:
+# los cambios de esquema nuevos se agregan al final con la versión siguiente.
+MIGRATIONS = [
+    (1, "esquema base", _v1_base_schema),
+    (2, "reconciliar columnas de esquemas anteriores", _v2_reconcile_legacy_columns),
+    (3, "índices secundarios", _v3_indexes),
+    (4, "tabla order_items", _v4_order_items),
+    (5, "importes en centavos enteros", _v5_money_as_cents),
+    (6, "triggers de saldo por orden", _v6_balance_triggers),
+    (7, "índices de reportes", _v7_report_indexes),
+    (8, "tablas de resumen para el tablero", _v8_rollups),
+    (9, "búsqueda de clientes", _v9_customer_search),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(conn):
+    """Versión de esquema registrada en la base (0 si nunca se migró)."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(db):
+    """
+    Aplica en orden las migraciones pendientes sobre `db` y retorna la versión final.
+    Si la base ya está al día solo cuesta leer PRAGMA user_version.
+    """
+    conn = db.get_connection()
+    if current_version(conn) >= SCHEMA_VERSION:
+        return SCHEMA_VERSION
+
+    for version, description, step in MIGRATIONS:
+        # BEGIN IMMEDIATE + releer la versión: si otra terminal migra al mismo
+        # tiempo, el segundo proceso espera y luego salta los pasos ya aplicados.
+        with db.transaction(immediate=True) as conn:
+            if current_version(conn) >= version:
+                continue
+            step(conn)
+            conn.execute(f"PRAGMA user_version = {version}")
+            print(f"Migración {version} aplicada: {description}")
+
+    return SCHEMA_VERSION
@@ -1,6 +1,71 @@
-from app.database import db # ¡Ahora funciona!
+import re
+
+from app.cache import identity_map, invalidate_on_write
+from app.database import db, register_statements # ¡Ahora funciona!
+from app.models.records import CustomerRecord
 from datetime import datetime
 
+# Sentencias del modelo: se registran una vez y se ejecutan por clave
+register_statements({
+    "customer.insert": """
+        INSERT INTO customers (name, phone, email, created_at, updated_at)
+        VALUES (?, ?, ?, ?, ?)
+    """,
+    "customer.update": """
+        UPDATE customers
+        SET name=?, phone=?, email=?, updated_at=?
+        WHERE id=?
+    """,
+    "customer.get_by_id": "SELECT id, name, phone, email, created_at, updated_at FROM customers WHERE id=?",
+    "customer.all": "SELECT id, name, phone, email, created_at, updated_at FROM customers",
+    "customer.page": """
+        SELECT id, name, phone, email, created_at, updated_at FROM customers
+        WHERE id > ? ORDER BY id LIMIT ?
+    """,
+    "customer.delete": "DELETE FROM customers WHERE id=?",
+    # Búsqueda: FTS5 ordenado por relevancia (bm25), o LIKE si no hay FTS5
+    "customer.has_fts": "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'customers_fts'",
+    "customer.search_fts": """
+        SELECT c.id, c.name, c.phone, c.email, c.created_at, c.updated_at
+        FROM customers_fts
+        JOIN customers c ON c.id = customers_fts.rowid
+        WHERE customers_fts MATCH ?
+        ORDER BY customers_fts.rank, c.name
+        LIMIT ?
+    """,
+    "customer.search_like": r"""
+        SELECT id, name, phone, email, created_at, updated_at FROM customers
+        WHERE name LIKE ? ESCAPE '\' OR phone LIKE ? ESCAPE '\' OR email LIKE ? ESCAPE '\'
+        ORDER BY name, id
+        LIMIT ?
+    """,
+    # Paginación por clave en orden alfabético: (name, id) desempata homónimos
+    "customer.page_by_name": """
+        SELECT id, name, phone, email, created_at, updated_at FROM customers
+        WHERE (name, id) > (?, ?) ORDER BY name, id LIMIT ?
+    """,
+    "customer.first_by_name": """
+        SELECT id, name, phone, email, created_at, updated_at FROM customers
+        ORDER BY name, id LIMIT ?
+    """,
+})
+
+# Palabras de la búsqueda: letras y dígitos (igual que separa unicode61)
+_SEARCH_TOKEN = re.compile(r"\w+")
+
+
+def _fts_query(text):
+    """
+    'ana lop' -> '"ana"* "lop"*': cada palabra como prefijo y todas obligatorias.
+    Entre comillas, lo que escriba el usuario no se interpreta como operador FTS5.
+    """
+    return " ".join(f'"{token}"*' for token in _SEARCH_TOKEN.findall(text))
+
+
+def _like_pattern(text):
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
 class Customer:
     """Modelo de Cliente."""
     def __init__(self, name, phone=None, email=None, id=None, created_at=None, updated_at=None):
@@ -16,58 +81,114 @@ class Customer:
     # -----------------------------
     @staticmethod
     def create(name, phone=None, email=None):
-        query = """
-            INSERT INTO customers (name, phone, email, created_at, updated_at)
-            VALUES (?, ?, ?, ?, ?)
-        """
         created_at = datetime.now().isoformat()
         updated_at = datetime.now().isoformat()
         
-        customer_id = db.execute(query, (name, phone, email, created_at, updated_at))
+        customer_id = db.execute_named("customer.insert", (name, phone, email, created_at, updated_at))
         
         return customer_id
 
+    # -----------------------------
+    # BULK CREATE / BULK UPDATE
+    # -----------------------------
+    @staticmethod
+    def bulk_create(customers, chunk_size=500):
+        """
+        Inserta muchos clientes en una sola transacción.
+        `customers` es un iterable de diccionarios con 'name' y opcionalmente 'phone'/'email'.
+        Retorna la lista de IDs generados.
+        """
+        now = datetime.now().isoformat()
+        params = (
+            (c['name'], c.get('phone'), c.get('email'), now, now)
+            for c in customers
+        )
+        return db.execute_many_named("customer.insert", params, chunk_size)
+
+    @staticmethod
+    def bulk_update(customers, chunk_size=500):
+        """Actualiza muchos clientes (diccionarios con 'id', 'name', 'phone', 'email') en una sola transacción."""
+        now = datetime.now().isoformat()
+        params = (
+            (c['name'], c.get('phone'), c.get('email'), now, c['id'])
+            for c in customers
+        )
+        db.execute_many_named("customer.update", params, chunk_size)
+        invalidate_on_write(db, identity_map.invalidate_table, "customers")
+
     # -----------------------------
     # GET BY ID
     # -----------------------------
     @staticmethod
     def get_by_id(customer_id):
-        query = "SELECT id, name, phone, email, created_at, updated_at FROM customers WHERE id=?"
-        rows = db.fetch(query, (customer_id,))
+        """
+        Retorna el Customer (o None). Las búsquedas repetidas se sirven desde el
+        mapa de identidad, que guarda el CustomerRecord inmutable; cada llamada
+        recibe su propia copia editable.
+        """
+        try:
+            customer_id = int(customer_id)
+        except (TypeError, ValueError):
+            return None
+        record = identity_map.get("customers", customer_id, lambda: Customer._load(customer_id))
+        return Customer.from_record(record) if record else None
 
-        if not rows:
-            return None 
-        
-        # Acceso por nombre de columna
-        r = rows[0]
-        return Customer(
-            id=r['id'],
-            name=r['name'],
-            phone=r['phone'],
-            email=r['email'],
-            created_at=r['created_at'],
-            updated_at=r['updated_at']
-        )
+    @staticmethod
+    def _load(customer_id):
+        rows = db.fetch_named("customer.get_by_id", (customer_id,), CustomerRecord.factory)
+        return rows[0] if rows else None
+
+    @staticmethod
+    def from_record(record):
+        """Customer editable (update/delete) a partir de un CustomerRecord."""
+        return Customer(**record._asdict())
 
     # -----------------------------
     # GET ALL
     # -----------------------------
     @staticmethod
     def all():
-        rows = db.fetch("SELECT id, name, phone, email, created_at, updated_at FROM customers")
-
-        return [
-            {
-                # Acceso por nombre de columna
-                "id": r['id'],
-                "name": r['name'],
-                "phone": r['phone'],
-                "email": r['email'],
-                "created_at": r['created_at'],
-                "updated_at": r['updated_at']
-            }
-            for r in rows
-        ]
+        # Registros compactos (r['name'] sigue funcionando) construidos directo por SQLite
+        return db.fetch_named("customer.all", row_factory=CustomerRecord.factory)
+
+    # -----------------------------
+    # SEARCH (BÚSQUEDA POR PREFIJO)
+    # -----------------------------
+    @staticmethod
+    def search(q, limit=20):
+        """
+        Hasta `limit` clientes cuyo nombre, teléfono o email tienen palabras que
+        empiezan con las de `q` ("ana lop" encuentra "Ana López"), los más
+        relevantes primero. Con `q` vacío retorna los primeros por nombre.
+        """
+        q = (q or "").strip()
+        if not q:
+            return db.fetch_named("customer.first_by_name", (limit,), CustomerRecord.factory)
+        match = _fts_query(q)
+        if match and db.fetch_named("customer.has_fts"):
+            return db.fetch_named("customer.search_fts", (match, limit), CustomerRecord.factory)
+        pattern = _like_pattern(q)
+        return db.fetch_named("customer.search_like", (pattern, pattern, pattern, limit), CustomerRecord.factory)
+
+    # -----------------------------
+    # PAGE (PAGINACIÓN POR CLAVE)
+    # -----------------------------
+    @staticmethod
+    def page(after_id=None, limit=100):
+        """
+        Retorna hasta `limit` clientes con id mayor que `after_id`, ordenados por id.
+        Para la página siguiente se pasa el id del último cliente recibido.
+        """
+        return db.fetch_named("customer.page", (after_id or 0, limit), CustomerRecord.factory)
+
+    @staticmethod
+    def page_by_name(after=None, limit=100):
+        """
+        Como page(), pero en orden alfabético. `after` es la clave (name, id)
+        del último cliente recibido; None para la primera página.
+        """
+        name, customer_id = after or ("", 0)
+        return db.fetch_named("customer.page_by_name", (name, customer_id, limit), CustomerRecord.factory)
 
     # -----------------------------
     # UPDATE
@@ -78,19 +199,21 @@ class Customer:
 
         self.updated_at = datetime.now().isoformat()
 
-        query = """
-            UPDATE customers
-            SET name=?, phone=?, email=?, updated_at=?
-            WHERE id=?
-        """
-        
-        db.execute(query, (self.name, self.phone, self.email, self.updated_at, self.id))
+        db.execute_named("customer.update", (self.name, self.phone, self.email, self.updated_at, self.id))
+        invalidate_on_write(db, identity_map.invalidate, "customers", self.id)
 
     # -----------------------------
     # DELETE
     # -----------------------------
     def delete(self):
+        """
+        Borra el cliente. Con foreign_keys activo, si tiene órdenes el borrado
+        se rechaza: lanza sqlite3.IntegrityError y el cliente queda como estaba.
+        """
         if self.id is None:
             raise ValueError("Customer must have an ID to delete.")
 
-        db.execute("DELETE FROM customers WHERE id=?", (self.id,))
\ No newline at end of file
+        # Dentro de una transacción el error se propaga en lugar de solo imprimirse
+        with db.transaction():
+            db.execute_named("customer.delete", (self.id,))
+        invalidate_on_write(db, identity_map.invalidate, "customers", self.id)
\ No newline at end of file
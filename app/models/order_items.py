@@ -0,0 +1,57 @@
+from app.database import db, register_statements
+from app.models.records import OrderItemRecord, ServiceRevenueRecord
+from app.money import as_cents, line_total
+
+register_statements({
+    "order_item.insert": """
+        INSERT INTO order_items (order_id, service_id, description, quantity,
+                                 unit_price_cents, line_total_cents)
+        VALUES (?, ?, ?, ?, ?, ?);
+    """,
+    "order_item.get_by_order": """
+        SELECT id, order_id, service_id, description, quantity,
+               unit_price_cents, line_total_cents
+        FROM order_items WHERE order_id = ? ORDER BY id;
+    """,
+    "order_item.delete_by_order": "DELETE FROM order_items WHERE order_id = ?;",
+    # Facturación por servicio calculada en SQL, sin traer los ítems a Python
+    "order_item.revenue_by_service": """
+        SELECT service_id, MAX(description) AS description, SUM(quantity) AS quantity,
+               SUM(line_total_cents) AS revenue_cents, COUNT(DISTINCT order_id) AS orders
+        FROM order_items
+        GROUP BY service_id
+        ORDER BY revenue_cents DESC;
+    """,
+})
+
+class OrderItem:
+    """Ítems (servicios del carrito) de una orden."""
+
+    @staticmethod
+    def bulk_create(order_id, items, chunk_size=500):
+        """
+        Guarda los ítems de una orden con un solo executemany. Cada ítem es un
+        diccionario con 'service_id', 'name', 'price_cents' y 'qty' (el formato
+        del carrito de la GUI). El importe de la línea se redondea al centavo una
+        sola vez, acá, así el total de la orden es una suma entera exacta.
+        Retorna los IDs generados.
+        """
+        params = (
+            (order_id, i.get('service_id'), i['name'], i['qty'],
+             as_cents(i['price_cents']), line_total(i['price_cents'], i['qty']))
+            for i in items
+        )
+        return db.execute_many_named("order_item.insert", params, chunk_size)
+
+    @staticmethod
+    def get_by_order(order_id):
+        return db.fetch_named("order_item.get_by_order", (order_id,), OrderItemRecord.factory)
+
+    @staticmethod
+    def delete_by_order(order_id):
+        db.execute_named("order_item.delete_by_order", (order_id,))
+
+    @staticmethod
+    def revenue_by_service():
+        """Cantidad vendida, facturación y número de órdenes por servicio (mayor facturación primero)."""
+        return db.fetch_named("order_item.revenue_by_service", row_factory=ServiceRevenueRecord.factory)
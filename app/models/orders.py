@@ -1,33 +1,241 @@
-from app.database import Database
+from app.cache import identity_map, invalidate_on_write
+from app.database import db, register_statements
+from app.models.order_items import OrderItem
+from app.migrations import PAID_STATUS, REOPENED_STATUS
+from app.models.records import BalanceMismatchRecord, OrderRecord, OrderSummaryRecord
 
-db = Database()
+# Columnas en el orden de OrderRecord (no se usa SELECT *: el orden físico de
+# las columnas depende de qué esquema anterior migró la base). paid_cents lo
+# mantienen los triggers de payments, así que el saldo es una resta en la fila.
+ORDER_COLUMNS = ("id, customer_id, service_id, total_cents, paid_cents, date, status, "
+                 "total_cents - paid_cents AS balance_cents")
+
+# Pagado de cada orden recalculado desde cero (para verify_balances)
+_EXPECTED_PAID = """
+    SELECT o.id AS order_id, o.paid_cents, COALESCE(p.paid, 0) AS expected_cents
+    FROM orders o
+    LEFT JOIN (SELECT order_id, SUM(amount_cents) AS paid FROM payments GROUP BY order_id) p
+        ON p.order_id = o.id
+"""
+
+register_statements({
+    # El total de la orden es el precio del servicio elegido
+    "order.insert": """
+        INSERT INTO orders (customer_id, service_id, total_cents, date, status)
+        VALUES (?, ?, COALESCE((SELECT price_cents FROM services WHERE id = ?), 0), ?, ?);
+    """,
+    # Orden con carrito: el total se calcula después a partir de sus ítems
+    "order.insert_header": """
+        INSERT INTO orders (customer_id, total_cents, paid_cents, date, status)
+        VALUES (?, 0, 0, ?, ?);
+    """,
+    # Las órdenes sin ítems (un solo servicio, esquema anterior) conservan su total
+    "order.recompute_total": """
+        UPDATE orders
+        SET total_cents = COALESCE((SELECT SUM(line_total_cents) FROM order_items
+                                    WHERE order_id = orders.id), total_cents)
+        WHERE id = ?;
+    """,
+    "order.recompute_totals": """
+        UPDATE orders
+        SET total_cents = (SELECT SUM(line_total_cents) FROM order_items
+                           WHERE order_id = orders.id)
+        WHERE id IN (SELECT order_id FROM order_items);
+    """,
+    "order.balance_mismatches": f"""
+        SELECT order_id, paid_cents, expected_cents FROM ({_EXPECTED_PAID})
+        WHERE paid_cents != expected_cents;
+    """,
+    "order.repair_balances": f"""
+        UPDATE orders
+        SET paid_cents = e.expected_cents,
+            status = CASE
+                WHEN e.expected_cents >= orders.total_cents AND e.expected_cents > 0
+                    THEN '{PAID_STATUS}'
+                WHEN orders.status = '{PAID_STATUS}' THEN '{REOPENED_STATUS}'
+                ELSE orders.status
+            END
+        FROM ({_EXPECTED_PAID}) AS e
+        WHERE e.order_id = orders.id AND orders.paid_cents != e.expected_cents;
+    """,
+    "order.get_all": f"SELECT {ORDER_COLUMNS} FROM orders;",
+    "order.get_by_id": f"SELECT {ORDER_COLUMNS} FROM orders WHERE id = ?;",
+    "order.page": f"SELECT {ORDER_COLUMNS} FROM orders WHERE id > ? ORDER BY id LIMIT ?;",
+    "order.get_by_customer": f"SELECT {ORDER_COLUMNS} FROM orders WHERE customer_id = ? ORDER BY id DESC;",
+    "order.get_by_status": f"SELECT {ORDER_COLUMNS} FROM orders WHERE status = ? ORDER BY date;",
+    "order.update_status": "UPDATE orders SET status = ? WHERE id = ?;",
+    "order.delete_payments": "DELETE FROM payments WHERE order_id = ?;",
+    "order.delete": "DELETE FROM orders WHERE id = ?;",
+})
 
 class Order:
 
     @staticmethod
     def create(customer_id, service_id, date, status="pending"):
-        query = """
-        INSERT INTO orders (customer_id, service_id, date, status)
-        VALUES (?, ?, ?, ?);
+        return db.execute_named("order.insert", (customer_id, service_id, service_id, date, status))
+
+    @staticmethod
+    def create_with_items(customer_id, items, date, status="Pendiente"):
+        """
+        Registra una orden con su carrito en una sola transacción: la cabecera,
+        todos los ítems con un executemany y el total sumado en SQL. Retorna el
+        ID de la orden, o None si algo falló (no queda nada a medias).
+        """
+        items = list(items)
+        if not items:
+            return None
+        try:
+            with db.transaction():
+                order_id = db.execute_named("order.insert_header", (customer_id, date, status))
+                if len(OrderItem.bulk_create(order_id, items)) != len(items):
+                    raise RuntimeError("no se guardaron todos los ítems")
+                db.execute_named("order.recompute_total", (order_id,))
+        except Exception as e:
+            print(f"Error al registrar la orden: {e}")
+            return None
+        return order_id
+
+    @staticmethod
+    def items(order_id):
+        """Ítems de la orden en el orden en que se cargaron."""
+        return OrderItem.get_by_order(order_id)
+
+    @staticmethod
+    def recompute_total(order_id):
+        """Recalcula en SQL el total de una orden a partir de sus ítems."""
+        db.execute_named("order.recompute_total", (order_id,))
+        invalidate_on_write(db, identity_map.invalidate, "orders", int(order_id))
+
+    @staticmethod
+    def recompute_totals():
+        """Recalcula en una sola sentencia el total de todas las órdenes que tienen ítems."""
+        db.execute_named("order.recompute_totals")
+        invalidate_on_write(db, identity_map.invalidate_table, "orders")
+
+    @staticmethod
+    def revenue_by_service():
+        """Facturación por servicio según los ítems de las órdenes."""
+        return OrderItem.revenue_by_service()
+
+    @staticmethod
+    def bulk_create(orders, chunk_size=500):
+        """
+        Inserta muchas órdenes (diccionarios con 'customer_id', 'service_id', 'date'
+        y opcionalmente 'status') en una sola transacción y retorna sus IDs.
         """
-        db.execute(query, (customer_id, service_id, date, status))
+        params = (
+            (o['customer_id'], o['service_id'], o['service_id'], o['date'], o.get('status', "pending"))
+            for o in orders
+        )
+        return db.execute_many_named("order.insert", params, chunk_size)
 
     @staticmethod
     def get_all():
-        query = "SELECT * FROM orders;"
-        return db.fetch(query)
+        return db.fetch_named("order.get_all", row_factory=OrderRecord.factory)
+
+    @staticmethod
+    def list_with_customers(status=None, limit=None, before_id=None):
+        """
+        Retorna las órdenes (más recientes primero) con el nombre del cliente en
+        'customer_name', resuelto con un JOIN en una sola consulta en lugar de
+        buscar cada cliente por separado. Con `before_id` solo las de id menor
+        (página siguiente, paginación por clave).
+        """
+        query = """
+        SELECT o.id, o.customer_id, COALESCE(c.name, 'Desconocido') AS customer_name,
+               o.total_cents, o.paid_cents, o.date, o.status,
+               o.total_cents - o.paid_cents AS balance_cents
+        FROM orders o
+        LEFT JOIN customers c ON c.id = o.customer_id
+        """
+        conditions, params = [], []
+        if status is not None:
+            conditions.append("o.status = ?")
+            params.append(status)
+        if before_id is not None:
+            conditions.append("o.id < ?")
+            params.append(before_id)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY o.id DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        return db.fetch(query, tuple(params), OrderSummaryRecord.factory)
 
     @staticmethod
     def get_by_id(order_id):
-        query = "SELECT * FROM orders WHERE id = ?;"
-        return db.fetch(query, (order_id,))
+        """Lista con la orden (vacía si no existe); las búsquedas repetidas salen del mapa de identidad."""
+        try:
+            order_id = int(order_id)
+        except (TypeError, ValueError):
+            return []
+        order = identity_map.get("orders", order_id, lambda: Order._load(order_id))
+        return [order] if order else []
+
+    @staticmethod
+    def _load(order_id):
+        rows = db.fetch_named("order.get_by_id", (order_id,), OrderRecord.factory)
+        return rows[0] if rows else None
+
+    @staticmethod
+    def balance(order_id):
+        """Saldo pendiente en centavos (None si la orden no existe); no suma pagos."""
+        orders = Order.get_by_id(order_id)
+        return orders[0].balance_cents if orders else None
+
+    @staticmethod
+    def verify_balances(repair=True):
+        """
+        Compara en una sola pasada agregada el pagado de cada orden con la suma
+        de sus pagos y retorna las diferencias encontradas. Con repair=True las
+        corrige (pagado y estado) en la misma transacción. Con los triggers de
+        payments la lista debería venir vacía; sirve para bases editadas a mano
+        o restauradas de un respaldo.
+        """
+        with db.transaction(immediate=True):
+            mismatches = db.fetch_named("order.balance_mismatches",
+                                        row_factory=BalanceMismatchRecord.factory)
+            if mismatches and repair:
+                db.execute_named("order.repair_balances")
+        if mismatches and repair:
+            invalidate_on_write(db, identity_map.invalidate_table, "orders")
+        return mismatches
+
+    @staticmethod
+    def page(after_id=None, limit=100):
+        """Hasta `limit` órdenes con id mayor que `after_id` (paginación por clave)."""
+        return db.fetch_named("order.page", (after_id or 0, limit), OrderRecord.factory)
+
+    @staticmethod
+    def get_by_customer(customer_id):
+        """Historial de órdenes de un cliente (usa idx_orders_customer_id)."""
+        return db.fetch_named("order.get_by_customer", (customer_id,), OrderRecord.factory)
+
+    @staticmethod
+    def get_by_status(status):
+        """Órdenes en un estado, de la más antigua a la más nueva (usa idx_orders_status_date)."""
+        return db.fetch_named("order.get_by_status", (status,), OrderRecord.factory)
 
     @staticmethod
     def update_status(order_id, new_status):
-        query = "UPDATE orders SET status = ? WHERE id = ?;"
-        db.execute(query, (new_status, order_id))
+        db.execute_named("order.update_status", (new_status, order_id))
+        invalidate_on_write(db, identity_map.invalidate, "orders", int(order_id))
+
+    @staticmethod
+    def bulk_update(orders, chunk_size=500):
+        """Cambia el estado de muchas órdenes (diccionarios con 'id' y 'status') en una sola transacción."""
+        params = ((o['status'], o['id']) for o in orders)
+        db.execute_many_named("order.update_status", params, chunk_size)
+        invalidate_on_write(db, identity_map.invalidate_table, "orders")
 
     @staticmethod
     def delete(order_id):
-        query = "DELETE FROM orders WHERE id = ?;"
-        db.execute(query, (order_id,))
+        # Con foreign_keys activo primero hay que borrar sus pagos (los ítems se
+        # borran explícitamente por si la base corre sin foreign_keys); todo en una transacción
+        with db.transaction():
+            db.execute_named("order.delete_payments", (order_id,))
+            OrderItem.delete_by_order(order_id)
+            db.execute_named("order.delete", (order_id,))
+        invalidate_on_write(db, identity_map.invalidate, "orders", int(order_id))
+        invalidate_on_write(db, identity_map.invalidate_table, "payments")
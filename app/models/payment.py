@@ -1,18 +1,65 @@
-from app.database import Database
+from app.cache import identity_map, invalidate_on_write
+from app.database import db, register_statements
+from app.models.records import PaymentRecord
+from app.money import as_cents
 from datetime import datetime
 
 # Nota: Se asume que 'base_model' maneja otras funcionalidades de alto nivel.
 # Si solo usas la clase Customer, puedes omitir '(base_model.BaseModel)'.
 
-db = Database()
+register_statements({
+    # Consistencia: Añadir campos de auditoría
+    "payment.insert": """
+        INSERT INTO payments (order_id, amount_cents, method, date, created_at, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """,
+    "payment.update": """
+        UPDATE payments
+        SET order_id=?, amount_cents=?, method=?, updated_at=?
+        WHERE id=?
+    """,
+    # Aseguramos seleccionar todos los campos
+    "payment.get_by_id": """
+        SELECT id, order_id, amount_cents, method AS payment, created_at, updated_at, date
+        FROM payments
+        WHERE id=?
+    """,
+    # 'method' se expone como 'payment', el nombre que usa el modelo
+    "payment.all": "SELECT id, order_id, amount_cents, method AS payment, created_at, updated_at, date FROM payments",
+    "payment.page": """
+        SELECT id, order_id, amount_cents, method AS payment, created_at, updated_at, date FROM payments
+        WHERE id > ? ORDER BY id LIMIT ?
+    """,
+    "payment.page_desc": """
+        SELECT id, order_id, amount_cents, method AS payment, created_at, updated_at, date FROM payments
+        WHERE id < ? ORDER BY id DESC LIMIT ?
+    """,
+    "payment.delete": "DELETE FROM payments WHERE id=?",
+})
+
+# El pagado y el estado de cada orden los mantienen los triggers de payments
+# (migración 6): cualquier alta, cambio o baja de un pago ya los deja al día.
+# Acá solo hay que olvidar las órdenes que el mapa de identidad tenga en memoria.
+
+
+def _invalidate_order(order_id):
+    invalidate_on_write(db, identity_map.invalidate, "orders", int(order_id))
+
+
+def _invalidate_orders():
+    invalidate_on_write(db, identity_map.invalidate_table, "orders")
+
+
+# Mayor rowid posible en SQLite: "antes de" este id es desde el último pago
+MAX_ROWID = 2**63 - 1
 
 class Payment:
     
     # CORRECCIÓN 1: Agregar id, created_at y updated_at a __init__
-    def __init__(self, order_id, amount, payment, id=None, created_at=None, updated_at=None):
+    def __init__(self, order_id, amount_cents, payment, id=None, created_at=None, updated_at=None):
         self.id = id
         self.order_id = order_id
-        self.amount = amount
+        self.amount_cents = amount_cents
         self.payment = payment
         
         # Consistencia: Usar isoformat() para guardar las fechas como texto en SQLite
@@ -23,66 +70,112 @@ class Payment:
     # CREATE (ALTA)
     # -----------------------------
     @staticmethod
-    def create(order_id, amount, payment):
-        query = """
-            -- Consistencia: Añadir campos de auditoría
-            INSERT INTO payments (order_id, amount, payment, created_at, updated_at)
-            VALUES (?, ?, ?, ?, ?)
-        """
-        created_at = datetime.now().isoformat()
-        updated_at = datetime.now().isoformat()
+    def create(order_id, amount_cents, payment):
+        now = datetime.now()
+        created_at = now.isoformat()
+        updated_at = now.isoformat()
         
         # db.execute ya retorna el lastrowid, que es el ID de pago.
-        payment_id = db.execute(query, (order_id, amount, payment, created_at, updated_at))
+        payment_id = db.execute_named("payment.insert", (order_id, as_cents(amount_cents), payment, now.strftime("%Y-%m-%d %H:%M"), created_at, updated_at))
+        _invalidate_order(order_id)
         return payment_id
+
+    # -----------------------------
+    # POST (REGISTRAR PAGO Y ACTUALIZAR SALDO)
+    # -----------------------------
+    @staticmethod
+    def post(order_id, amount_cents, payment="Efectivo"):
+        """
+        Registra un pago; el trigger de payments lo suma al saldo de la orden y
+        cambia su estado en la misma sentencia, así que dos terminales pagando
+        la misma orden a la vez no pueden pisarse. El monto va en centavos
+        enteros. Retorna el ID del pago; si la orden no existe o algo falla, se
+        lanza la excepción y no queda nada registrado.
+        """
+        with db.transaction():
+            return Payment.create(order_id, amount_cents, payment)
     
+    # -----------------------------
+    # BULK CREATE / BULK UPDATE (CARGA MASIVA)
+    # -----------------------------
+    @staticmethod
+    def bulk_create(payments, chunk_size=500):
+        """
+        Inserta muchos pagos (diccionarios con 'order_id', 'amount_cents' y 'payment')
+        en una sola transacción y retorna la lista de IDs generados.
+        """
+        now = datetime.now()
+        date = now.strftime("%Y-%m-%d %H:%M")
+        stamp = now.isoformat()
+        params = (
+            (p['order_id'], as_cents(p['amount_cents']), p['payment'], date, stamp, stamp)
+            for p in payments
+        )
+        ids = db.execute_many_named("payment.insert", params, chunk_size)
+        _invalidate_orders()
+        return ids
+
+    @staticmethod
+    def bulk_update(payments, chunk_size=500):
+        """Actualiza muchos pagos (diccionarios con 'id', 'order_id', 'amount_cents' y 'payment') en una sola transacción."""
+        now = datetime.now().isoformat()
+        params = (
+            (p['order_id'], as_cents(p['amount_cents']), p['payment'], now, p['id'])
+            for p in payments
+        )
+        db.execute_many_named("payment.update", params, chunk_size)
+        invalidate_on_write(db, identity_map.invalidate_table, "payments")
+        _invalidate_orders()
+
     # -----------------------------
     # GET BY ID (CONSULTA)
     # -----------------------------
     @staticmethod
     def get_by_id(payment_id):
-        # Aseguramos seleccionar todos los campos
-        query = """
-            SELECT id, order_id, amount, payment, created_at, updated_at 
-            FROM payments 
-            WHERE id=?
         """
-        # CORRECCIÓN 2: Añadir la coma final para que (payment_id,) sea una tupla
-        rows = db.fetch(query, (payment_id,)) 
-        
-        if not rows:
+        Retorna el Payment (o None); las búsquedas repetidas salen del mapa de
+        identidad (un PaymentRecord inmutable) y cada llamada recibe su copia.
+        """
+        try:
+            payment_id = int(payment_id)
+        except (TypeError, ValueError):
             return None
-            
-        r = rows[0]
-        # CORRECCIÓN 3: Añadir las comas faltantes y los campos de auditoría
-        return Payment(
-            id=r[0],
-            order_id=r[1],
-            amount=r[2],
-            payment=r[3],
-            created_at=r[4],
-            updated_at=r[5]
-        )
+        record = identity_map.get("payments", payment_id, lambda: Payment._load(payment_id))
+        return Payment.from_record(record) if record else None
+
+    @staticmethod
+    def _load(payment_id):
+        rows = db.fetch_named("payment.get_by_id", (payment_id,), PaymentRecord.factory)
+        return rows[0] if rows else None
+
+    @staticmethod
+    def from_record(record):
+        """Payment editable (update/delete) a partir de un PaymentRecord."""
+        return Payment(record.order_id, record.amount_cents, record.payment, id=record.id,
+                       created_at=record.created_at, updated_at=record.updated_at)
     
     # -----------------------------
     # GET ALL (CONSULTA GENERAL)
     # -----------------------------
     @staticmethod
     def all():
-        query = "SELECT id, order_id, amount, payment, created_at, updated_at FROM payments"
-        rows = db.fetch(query)
-        
-        return [
-            {
-                "id": r[0],
-                "order_id": r[1],
-                "amount": r[2],
-                "payment": r[3],
-                "created_at": r[4],
-                "updated_at": r[5]
-            }
-            for r in rows
-        ]
+        # Registros compactos (r['amount_cents'] sigue funcionando) construidos directo por SQLite
+        return db.fetch_named("payment.all", row_factory=PaymentRecord.factory)
+
+    # -----------------------------
+    # PAGE (PAGINACIÓN POR CLAVE)
+    # -----------------------------
+    @staticmethod
+    def page(after_id=None, limit=100, descending=False):
+        """
+        Retorna hasta `limit` pagos con id mayor que `after_id`, ordenados por id,
+        con el mismo formato que all(). Con descending=True va del más nuevo al
+        más viejo: los que tienen id menor que `after_id`.
+        """
+        if descending:
+            before = after_id if after_id is not None else MAX_ROWID
+            return db.fetch_named("payment.page_desc", (before, limit), PaymentRecord.factory)
+        return db.fetch_named("payment.page", (after_id or 0, limit), PaymentRecord.factory)
         
     # -----------------------------
     # UPDATE (MODIFICACIÓN)
@@ -93,13 +186,10 @@ class Payment:
 
         self.updated_at = datetime.now().isoformat()
 
-        query = """
-            UPDATE payments
-            SET order_id=?, amount=?, payment=?, updated_at=?
-            WHERE id=?
-        """
-
-        db.execute(query, (self.order_id, self.amount, self.payment, self.updated_at, self.id))
+        db.execute_named("payment.update", (self.order_id, as_cents(self.amount_cents), self.payment, self.updated_at, self.id))
+        invalidate_on_write(db, identity_map.invalidate, "payments", self.id)
+        # El pago pudo cambiar de orden: no sabemos cuál era la anterior
+        _invalidate_orders()
 
     # -----------------------------
     # DELETE (BAJA)
@@ -108,4 +198,6 @@ class Payment:
         if self.id is None:
             raise ValueError("Payment must have an ID to delete.")
 
-        db.execute("DELETE FROM payments WHERE id=?", (self.id,))
\ No newline at end of file
+        db.execute_named("payment.delete", (self.id,))
+        invalidate_on_write(db, identity_map.invalidate, "payments", self.id)
+        _invalidate_order(self.order_id)
\ No newline at end of file
@@ -0,0 +1,111 @@
+"""
+Registros compactos para las filas de los modelos.
+
+Son tuplas con nombre (namedtuple, sin __dict__ por fila) que además aceptan
+acceso por clave, así el código que usa r['name'] o r.get('name') sigue
+funcionando. Para construirlos directamente desde SQLite se pasa
+`Registro.factory` como row_factory de Database.fetch(); la consulta debe
+seleccionar las columnas en el mismo orden que los campos.
+"""
+from collections import namedtuple
+
+
+class Record:
+    """Comportamiento común: r['campo'], r.get('campo'), keys() y dict(r)."""
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            try:
+                key = self._fields.index(key)
+            except ValueError:
+                raise KeyError(key) from None
+        return tuple.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return self._fields
+
+    @classmethod
+    def factory(cls, cursor, row):
+        """row_factory de sqlite3: arma el registro directo desde la tupla de la fila."""
+        return tuple.__new__(cls, row)
+
+
+class CustomerRecord(Record, namedtuple("CustomerRecord", "id name phone email created_at updated_at")):
+    __slots__ = ()
+
+
+class ServiceRecord(Record, namedtuple("ServiceRecord", "id name price_cents")):
+    __slots__ = ()
+
+
+class OrderRecord(Record, namedtuple("OrderRecord", "id customer_id service_id total_cents paid_cents date status balance_cents")):
+    __slots__ = ()
+
+
+class OrderSummaryRecord(Record, namedtuple("OrderSummaryRecord",
+                                            "id customer_id customer_name total_cents paid_cents date status "
+                                            "balance_cents")):
+    """Fila del listado de órdenes, con el nombre del cliente ya resuelto."""
+    __slots__ = ()
+
+
+class OrderItemRecord(Record, namedtuple("OrderItemRecord",
+                                         "id order_id service_id description quantity "
+                                         "unit_price_cents line_total_cents")):
+    __slots__ = ()
+
+
+class ServiceRevenueRecord(Record, namedtuple("ServiceRevenueRecord",
+                                              "service_id description quantity revenue_cents orders")):
+    """Fila del reporte de facturación por servicio."""
+    __slots__ = ()
+
+
+class BalanceMismatchRecord(Record, namedtuple("BalanceMismatchRecord",
+                                               "order_id paid_cents expected_cents")):
+    """Orden cuyo pagado no coincide con la suma de sus pagos."""
+    __slots__ = ()
+
+
+class DailyRevenueRecord(Record, namedtuple("DailyRevenueRecord",
+                                            "day method payments revenue_cents day_total_cents")):
+    """Ingresos de un día con un método de pago (y el total del día)."""
+    __slots__ = ()
+
+
+class AgingBucketRecord(Record, namedtuple("AgingBucketRecord", "bucket orders balance_cents")):
+    """Tramo de antigüedad de las cuentas por cobrar."""
+    __slots__ = ()
+
+
+class CustomerAgingRecord(Record, namedtuple("CustomerAgingRecord",
+                                             "customer_id customer_name current_cents days_31_60_cents "
+                                             "days_61_90_cents over_90_cents balance_cents")):
+    """Saldo pendiente de un cliente repartido por antigüedad."""
+    __slots__ = ()
+
+
+class TopCustomerRecord(Record, namedtuple("TopCustomerRecord",
+                                           "rank customer_id customer_name orders spend_cents share")):
+    """Cliente del ranking por gasto; share es su fracción del total pagado."""
+    __slots__ = ()
+
+
+class RollupRevenueRecord(Record, namedtuple("RollupRevenueRecord", "day method payments revenue_cents")):
+    """Fila de daily_revenue (ingresos ya sumados por día y método)."""
+    __slots__ = ()
+
+
+class StatusCountRecord(Record, namedtuple("StatusCountRecord", "status orders")):
+    __slots__ = ()
+
+
+class PaymentRecord(Record, namedtuple("PaymentRecord", "id order_id amount_cents payment created_at updated_at date")):
+    __slots__ = ()
@@ -1,37 +1,95 @@
-from app.database import Database
+from app.cache import ReadThroughCache, invalidate_on_write
+from app.database import db, register_statements
+from app.models.records import ServiceRecord
+from app.money import as_cents
+
+register_statements({
+    "service.insert": """
+        INSERT INTO services (name, price_cents)
+        VALUES (?, ?);
+    """,
+    "service.get_all": "SELECT id, name, price_cents FROM services ORDER BY name, id;",
+    "service.get_by_id": "SELECT id, name, price_cents FROM services WHERE id = ?;",
+    "service.page": "SELECT id, name, price_cents FROM services WHERE id > ? ORDER BY id LIMIT ?;",
+    "service.update": """
+        UPDATE services
+        SET name = ?, price_cents = ?
+        WHERE id = ?;
+    """,
+    "service.delete": "DELETE FROM services WHERE id = ?;",
+})
+
+# El catálogo es chico y casi no cambia: se lee completo una vez y se sirve
+# desde memoria hasta que create/update/delete lo invalidan (o vence el TTL).
+catalog_cache = ReadThroughCache(ttl=300)
+
+
+def _load_catalog():
+    """Retorna (lista ordenada por nombre, diccionario id -> servicio)."""
+    services = db.fetch_named("service.get_all", row_factory=ServiceRecord.factory)
+    return services, {s.id: s for s in services}
+
+
+def _invalidate_catalog():
+    invalidate_on_write(db, catalog_cache.invalidate)
 
-db = Database()
 
 class Service:
 
     @staticmethod
-    def create(name, price):
-        query = """
-        INSERT INTO services (name, price)
-        VALUES (?, ?);
-        """
-        db.execute(query, (name, price))
+    def create(name, price_cents):
+        """Crea un servicio; el precio va en centavos enteros (ver app/money.py)."""
+        service_id = db.execute_named("service.insert", (name, as_cents(price_cents)))
+        _invalidate_catalog()
+        return service_id
+
+    @staticmethod
+    def bulk_create(services, chunk_size=500):
+        """Inserta muchos servicios (diccionarios con 'name' y 'price_cents') y retorna sus IDs."""
+        params = ((s['name'], as_cents(s['price_cents'])) for s in services)
+        ids = db.execute_many_named("service.insert", params, chunk_size)
+        _invalidate_catalog()
+        return ids
 
     @staticmethod
     def get_all():
-        query = "SELECT * FROM services;"
-        return db.fetch(query)
+        """Catálogo completo ordenado por nombre, servido desde la caché."""
+        services, _ = catalog_cache.get("catalog", _load_catalog)
+        return list(services)
 
     @staticmethod
     def get_by_id(service_id):
-        query = "SELECT * FROM services WHERE id = ?;"
-        return db.fetch(query, (service_id,))
+        """Lista con el servicio (vacía si no existe), servida desde la caché."""
+        _, by_id = catalog_cache.get("catalog", _load_catalog)
+        try:
+            service = by_id.get(int(service_id))
+        except (TypeError, ValueError):
+            return []
+        return [service] if service else []
 
     @staticmethod
-    def update(service_id, name, price):
-        query = """
-        UPDATE services
-        SET name = ?, price = ?
-        WHERE id = ?;
-        """
-        db.execute(query, (name, price, service_id))
+    def page(after_id=None, limit=100):
+        """Hasta `limit` servicios con id mayor que `after_id` (paginación por clave)."""
+        return db.fetch_named("service.page", (after_id or 0, limit), ServiceRecord.factory)
+
+    @staticmethod
+    def update(service_id, name, price_cents):
+        db.execute_named("service.update", (name, as_cents(price_cents), service_id))
+        _invalidate_catalog()
+
+    @staticmethod
+    def bulk_update(services, chunk_size=500):
+        """Actualiza muchos servicios (diccionarios con 'id', 'name' y 'price_cents') en una sola transacción."""
+        params = ((s['name'], as_cents(s['price_cents']), s['id']) for s in services)
+        db.execute_many_named("service.update", params, chunk_size)
+        _invalidate_catalog()
 
     @staticmethod
     def delete(service_id):
-        query = "DELETE FROM services WHERE id = ?;"
-        db.execute(query, (service_id,))
+        """
+        Borra el servicio. Si alguna orden lo referencia (orders.service_id) el
+        borrado se rechaza con sqlite3.IntegrityError; en los ítems queda en NULL.
+        """
+        with db.transaction():
+            db.execute_named("service.delete", (service_id,))
+        _invalidate_catalog()
@@ -0,0 +1,53 @@
+"""
+Dinero como enteros de centavos.
+
+La base guarda todos los importes en columnas *_cents de tipo INTEGER, así las
+sumas y comparaciones (SUM de pagos, saldo >= total) son exactas y SQLite las
+resuelve con aritmética entera. Los flotantes solo aparecen en el borde: al
+leer lo que escribe el usuario (to_cents) y al mostrarlo (format_cents).
+"""
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+_CENT = Decimal("0.01")
+
+
+def to_cents(value):
+    """
+    Convierte un importe en unidades ('12.50', '12,5', 12.5, Decimal) a centavos
+    enteros, redondeando a la mitad hacia arriba. Lanza ValueError si el valor no
+    es un número finito.
+    """
+    if isinstance(value, str):
+        value = value.strip().lstrip("$").strip().replace(",", ".")
+    try:
+        # str() evita arrastrar el error binario del float: 0.1 -> '0.1'
+        amount = Decimal(str(value))
+    except InvalidOperation:
+        raise ValueError(f"Importe inválido: {value!r}") from None
+    if not amount.is_finite():
+        raise ValueError(f"Importe inválido: {value!r}")
+    return int(amount.quantize(_CENT, rounding=ROUND_HALF_UP) * 100)
+
+
+def as_cents(value):
+    """
+    Valida que un importe ya venga en centavos enteros y lo retorna. Un float
+    acá casi siempre es un monto en unidades que se coló sin pasar por
+    to_cents(), así que se rechaza en lugar de guardarlo mal.
+    """
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise TypeError(f"Se esperaban centavos enteros, no {type(value).__name__}: {value!r}")
+    return value
+
+
+def line_total(unit_price_cents, quantity):
+    """Importe de una línea (precio unitario en centavos x cantidad), redondeado al centavo."""
+    total = Decimal(as_cents(unit_price_cents)) * Decimal(str(quantity))
+    return int(total.quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def format_cents(cents, symbol="$"):
+    """Texto para mostrar: 123456 -> '$1234.56', -50 -> '-$0.50'."""
+    sign = "-" if cents < 0 else ""
+    units, rest = divmod(abs(int(cents)), 100)
+    return f"{sign}{symbol}{units}.{rest:02d}"
@@ -0,0 +1,236 @@
+"""
+Reportes calculados dentro de SQLite.
+
+Todas las agregaciones (GROUP BY, funciones de ventana) las hace la base; a
+Python solo llegan las filas del resultado, y los reportes largos se entregan
+en streaming con iter_fetch. Los importes vienen en centavos enteros.
+
+Uso desde la terminal (CSV por salida estándar, listo para la planilla):
+
+    python -m app.reports revenue --from 2025-01-01 --to 2025-12-31
+    python -m app.reports aging [--by-customer] [--as-of 2025-06-30]
+    python -m app.reports top --limit 20
+    python -m app.reports rebuild
+
+Los datos del tablero (ingresos del día, órdenes por estado) salen de las
+tablas de resumen daily_revenue y status_counts, que mantienen los triggers de
+la migración 8; `rebuild` las recalcula desde cero.
+"""
+import argparse
+import csv
+import sys
+from datetime import date, timedelta
+
+from app import migrations
+from app.database import db, register_statements
+from app.models.records import (
+    AgingBucketRecord,
+    CustomerAgingRecord,
+    DailyRevenueRecord,
+    RollupRevenueRecord,
+    StatusCountRecord,
+    TopCustomerRecord,
+)
+from app.money import format_cents
+
+# Las órdenes canceladas no se cobran: quedan fuera de las cuentas por cobrar
+CANCELLED_STATUS = "Cancelado"
+
+# Órdenes con saldo y su antigüedad en días a la fecha de corte (primer parámetro).
+# 'paid_cents < total_cents' coincide con el WHERE de idx_orders_open_balance.
+_OPEN_ORDERS = f"""
+    SELECT id, customer_id, total_cents - paid_cents AS balance_cents,
+           CAST(julianday(date(?)) - julianday(date(date)) AS INTEGER) AS age
+    FROM orders
+    WHERE paid_cents < total_cents AND status != '{CANCELLED_STATUS}'
+"""
+
+register_statements({
+    # Usa idx_payments_date_method como índice cubriente: no lee la tabla
+    "report.revenue_by_day": """
+        SELECT substr(date, 1, 10) AS day, method, COUNT(*) AS payments,
+               SUM(amount_cents) AS revenue_cents,
+               SUM(SUM(amount_cents)) OVER (PARTITION BY substr(date, 1, 10)) AS day_total_cents
+        FROM payments
+        WHERE date >= ? AND date < ?
+        GROUP BY substr(date, 1, 10), method
+        ORDER BY day, method;
+    """,
+    # Los cuatro tramos salen siempre, aunque alguno no tenga órdenes
+    "report.ar_aging": f"""
+        WITH buckets (bucket, low, high) AS (
+            VALUES ('0-30', -1000000, 30), ('31-60', 30, 60), ('61-90', 60, 90), ('90+', 90, 1000000)
+        ),
+        open_orders AS ({_OPEN_ORDERS})
+        SELECT b.bucket, COUNT(o.id) AS orders, COALESCE(SUM(o.balance_cents), 0) AS balance_cents
+        FROM buckets b
+        LEFT JOIN open_orders o ON o.age > b.low AND o.age <= b.high
+        GROUP BY b.bucket
+        ORDER BY b.low;
+    """,
+    "report.ar_aging_by_customer": f"""
+        WITH open_orders AS ({_OPEN_ORDERS})
+        SELECT o.customer_id, COALESCE(c.name, 'Desconocido') AS customer_name,
+               SUM(CASE WHEN o.age <= 30 THEN o.balance_cents ELSE 0 END) AS current_cents,
+               SUM(CASE WHEN o.age > 30 AND o.age <= 60 THEN o.balance_cents ELSE 0 END) AS days_31_60_cents,
+               SUM(CASE WHEN o.age > 60 AND o.age <= 90 THEN o.balance_cents ELSE 0 END) AS days_61_90_cents,
+               SUM(CASE WHEN o.age > 90 THEN o.balance_cents ELSE 0 END) AS over_90_cents,
+               SUM(o.balance_cents) AS balance_cents
+        FROM open_orders o
+        LEFT JOIN customers c ON c.id = o.customer_id
+        GROUP BY o.customer_id
+        ORDER BY balance_cents DESC, o.customer_id;
+    """,
+    # RANK() deja empatados a los clientes con el mismo gasto; share es la
+    # fracción del total pagado en el período (SUM(...) OVER () sobre todo el resultado)
+    "report.top_customers": """
+        WITH spend AS (
+            SELECT o.customer_id, COUNT(DISTINCT o.id) AS orders, SUM(p.amount_cents) AS spend_cents
+            FROM payments p
+            JOIN orders o ON o.id = p.order_id
+            WHERE p.date >= ? AND p.date < ?
+            GROUP BY o.customer_id
+        )
+        SELECT RANK() OVER (ORDER BY s.spend_cents DESC) AS rank,
+               s.customer_id, COALESCE(c.name, 'Desconocido') AS customer_name,
+               s.orders, s.spend_cents,
+               s.spend_cents * 1.0 / SUM(s.spend_cents) OVER () AS share
+        FROM spend s
+        LEFT JOIN customers c ON c.id = s.customer_id
+        ORDER BY s.spend_cents DESC, s.customer_id
+        LIMIT ?;
+    """,
+    # Tablero: lecturas de las tablas de resumen (pocas filas, por clave primaria)
+    "dashboard.revenue": """
+        SELECT day, method, payments, revenue_cents FROM daily_revenue
+        WHERE day >= ? AND day < ?
+        ORDER BY day, method;
+    """,
+    "dashboard.revenue_total": """
+        SELECT COALESCE(SUM(payments), 0) AS payments, COALESCE(SUM(revenue_cents), 0) AS revenue_cents
+        FROM daily_revenue
+        WHERE day >= ? AND day < ?;
+    """,
+    "dashboard.status_counts": "SELECT status, orders FROM status_counts ORDER BY orders DESC, status;",
+})
+
+
+def _date_range(date_from=None, date_to=None):
+    """
+    Límites para comparar con las fechas 'YYYY-MM-DD HH:MM' de la base: desde
+    el inicio de `date_from` hasta el final de `date_to` (ambos inclusive).
+    """
+    low = date_from or ""
+    high = (date.fromisoformat(date_to) + timedelta(days=1)).isoformat() if date_to else "9999"
+    return low, high
+
+
+def _as_of(as_of=None):
+    return as_of or date.today().isoformat()
+
+
+def revenue_by_day(date_from=None, date_to=None, batch_size=500):
+    """
+    Ingresos por día y método de pago, con el total del día en cada fila.
+    Generador: las filas se leen de a `batch_size`.
+    """
+    return db.iter_fetch_named("report.revenue_by_day", _date_range(date_from, date_to),
+                               batch_size, DailyRevenueRecord.factory)
+
+
+def ar_aging(as_of=None):
+    """Cuentas por cobrar en tramos de antigüedad (0-30, 31-60, 61-90 y 90+ días)."""
+    return db.fetch_named("report.ar_aging", (_as_of(as_of),), AgingBucketRecord.factory)
+
+
+def ar_aging_by_customer(as_of=None, batch_size=500):
+    """Saldo pendiente de cada cliente por tramo, mayor deuda primero (generador)."""
+    return db.iter_fetch_named("report.ar_aging_by_customer", (_as_of(as_of),),
+                               batch_size, CustomerAgingRecord.factory)
+
+
+def top_customers(limit=10, date_from=None, date_to=None):
+    """Los `limit` clientes que más pagaron en el período, con su puesto y participación."""
+    params = _date_range(date_from, date_to) + (limit,)
+    return db.iter_fetch_named("report.top_customers", params, row_factory=TopCustomerRecord.factory)
+
+
+# -----------------------------
+# TABLERO (TABLAS DE RESUMEN)
+# -----------------------------
+def revenue_for_day(day=None):
+    """Ingresos de un día (hoy por defecto) por método de pago, desde daily_revenue."""
+    day = day or date.today().isoformat()
+    return db.fetch_named("dashboard.revenue", _date_range(day, day), RollupRevenueRecord.factory)
+
+
+def revenue_total(date_from=None, date_to=None):
+    """(cantidad de pagos, ingresos en centavos) del período, sumando una fila por día y método."""
+    row = db.fetch_named("dashboard.revenue_total", _date_range(date_from, date_to), tuple)
+    return row[0] if row else (0, 0)
+
+
+def status_counts():
+    """Cantidad de órdenes por estado, desde status_counts."""
+    return db.fetch_named("dashboard.status_counts", row_factory=StatusCountRecord.factory)
+
+
+def rebuild_rollups():
+    """Recalcula daily_revenue y status_counts desde payments y orders en una transacción."""
+    with db.transaction(immediate=True) as conn:
+        migrations.rebuild_rollups(conn)
+
+
+# -----------------------------
+# LÍNEA DE COMANDOS
+# -----------------------------
+def _write_csv(rows, out):
+    """Escribe los registros como CSV; las columnas *_cents salen en unidades."""
+    writer = csv.writer(out)
+    header = None
+    for row in rows:
+        if header is None:
+            header = [f[:-len("_cents")] if f.endswith("_cents") else f for f in row._fields]
+            writer.writerow(header)
+        writer.writerow([
+            format_cents(value, symbol="") if field.endswith("_cents") else value
+            for field, value in zip(row._fields, row)
+        ])
+
+
+def main(argv=None, out=sys.stdout):
+    parser = argparse.ArgumentParser(prog="python -m app.reports", description="Reportes de la lavandería en CSV.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    revenue = commands.add_parser("revenue", help="ingresos por día y método de pago")
+    revenue.add_argument("--from", dest="date_from")
+    revenue.add_argument("--to", dest="date_to")
+
+    aging = commands.add_parser("aging", help="antigüedad de cuentas por cobrar")
+    aging.add_argument("--as-of")
+    aging.add_argument("--by-customer", action="store_true")
+
+    top = commands.add_parser("top", help="clientes con mayor gasto")
+    top.add_argument("--limit", type=int, default=10)
+    top.add_argument("--from", dest="date_from")
+    top.add_argument("--to", dest="date_to")
+
+    commands.add_parser("rebuild", help="recalcula las tablas de resumen del tablero")
+
+    args = parser.parse_args(argv)
+    if args.command == "rebuild":
+        rebuild_rollups()
+        print(f"Tablas de resumen reconstruidas: {len(status_counts())} estados, "
+              f"{revenue_total()[0]} pagos", file=out)
+        return
+    if args.command == "revenue":
+        rows = revenue_by_day(args.date_from, args.date_to)
+    elif args.command == "aging":
+        rows = ar_aging_by_customer(args.as_of) if args.by_customer else ar_aging(args.as_of)
+    else:
+        rows = top_customers(args.limit, args.date_from, args.date_to)
+    _write_csv(rows, out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,507 @@
+"""
+Servicio HTTP/JSON sobre los modelos, para que varias terminales del local
+trabajen contra una sola base sin abrir lavanderia.db cada una.
+
+    python -m app.server --host 0.0.0.0 --port 8765 --readers 4 [--group-commit]
+
+Todas las escrituras pasan por un único hilo escritor (una sola conexión de
+escritura: nunca compiten por el bloqueo de SQLite) y las lecturas por un pool
+fijo de hilos lectores, cada uno con su conexión persistente (WAL deja leer
+mientras se escribe). Los hilos que atienden HTTP solo esperan el resultado.
+Con --group-commit el hilo escritor es una WriteQueue (app/write_queue.py): las
+escrituras de varias terminales se confirman juntas, con un solo COMMIT.
+
+Rutas (importes siempre en centavos enteros, campos *_cents):
+
+    GET    /customers?q=&after=&limit=      GET/PUT/DELETE /customers/<id>      POST /customers
+    GET    /services  (ETag)                GET/PUT/DELETE /services/<id>       POST /services
+    GET    /orders?status=&before=&limit=   GET/PUT/DELETE /orders/<id>         POST /orders
+    GET    /payments?after=&limit=&desc=1   GET/DELETE     /payments/<id>       POST /payments
+    GET    /reports/revenue?from=&to=       /reports/aging?as_of=&by_customer=1
+    GET    /reports/top?limit=&from=&to=    /reports/dashboard?day=
+    POST   /batch   {"requests": [{"method": "POST", "path": "/payments", "body": {...}}, ...]}
+
+/batch ejecuta varias operaciones en un solo viaje y en una sola transacción:
+si alguna escritura falla no queda ninguna.
+"""
+import argparse
+import hashlib
+import json
+import re
+import sqlite3
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from app import reports
+from app.database import db
+from app.executor import QueryExecutor
+from app.models.customer import Customer
+from app.models.orders import Order
+from app.models.payment import Payment
+from app.models.service import Service
+from app.write_queue import WriteQueue
+
+DEFAULT_PORT = 8765
+DEFAULT_READERS = 4
+MAX_PAGE = 1000
+MAX_BODY = 1 << 20
+
+
+class ApiError(Exception):
+    """Error con su código HTTP; el mensaje va al cliente como {"error": ...}."""
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class Created(dict):
+    """Respuesta de un alta: se envía con 201 en lugar de 200."""
+
+
+# -----------------------------
+# CONVERSIÓN Y PARÁMETROS
+# -----------------------------
+def _plain(value):
+    """Registros, instancias de modelos y listas -> estructuras JSON."""
+    if isinstance(value, Created):
+        return dict(value)
+    if isinstance(value, (list, tuple)) and not hasattr(value, "_fields"):
+        return [_plain(v) for v in value]
+    if hasattr(value, "_fields"):
+        return dict(value)
+    if isinstance(value, (Customer, Payment)):
+        return dict(vars(value))
+    return value
+
+
+def _int(query, name, default=None, maximum=None):
+    raw = query.get(name)
+    if raw in (None, ""):
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        raise ApiError(400, f"'{name}' debe ser un número entero") from None
+    # Un LIMIT negativo en SQLite significa "sin límite": se acota a [0, maximum]
+    return min(max(value, 0), maximum) if maximum else value
+
+
+def _object(body):
+    if body is None:
+        return {}
+    if not isinstance(body, dict):
+        raise ApiError(400, "Se esperaba un objeto JSON")
+    return body
+
+
+def _required(body, *names):
+    missing = [n for n in names if body.get(n) in (None, "")]
+    if missing:
+        raise ApiError(400, f"Faltan campos: {', '.join(missing)}")
+    return [body[n] for n in names]
+
+
+def _found(value, what):
+    if not value:
+        raise ApiError(404, f"{what} no encontrado")
+    return value
+
+
+# -----------------------------
+# CLIENTES
+# -----------------------------
+def list_customers(query, body):
+    limit = _int(query, "limit", 100, MAX_PAGE)
+    if query.get("q"):
+        return Customer.search(query["q"], limit)
+    return Customer.page(_int(query, "after"), limit)
+
+
+def get_customer(query, body, customer_id):
+    return _found(Customer.get_by_id(customer_id), "Cliente")
+
+
+def create_customer(query, body):
+    name, = _required(body, "name")
+    customer_id = Customer.create(name, body.get("phone"), body.get("email"))
+    if customer_id is None:
+        raise ApiError(400, "No se pudo registrar el cliente")
+    return Created(id=customer_id)
+
+
+def update_customer(query, body, customer_id):
+    customer = _found(Customer.get_by_id(customer_id), "Cliente")
+    customer.name = body.get("name", customer.name)
+    customer.phone = body.get("phone", customer.phone)
+    customer.email = body.get("email", customer.email)
+    customer.update()
+    return {"id": customer.id}
+
+
+def delete_customer(query, body, customer_id):
+    _found(Customer.get_by_id(customer_id), "Cliente").delete()
+    return {"id": int(customer_id)}
+
+
+# -----------------------------
+# SERVICIOS (CATÁLOGO)
+# -----------------------------
+def list_services(query, body):
+    return Service.get_all()
+
+
+def get_service(query, body, service_id):
+    return _found(Service.get_by_id(service_id), "Servicio")[0]
+
+
+def create_service(query, body):
+    name, price_cents = _required(body, "name", "price_cents")
+    service_id = Service.create(name, price_cents)
+    if service_id is None:
+        raise ApiError(400, "No se pudo registrar el servicio")
+    return Created(id=service_id)
+
+
+def update_service(query, body, service_id):
+    current = _found(Service.get_by_id(service_id), "Servicio")[0]
+    Service.update(current.id, body.get("name", current.name), body.get("price_cents", current.price_cents))
+    return {"id": current.id}
+
+
+def delete_service(query, body, service_id):
+    _found(Service.get_by_id(service_id), "Servicio")
+    Service.delete(service_id)
+    return {"id": int(service_id)}
+
+
+# -----------------------------
+# ÓRDENES
+# -----------------------------
+def list_orders(query, body):
+    return Order.list_with_customers(query.get("status"), _int(query, "limit", 100, MAX_PAGE),
+                                     _int(query, "before"))
+
+
+def get_order(query, body, order_id):
+    order = dict(_found(Order.get_by_id(order_id), "Orden")[0])
+    order["items"] = _plain(Order.items(order_id))
+    return order
+
+
+def create_order(query, body):
+    """Body: {"customer_id", "date", "items": [{"service_id", "qty"}], "status"?}."""
+    customer_id, date, lines = _required(body, "customer_id", "date", "items")
+    items = []
+    for line in lines:
+        service = _found(Service.get_by_id(line.get("service_id")), f"Servicio {line.get('service_id')}")[0]
+        items.append({"service_id": service.id, "name": service.name,
+                      "price_cents": service.price_cents, "qty": line.get("qty", 1)})
+    order_id = Order.create_with_items(customer_id, items, date, body.get("status", "Pendiente"))
+    if order_id is None:
+        raise ApiError(400, "No se pudo registrar la orden")
+    return Created(id=order_id)
+
+
+def update_order(query, body, order_id):
+    status, = _required(body, "status")
+    _found(Order.get_by_id(order_id), "Orden")
+    Order.update_status(order_id, status)
+    return {"id": int(order_id)}
+
+
+def delete_order(query, body, order_id):
+    _found(Order.get_by_id(order_id), "Orden")
+    Order.delete(order_id)
+    return {"id": int(order_id)}
+
+
+# -----------------------------
+# PAGOS
+# -----------------------------
+def list_payments(query, body):
+    descending = query.get("desc") in ("1", "true")
+    return Payment.page(_int(query, "after"), _int(query, "limit", 100, MAX_PAGE), descending)
+
+
+def get_payment(query, body, payment_id):
+    return _found(Payment.get_by_id(payment_id), "Pago")
+
+
+def create_payment(query, body):
+    order_id, amount_cents = _required(body, "order_id", "amount_cents")
+    _found(Order.get_by_id(order_id), "Orden")
+    return Created(id=Payment.post(order_id, amount_cents, body.get("method", "Efectivo")))
+
+
+def delete_payment(query, body, payment_id):
+    _found(Payment.get_by_id(payment_id), "Pago").delete()
+    return {"id": int(payment_id)}
+
+
+# -----------------------------
+# REPORTES
+# -----------------------------
+def report_revenue(query, body):
+    return list(reports.revenue_by_day(query.get("from"), query.get("to")))
+
+
+def report_aging(query, body):
+    if query.get("by_customer") in ("1", "true"):
+        return list(reports.ar_aging_by_customer(query.get("as_of")))
+    return reports.ar_aging(query.get("as_of"))
+
+
+def report_top(query, body):
+    return list(reports.top_customers(_int(query, "limit", 10, MAX_PAGE), query.get("from"), query.get("to")))
+
+
+def report_dashboard(query, body):
+    day = query.get("day")
+    payments, revenue_cents = reports.revenue_total(day, day) if day else reports.revenue_total()
+    return {
+        "revenue": _plain(reports.revenue_for_day(day)),
+        "payments": payments,
+        "revenue_cents": revenue_cents,
+        "status_counts": _plain(reports.status_counts()),
+    }
+
+
+# (método, ruta, función, escribe, con ETag)
+ROUTES = [
+    ("GET", r"/customers", list_customers, False, False),
+    ("POST", r"/customers", create_customer, True, False),
+    ("GET", r"/customers/(\d+)", get_customer, False, False),
+    ("PUT", r"/customers/(\d+)", update_customer, True, False),
+    ("DELETE", r"/customers/(\d+)", delete_customer, True, False),
+    ("GET", r"/services", list_services, False, True),
+    ("POST", r"/services", create_service, True, False),
+    ("GET", r"/services/(\d+)", get_service, False, True),
+    ("PUT", r"/services/(\d+)", update_service, True, False),
+    ("DELETE", r"/services/(\d+)", delete_service, True, False),
+    ("GET", r"/orders", list_orders, False, False),
+    ("POST", r"/orders", create_order, True, False),
+    ("GET", r"/orders/(\d+)", get_order, False, False),
+    ("PUT", r"/orders/(\d+)", update_order, True, False),
+    ("DELETE", r"/orders/(\d+)", delete_order, True, False),
+    ("GET", r"/payments", list_payments, False, False),
+    ("POST", r"/payments", create_payment, True, False),
+    ("GET", r"/payments/(\d+)", get_payment, False, False),
+    ("DELETE", r"/payments/(\d+)", delete_payment, True, False),
+    ("GET", r"/reports/revenue", report_revenue, False, False),
+    ("GET", r"/reports/aging", report_aging, False, False),
+    ("GET", r"/reports/top", report_top, False, False),
+    ("GET", r"/reports/dashboard", report_dashboard, False, False),
+]
+_ROUTES = [(method, re.compile(pattern + r"/?"), fn, writes, etag) for method, pattern, fn, writes, etag in ROUTES]
+
+
+def _route(method, path):
+    """Retorna (función, argumentos de la ruta, escribe, con ETag) o lanza ApiError."""
+    allowed = False
+    for route_method, pattern, fn, writes, etag in _ROUTES:
+        match = pattern.fullmatch(path)
+        if match:
+            if route_method == method:
+                return fn, match.groups(), writes, etag
+            allowed = True
+    raise ApiError(405 if allowed else 404, f"{method} {path} no existe")
+
+
+def _call(fn, query, body, args):
+    """Ejecuta una ruta (en el hilo de base de datos) y retorna (estado, cuerpo JSON)."""
+    try:
+        result = fn(query, body, *args)
+    except ApiError:
+        raise
+    except (KeyError, TypeError, ValueError) as e:
+        raise ApiError(400, f"Datos inválidos: {e}") from None
+    except sqlite3.IntegrityError as e:
+        raise ApiError(409, f"Conflicto con datos existentes: {e}") from None
+    except sqlite3.Error as e:
+        raise ApiError(500, f"Error en la base de datos: {e}") from None
+    return (201 if isinstance(result, Created) else 200), _plain(result)
+
+
+def _write(fn, query, body, args):
+    """
+    Ejecuta una ruta de escritura dentro de una transacción. Fuera de ella
+    Database.execute solo imprime el error y retorna None: así la falla llega
+    a _call y se responde 409/500 en vez de 200, sin dejar nada a medias.
+    """
+    def in_transaction(query, body, *args):
+        with db.transaction(immediate=True):
+            return fn(query, body, *args)
+    return _call(in_transaction, query, body, args)
+
+
+def _split(path):
+    url = urlsplit(path)
+    return url.path, {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+
+def _run_batch(requests, writes):
+    """
+    Ejecuta las operaciones de /batch en una transacción del hilo actual.
+    Con escrituras, la primera que falle deshace todo el lote.
+    """
+    responses = []
+
+    class _Abort(Exception):
+        pass
+
+    try:
+        with db.transaction(immediate=writes):
+            for index, request in enumerate(requests):
+                method = str(request.get("method", "GET")).upper()
+                path, query = _split(request.get("path", ""))
+                try:
+                    fn, args, _, _ = _route(method, path)
+                    status, payload = _call(fn, query, _object(request.get("body")), args)
+                except ApiError as e:
+                    if writes:
+                        raise _Abort(index, e) from None
+                    status, payload = e.status, {"error": e.message}
+                responses.append({"status": status, "body": payload})
+    except _Abort as abort:
+        index, error = abort.args
+        return error.status, {"error": error.message, "index": index}
+    return 200, {"responses": responses}
+
+
+# -----------------------------
+# SERVIDOR
+# -----------------------------
+class ApiServer(ThreadingHTTPServer):
+    """
+    Servidor HTTP con un hilo escritor y `readers` hilos lectores de base de
+    datos. Con group_commit=True cada escritura corre en su SAVEPOINT dentro
+    de un grupo que se confirma junto (la respuesta sale después del COMMIT).
+    """
+    daemon_threads = True
+
+    def __init__(self, address, readers=DEFAULT_READERS, group_commit=False):
+        super().__init__(address, ApiHandler)
+        self.writer = WriteQueue() if group_commit else QueryExecutor(workers=1, name="db-writer")
+        self.readers = QueryExecutor(workers=readers, name="db-reader")
+
+    def dispatch(self, method, path, query, body):
+        """Retorna (estado, cuerpo, con ETag) de una petición."""
+        if path.rstrip("/") == "/batch":
+            if method != "POST":
+                raise ApiError(405, "/batch solo admite POST")
+            requests = body.get("requests")
+            if not isinstance(requests, list) or not all(isinstance(r, dict) for r in requests):
+                raise ApiError(400, "Se esperaba {\"requests\": [...]}")
+            writes = any(str(r.get("method", "GET")).upper() != "GET" for r in requests)
+            pool = self.writer if writes else self.readers
+            status, payload = pool.submit(_run_batch, requests, writes).result()
+            return status, payload, False
+        fn, args, writes, etag = _route(method, path)
+        if writes:
+            status, payload = self.writer.submit(_write, fn, query, body, args).result()
+        else:
+            status, payload = self.readers.submit(_call, fn, query, body, args).result()
+        return status, payload, etag
+
+    def server_close(self):
+        super().server_close()
+        if isinstance(self.writer, WriteQueue):
+            self.writer.close()
+        else:
+            self.writer.shutdown()
+        self.readers.shutdown()
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    server_version = "Lavanderia/1.0"
+    # Conexiones persistentes: un cliente puede mandar muchas peticiones por la misma
+    protocol_version = "HTTP/1.1"
+    # Cabeceras y cuerpo salen en escrituras separadas: sin TCP_NODELAY cada
+    # respuesta esperaría el ACK diferido del cliente (~40 ms)
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PUT(self):
+        self._handle("PUT")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY:
+            raise ApiError(413, "Cuerpo demasiado grande")
+        if not length:
+            return {}
+        try:
+            return json.loads(self.rfile.read(length))
+        except ValueError:
+            raise ApiError(400, "JSON inválido") from None
+
+    def _handle(self, method):
+        path, query = _split(self.path)
+        etag = False
+        try:
+            status, payload, etag = self.server.dispatch(method, path, query, _object(self._read_body()))
+        except ApiError as e:
+            status, payload = e.status, {"error": e.message}
+        except Exception as e:
+            print(f"Error al atender {method} {self.path}: {e}")
+            status, payload = 500, {"error": "Error interno"}
+        self._send(status, payload, etag and status == 200)
+
+    def _send(self, status, payload, etag=False):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        headers = {"Content-Type": "application/json; charset=utf-8"}
+        if etag:
+            # El catálogo cambia poco: el cliente revalida y recibe 304 sin cuerpo
+            tag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+            headers["ETag"] = tag
+            headers["Cache-Control"] = "no-cache"
+            if tag in (t.strip() for t in self.headers.get("If-None-Match", "").split(",")):
+                status, body = 304, b""
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Sin una línea por petición en la consola del local
+        pass
+
+
+def serve(host="127.0.0.1", port=DEFAULT_PORT, readers=DEFAULT_READERS, group_commit=False):
+    """Crea el servidor (sin arrancarlo): `serve_forever()` para atender."""
+    return ApiServer((host, port), readers, group_commit)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.server", description="API HTTP/JSON de la lavandería.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--readers", type=int, default=DEFAULT_READERS, help="hilos lectores de base de datos")
+    parser.add_argument("--group-commit", action="store_true",
+                        help="confirmar las escrituras concurrentes en grupos (ver app/write_queue.py)")
+    args = parser.parse_args(argv)
+
+    server = serve(args.host, args.port, args.readers, args.group_commit)
+    print(f"Sirviendo en http://{args.host}:{server.server_address[1]} ({db.db_path})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,65 +1,11 @@
-from app.database import Database
+from app.database import db
 
 def create_tables():
-    db = Database()
-    
-    # Sentencias SQL para crear las tablas
-    queries = [
+    # El esquema lo definen las migraciones versionadas de app/migrations.py;
+    # migrate() aplica las pendientes y retorna la versión resultante.
+    version = db.migrate()
 
-        
-        # Tabla CUSTOMERS
-        """
-        CREATE TABLE IF NOT EXISTS customers (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            phone TEXT,
-            email TEXT,
-            created_at TEXT,
-            updated_at TEXT
-        );
-        """,
-        
-        # Tabla SERVICES
-        """
-        CREATE TABLE IF NOT EXISTS services (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            price REAL NOT NULL
-        );
-        """,
-        
-        # Tabla ORDERS (Relación con customers y services)
-        """
-        CREATE TABLE IF NOT EXISTS orders (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            customer_id INTEGER,
-            service_id INTEGER,
-            date TEXT,
-            status TEXT default 'pending',
-            FOREIGN KEY(customer_id) REFERENCES customers(id),
-            FOREIGN KEY(service_id) REFERENCES services(id)
-        );
-        """
-        ,
-        # Tabla PAYMENTS (Relación con orders) - CORREGIDA
-        """
-        CREATE TABLE IF NOT EXISTS payments (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            order_id INTEGER NOT NULL,
-            amount REAL NOT NULL,
-            payment TEXT,
-            created_at TEXT,
-            updated_at TEXT,
-            FOREIGN KEY(order_id) REFERENCES orders(id)
-        );
-        """
-    ]
-    
-    # Ejecutar todas las consultas
-    for query in queries:
-        db.execute(query)
-        
-    print("Tablas creadas en lavanderia.db")
+    print(f"Tablas creadas en {db.db_path} (esquema versión {version})")
 
 if __name__ == "__main__":
-    create_tables()
\ No newline at end of file
+    create_tables()
@@ -0,0 +1,246 @@
+"""
+Tabla virtualizada para la GUI (Treeview de Tkinter).
+
+En lugar de borrar y volver a insertar todas las filas de la tabla en cada
+refresco, VirtualTable:
+
+- carga solo la primera página y pide las siguientes (paginación por clave)
+  cuando el scroll se acerca al final de lo cargado;
+- al refrescar vuelve a leer solo el rango visible, con una página de margen
+  a cada lado, y aplica la diferencia (altas, bajas, cambios y movimientos),
+  usando el id de cada fila como iid. Lo cargado más abajo se descarta y se
+  vuelve a pedir con el scroll: el costo no crece con lo ya recorrido.
+
+Con un QueryExecutor (app/executor.py) las consultas corren en el hilo de base
+de datos y la tabla se actualiza cuando llega el resultado; sin él, en el acto.
+
+La parte que no depende de Tk (KeysetPager y plan_refresh) está separada para
+poder probarla sin pantalla.
+"""
+import math
+from tkinter import ttk
+
+# Fracción del scroll a partir de la cual se pide la página siguiente
+PREFETCH_AT = 0.9
+
+
+class KeysetPager:
+    """
+    Recorre un resultado por páginas con paginación por clave.
+    `fetch_page(after, limit)` retorna las filas que siguen a la clave `after`
+    (None = desde el principio) y `row_key(row)` la clave de una fila.
+    """
+    def __init__(self, fetch_page, row_key=lambda row: row["id"], page_size=100):
+        self.fetch_page = fetch_page
+        self.row_key = row_key
+        self.page_size = page_size
+        self.loaded = 0
+        self.exhausted = False
+        self._after = None
+
+    @property
+    def cursor(self):
+        """Clave de la última fila cargada (None antes de la primera página)."""
+        return self._after
+
+    @property
+    def reload_limit(self):
+        """Filas a releer en reload(): las ya cargadas, y al menos una página."""
+        return max(self.loaded, self.page_size)
+
+    def next_page(self):
+        """Filas de la página siguiente ([] si ya no hay más)."""
+        if self.exhausted:
+            return []
+        return self.accept_page(self.fetch_page(self._after, self.page_size))
+
+    def accept_page(self, rows):
+        """Registra la página siguiente ya leída (fetch_page(cursor, page_size))."""
+        rows = list(rows)
+        self._track(rows, self.page_size)
+        self.loaded += len(rows)
+        return rows
+
+    def reload(self, after=None, offset=0, limit=None):
+        """
+        Vuelve a leer `limit` filas (por defecto las ya cargadas, al menos una
+        página) a partir de la clave `after`, la de la fila número offset - 1
+        (None: desde el principio), en una sola consulta. Lo cargado pasa a
+        terminar en la última fila releída.
+        """
+        limit = limit or self.reload_limit
+        return self.accept_reload(self.fetch_page(after, limit), limit, after, offset)
+
+    def accept_reload(self, rows, limit, after=None, offset=0):
+        """Registra el rango releído (fetch_page(after, limit), desde la fila `offset`)."""
+        rows = list(rows)
+        self._after = after
+        self._track(rows, limit)
+        self.loaded = offset + len(rows)
+        return rows
+
+    def _track(self, rows, limit):
+        if rows:
+            self._after = self.row_key(rows[-1])
+        self.exhausted = len(rows) < limit
+
+
+def refresh_window(first, last, loaded, page_size):
+    """
+    Rango (primera fila, cantidad) a releer en un refresco, dada la fracción
+    visible del scroll (`first`, `last`) sobre `loaded` filas: lo visible más
+    una página de margen a cada lado, y al menos una página.
+    """
+    if not loaded:
+        return 0, page_size
+    start = max(0, int(first * loaded) - page_size)
+    stop = math.ceil(last * loaded) + page_size
+    return start, max(stop - start, page_size)
+
+
+def plan_refresh(current, rows):
+    """
+    Operaciones para pasar de `current` a `rows` (listas de (iid, valores) en
+    orden de pantalla): ("delete", iid), ("insert", índice, iid, valores),
+    ("update", iid, valores) y ("move", índice, iid). Si nada cambió, la lista
+    viene vacía y no se toca el Treeview.
+    """
+    current_values = dict(current)
+    new_ids = {iid for iid, _ in rows}
+    ops = [("delete", iid) for iid, _ in current if iid not in new_ids]
+    order = [iid for iid, _ in current if iid in new_ids]
+    for index, (iid, values) in enumerate(rows):
+        if iid not in current_values:
+            ops.append(("insert", index, iid, values))
+            order.insert(index, iid)
+            continue
+        if current_values[iid] != values:
+            ops.append(("update", iid, values))
+        if order[index] != iid:
+            ops.append(("move", index, iid))
+            order.remove(iid)
+            order.insert(index, iid)
+    return ops
+
+
+class VirtualTable(ttk.Frame):
+    """
+    Treeview con scroll que se llena por páginas. `columns` es una lista de
+    (título, ancho); `row_values(row)` arma los valores visibles de una fila.
+    `tree` es el Treeview, para selección y foco como con uno común.
+    Con `executor` las lecturas no bloquean el bucle de eventos.
+    """
+    def __init__(self, master, columns, fetch_page, row_values, row_key=lambda row: row["id"],
+                 row_id=lambda row: row["id"], page_size=100, anchor="w", executor=None):
+        super().__init__(master)
+        self.pager = KeysetPager(fetch_page, row_key, page_size)
+        self.row_values = row_values
+        self.row_id = row_id
+        self.executor = executor
+        self._values = {}   # iid -> valores mostrados
+        self._order = []    # iids en orden de pantalla
+        self._keys = []     # row_key de cada fila, en el mismo orden
+        self._pending = None  # "more" o "refresh" mientras hay una lectura en curso
+
+        headings = [title for title, _ in columns]
+        self.tree = ttk.Treeview(self, columns=headings, show='headings')
+        for title, width in columns:
+            self.tree.heading(title, text=title)
+            self.tree.column(title, width=width, anchor=anchor)
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self._on_scroll)
+        self.scrollbar.pack(side='right', fill='y')
+        self.tree.pack(side='left', fill='both', expand=True)
+
+    def _row(self, row):
+        iid = str(self.row_id(row))
+        values = tuple("" if v is None else str(v) for v in self.row_values(row))
+        return iid, values
+
+    def _fetch(self, kind, after, limit, apply):
+        """Lee fetch_page(after, limit) y llama a apply(filas) en el hilo de Tk."""
+        if self.executor is None:
+            apply(self.pager.fetch_page(after, limit))
+            return
+        self._pending = kind
+
+        def done(rows):
+            self._pending = None
+            apply(rows)
+
+        def failed(error):
+            self._pending = None
+            print(f"Error al ejecutar consulta: {error}")
+
+        # Misma clave para ambas lecturas: un refresco deja sin efecto una página en vuelo
+        self.executor.submit(self.pager.fetch_page, after, limit, key=self, on_done=done, on_error=failed)
+
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        # Cerca del final (o sin llenar la vista): pedir otra página cuando Tk esté libre
+        if float(last) >= PREFETCH_AT and not self.pager.exhausted and self._pending is None:
+            self._pending = "more"
+            self.after_idle(self.load_more)
+
+    def load_more(self):
+        """Agrega al final la página siguiente."""
+        if self._pending == "refresh" or self.pager.exhausted:
+            return
+        self._pending = None
+        self._fetch("more", self.pager.cursor, self.pager.page_size, self._append)
+
+    def _append(self, rows):
+        for row in self.pager.accept_page(rows):
+            iid, values = self._row(row)
+            if iid in self._values:
+                continue
+            self.tree.insert('', 'end', iid=iid, values=values)
+            self._values[iid] = values
+            self._order.append(iid)
+            self._keys.append(self.pager.row_key(row))
+
+    def refresh(self):
+        """
+        Relee el rango visible con su margen (la primera página si todavía no
+        hay nada) y aplica solo las diferencias al Treeview; las filas cargadas
+        por debajo se descartan. También sirve para la carga inicial.
+        """
+        first, last = self.tree.yview()
+        start, limit = refresh_window(first, last, len(self._order), self.pager.page_size)
+        after = self._keys[start - 1] if start else None
+
+        def apply(rows):
+            self._apply(self.pager.accept_reload(rows, limit, after, start), start)
+
+        self._fetch("refresh", after, limit, apply)
+
+    def cancel(self):
+        """Descarta la lectura en curso (p. ej. al salir de la pestaña)."""
+        if self.executor is not None:
+            self.executor.cancel(self)
+        self._pending = None
+
+    def _apply(self, rows, start=0):
+        """Reemplaza las filas desde la posición `start` por `rows`, con el mínimo de cambios."""
+        keys = [self.pager.row_key(row) for row in rows]
+        rows = [self._row(row) for row in rows]
+        new_ids = {iid for iid, _ in rows}
+        # Las filas de más arriba no se releen; si alguna reaparece en el rango, se mueve
+        head = [(iid, key) for iid, key in zip(self._order[:start], self._keys[:start]) if iid not in new_ids]
+        for iid in self._order[:start]:
+            if iid in new_ids:
+                self.tree.delete(iid)
+        offset = len(head)
+        for op in plan_refresh([(iid, self._values[iid]) for iid in self._order[start:]], rows):
+            if op[0] == "delete":
+                self.tree.delete(op[1])
+            elif op[0] == "insert":
+                self.tree.insert('', offset + op[1], iid=op[2], values=op[3])
+            elif op[0] == "update":
+                self.tree.item(op[1], values=op[2])
+            else:
+                self.tree.move(op[2], '', offset + op[1])
+        self._values = {iid: self._values[iid] for iid, _ in head}
+        self._values.update(rows)
+        self._order = [iid for iid, _ in head] + [iid for iid, _ in rows]
+        self._keys = [key for _, key in head] + keys
@@ -0,0 +1,167 @@
+"""
+Cola de escrituras con commit agrupado (group commit), opcional.
+
+Fuera de una transacción cada escritura es su propio COMMIT, con su fsync: en
+las horas pico la caja registra órdenes y pagos de a ráfagas y el disco pasa
+a ser el límite. WriteQueue recibe las operaciones, las ejecuta en un único
+hilo escritor y las confirma en grupos: cada `max_delay_ms` milisegundos o
+cada `max_batch` operaciones, lo que ocurra primero, con un solo COMMIT.
+
+    queue = WriteQueue()
+    future = queue.payment(order_id, 1500, "Efectivo")
+    payment_id = future.result()   # se resuelve después del COMMIT del grupo
+
+Cada operación corre en su propio SAVEPOINT: si una falla, su Future recibe
+la excepción y el resto del grupo se confirma igual. Los Futures se resuelven
+recién cuando el grupo quedó en disco. close() (también al salir del
+programa) confirma todo lo pendiente antes de terminar.
+"""
+import atexit
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from app.database import db as default_db
+from app.models.orders import Order
+from app.models.payment import Payment
+
+DEFAULT_MAX_BATCH = 500
+DEFAULT_MAX_DELAY_MS = 5
+
+# Marca de fin para el hilo escritor
+_STOP = object()
+
+
+class WriteQueue:
+    """
+    Ejecuta escrituras en un hilo propio y las confirma en grupos. `database`
+    tiene que ser la instancia que usan los modelos (la global `db`) para que
+    sus escrituras entren en la transacción del grupo.
+    """
+    def __init__(self, database=None, max_batch=DEFAULT_MAX_BATCH, max_delay_ms=DEFAULT_MAX_DELAY_MS):
+        self.db = database or default_db
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000
+        self._queue = queue.Queue()
+        self._closed = False
+        self._close_lock = threading.Lock()
+
+        # Contadores (ver stats)
+        self._stats_lock = threading.Lock()
+        self.batches = 0
+        self.operations = 0
+        self.failures = 0
+
+        self._thread = threading.Thread(target=self._run, name="db-write-queue", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # -----------------------------
+    # ENCOLAR
+    # -----------------------------
+    def submit(self, fn, *args, **kwargs):
+        """
+        Encola fn(*args, **kwargs) y retorna un Future con su resultado (p. ej.
+        el ID nuevo), que se resuelve después del COMMIT de su grupo.
+        """
+        future = Future()
+        with self._close_lock:
+            if self._closed:
+                raise RuntimeError("La cola de escrituras está cerrada")
+            self._queue.put((future, fn, args, kwargs))
+        return future
+
+    def order(self, customer_id, items, date, status="Pendiente"):
+        """Order.create_with_items encolado; el Future da el ID de la orden (None si falló)."""
+        return self.submit(Order.create_with_items, customer_id, list(items), date, status)
+
+    def payment(self, order_id, amount_cents, payment="Efectivo"):
+        """Payment.create encolado; el Future da el ID del pago."""
+        return self.submit(Payment.create, order_id, amount_cents, payment)
+
+    def flush(self, timeout=None):
+        """Espera a que se confirme todo lo encolado hasta ahora."""
+        self.submit(lambda: None).result(timeout)
+
+    def close(self, timeout=None):
+        """Deja de aceptar operaciones, confirma las pendientes y detiene el hilo."""
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        atexit.unregister(self.close)
+        self._thread.join(timeout)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def stats(self):
+        with self._stats_lock:
+            batches, operations, failures = self.batches, self.operations, self.failures
+        return {
+            "batches": batches,
+            "operations": operations,
+            "failures": failures,
+            "ops_per_batch": operations / batches if batches else 0.0,
+            "pending": self._queue.qsize(),
+        }
+
+    # -----------------------------
+    # HILO ESCRITOR
+    # -----------------------------
+    def _run(self):
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+            batch = [first]
+            # Junta lo que llegue hasta cumplir el plazo o el tamaño máximo
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    op = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if op is _STOP:
+                    stopping = True
+                    break
+                batch.append(op)
+            self._commit(batch)
+
+    def _commit(self, batch):
+        done = []
+        failures = 0
+        try:
+            with self.db.transaction(immediate=True):
+                for future, fn, args, kwargs in batch:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    try:
+                        with self.db.transaction():  # SAVEPOINT por operación
+                            result = fn(*args, **kwargs)
+                    except Exception as e:
+                        future.set_exception(e)
+                        failures += 1
+                        continue
+                    done.append((future, result))
+        except Exception as e:
+            # Falló el BEGIN o el COMMIT: no quedó nada del grupo
+            print(f"Error al confirmar el grupo de escrituras: {e}")
+            for future, *_ in batch:
+                if not future.done():
+                    future.set_exception(e)
+                    failures += 1
+            done = []
+        for future, result in done:
+            future.set_result(result)
+        with self._stats_lock:
+            self.batches += 1
+            self.operations += len(batch)
+            self.failures += failures
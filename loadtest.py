@@ -0,0 +1,158 @@
+"""
+Prueba de carga del servidor HTTP (app/server.py) contra localhost.
+
+    python loadtest.py                       # levanta un servidor propio sobre una base temporal
+    python loadtest.py --url http://127.0.0.1:8765 --clients 16 --seconds 20
+    python loadtest.py --group-commit --write-ratio 0.8
+
+Cada cliente usa una conexión HTTP persistente y mezcla lecturas (catálogo
+con If-None-Match, listados, reportes) con escrituras (clientes, órdenes y
+pagos, algunas agrupadas en /batch). Al final imprime peticiones por segundo
+y latencias por tipo de operación.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+class Client:
+    def __init__(self, host, port):
+        self.conn = http.client.HTTPConnection(host, port, timeout=30)
+        self.catalog_etag = None
+
+    def request(self, method, path, body=None, headers=None):
+        data = json.dumps(body) if body is not None else None
+        self.conn.request(method, path, body=data, headers=headers or {})
+        response = self.conn.getresponse()
+        raw = response.read()
+        return response.status, (json.loads(raw) if raw else None), response
+
+
+def seed(client, customers=200, services=10):
+    """Datos mínimos para que haya qué leer y a quién cobrarle."""
+    client.request("POST", "/batch", {"requests": [
+        {"method": "POST", "path": "/customers", "body": {"name": f"Carga {i:04d}", "phone": f"555-{i:04d}"}}
+        for i in range(customers)
+    ] + [
+        {"method": "POST", "path": "/services", "body": {"name": f"Servicio {i}", "price_cents": 500 + 100 * i}}
+        for i in range(services)
+    ]})
+
+
+def worker(client, deadline, write_ratio, stats, rng):
+    _, services, _ = client.request("GET", "/services")
+    service_ids = [s["id"] for s in services]
+    _, customers, _ = client.request("GET", "/customers?limit=200")
+    customer_ids = [c["id"] for c in customers]
+    orders = []
+
+    def timed(kind, method, path, body=None, headers=None):
+        start = time.perf_counter()
+        status, payload, response = client.request(method, path, body, headers)
+        stats.setdefault(kind, []).append(time.perf_counter() - start)
+        if status >= 400:
+            stats.setdefault("errores", []).append(0.0)
+        return status, payload, response
+
+    while time.perf_counter() < deadline:
+        if rng.random() < write_ratio:
+            choice = rng.random()
+            if choice < 0.5 or not orders:
+                items = [{"service_id": rng.choice(service_ids), "qty": rng.randint(1, 3)}]
+                status, body, _ = timed("orden", "POST", "/orders", {
+                    "customer_id": rng.choice(customer_ids), "date": time.strftime("%Y-%m-%d %H:%M"),
+                    "items": items})
+                if status == 201:
+                    orders.append(body["id"])
+            elif choice < 0.9:
+                timed("pago", "POST", "/payments", {"order_id": rng.choice(orders), "amount_cents": 500})
+            else:
+                timed("batch", "POST", "/batch", {"requests": [
+                    {"method": "POST", "path": "/payments", "body": {"order_id": order_id, "amount_cents": 100}}
+                    for order_id in rng.sample(orders, min(5, len(orders)))
+                ]})
+        else:
+            choice = rng.random()
+            if choice < 0.4:
+                headers = {"If-None-Match": client.catalog_etag} if client.catalog_etag else {}
+                _, _, response = timed("catálogo", "GET", "/services", headers=headers)
+                client.catalog_etag = response.getheader("ETag") or client.catalog_etag
+            elif choice < 0.7:
+                timed("órdenes", "GET", "/orders?limit=50")
+            elif choice < 0.9:
+                timed("cliente", "GET", f"/customers/{rng.choice(customer_ids)}")
+            else:
+                timed("tablero", "GET", "/reports/dashboard")
+
+
+def report(stats, elapsed):
+    total = sum(len(v) for k, v in stats.items() if k != "errores")
+    print(f"{total} peticiones en {elapsed:.1f} s: {total / elapsed:.0f} req/s, "
+          f"{len(stats.get('errores', []))} errores")
+    print(f"{'operación':<10} {'n':>7} {'p50 ms':>8} {'p95 ms':>8} {'máx ms':>8}")
+    for kind, times in sorted(stats.items()):
+        if kind == "errores" or not times:
+            continue
+        times = sorted(times)
+        p95 = times[min(len(times) - 1, int(len(times) * 0.95))]
+        print(f"{kind:<10} {len(times):>7} {statistics.median(times) * 1000:>8.1f} "
+              f"{p95 * 1000:>8.1f} {times[-1] * 1000:>8.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prueba de carga del servidor de la lavandería.")
+    parser.add_argument("--url", help="servidor ya levantado (por defecto se levanta uno propio)")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--readers", type=int, default=4, help="hilos lectores del servidor propio")
+    parser.add_argument("--group-commit", action="store_true", help="servidor propio con commit agrupado")
+    args = parser.parse_args(argv)
+
+    server = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        # Servidor propio sobre una base temporal: nunca toca app/lavanderia.db
+        os.environ.setdefault("LAVANDERIA_DB", os.path.join(tempfile.mkdtemp(), "carga.db"))
+        from app.server import serve
+        server = serve(port=0, readers=args.readers, group_commit=args.group_commit)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        host, port = server.server_address
+        seed(Client(host, port))
+
+    deadline = time.perf_counter() + args.seconds
+    all_stats = [{} for _ in range(args.clients)]
+    threads = [
+        threading.Thread(target=worker, args=(Client(host, port), deadline, args.write_ratio, stats,
+                                              random.Random(i)))
+        for i, stats in enumerate(all_stats)
+    ]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    merged = {}
+    for stats in all_stats:
+        for kind, times in stats.items():
+            merged.setdefault(kind, []).extend(times)
+    report(merged, elapsed)
+
+    if server is not None:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import os
+import tempfile
+
+import pytest
+
+# Las pruebas (incluidos los scripts *_quick que se ejecutan al importarse)
+# usan una base temporal en lugar de app/lavanderia.db. Debe definirse antes
+# de que cualquier módulo importe app.database.
+os.environ.setdefault("LAVANDERIA_DB", os.path.join(tempfile.mkdtemp(), "lavanderia_test.db"))
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Las cachés son por proceso: cada prueba empieza (y termina) con ellas vacías."""
+    from app.cache import identity_map
+    from app.models.service import catalog_cache
+    identity_map.clear()
+    catalog_cache.invalidate()
+    yield
+    identity_map.clear()
+    catalog_cache.invalidate()
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """
+    Base temporal, ya migrada, que usan todos los modelos y los reportes en
+    lugar de la global. Un archivo que necesita datos de partida la extiende
+    con un fixture del mismo nombre: def db(db): ...; return db.
+    """
+    from app import reports
+    from app.database import Database
+    from app.models import customer, order_items, orders, payment, service
+    database = Database(str(tmp_path / "prueba.db"))
+    for module in (customer, service, orders, order_items, payment, reports):
+        monkeypatch.setattr(module, "db", database)
+    yield database
+    database.close()
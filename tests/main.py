@@ -2,132 +2,119 @@ import tkinter as tk
 from tkinter import ttk, simpledialog, messagebox
 from datetime import datetime
 from app.database import db 
+from app.executor import QueryExecutor
+from app.models.customer import Customer as CustomerModel
+from app.models.orders import Order as OrderModel
+from app.models.payment import Payment as PaymentModel
+from app.models.service import Service as ServiceModel
+from app.money import format_cents, line_total, to_cents
+from app.virtual_table import VirtualTable
 
 
 class Customer:
-    """Modelo Cliente conectado a SQLite."""
+    """Modelo Cliente conectado a SQLite (lecturas puntuales y escrituras vía app.models.customer)."""
     @staticmethod
     def create(name, phone):
-        query = "INSERT INTO customers (name, phone) VALUES (?, ?)"
-        return db.execute(query, (name, phone))
+        return CustomerModel.create(name, phone)
 
     @staticmethod
     def get_all():
         query = "SELECT * FROM customers ORDER BY name ASC"
         return db.fetch(query)
 
+    @staticmethod
+    def search(text, limit=20):
+        # Búsqueda por prefijo (FTS5) en nombre, teléfono y email
+        return CustomerModel.search(text, limit)
+
     @staticmethod
     def get_by_id(customer_id):
-        query = "SELECT * FROM customers WHERE id = ?"
-        results = db.fetch(query, (customer_id,))
-        return results[0] if results else None
+        customer = CustomerModel.get_by_id(customer_id)
+        return dict(vars(customer)) if customer else None
 
     @staticmethod
     def update(customer_id, name, phone):
-        query = "UPDATE customers SET name = ?, phone = ? WHERE id = ?"
-        db.execute(query, (name, phone, customer_id))
+        customer = CustomerModel.get_by_id(customer_id)
+        if not customer:
+            return False
+        customer.name, customer.phone = name, phone
+        customer.update()
         return True
 
     @staticmethod
     def delete(customer_id):
-        query = "DELETE FROM customers WHERE id = ?"
-        db.execute(query, (customer_id,))
+        customer = CustomerModel.get_by_id(customer_id)
+        if customer:
+            customer.delete()
         return True
 
 class Service:
-    """Modelo Servicio conectado a SQLite."""
+    """Modelo Servicio: delega en app.models.service, que sirve el catálogo desde caché."""
     @staticmethod
-    def create(name, price):
-        query = "INSERT INTO services (name, price) VALUES (?, ?)"
-        return db.execute(query, (name, price))
+    def create(name, price_cents):
+        return ServiceModel.create(name, price_cents)
 
     @staticmethod
     def get_all():
-        query = "SELECT * FROM services ORDER BY name ASC"
-        return db.fetch(query)
+        return ServiceModel.get_all()
 
     @staticmethod
     def get_by_id(service_id):
-        query = "SELECT * FROM services WHERE id = ?"
-        results = db.fetch(query, (service_id,))
+        results = ServiceModel.get_by_id(service_id)
         return results[0] if results else None
 
     @staticmethod
-    def update(service_id, name, price):
-        query = "UPDATE services SET name = ?, price = ? WHERE id = ?"
-        db.execute(query, (name, price, service_id))
+    def update(service_id, name, price_cents):
+        ServiceModel.update(service_id, name, price_cents)
         return True
 
     @staticmethod
     def delete(service_id):
-        query = "DELETE FROM services WHERE id = ?"
-        db.execute(query, (service_id,))
+        ServiceModel.delete(service_id)
         return True
 
 class Order:
     """Modelo Pedido conectado a SQLite."""
     @staticmethod
-    def create(customer_id, items, total_amount, status="Pendiente"):
-        # Nota: En este esquema simple no guardamos el detalle de los ítems en una tabla aparte,
-        # solo guardamos el total de la orden.
+    def create(customer_id, items, total_cents, status="Pendiente"):
+        # Cabecera + ítems del carrito en una sola transacción; el total se suma en
+        # SQL a partir de los ítems (total_cents queda solo como referencia de la GUI).
         date_str = datetime.now().strftime("%Y-%m-%d %H:%M")
-        query = """
-            INSERT INTO orders (customer_id, total, date, status, paid) 
-            VALUES (?, ?, ?, ?, ?)
-        """
-        return db.execute(query, (customer_id, total_amount, date_str, status, 0.0))
+        return OrderModel.create_with_items(customer_id, items, date_str, status)
 
     @staticmethod
     def get_all():
         query = "SELECT * FROM orders ORDER BY id DESC"
         return db.fetch(query)
 
+    @staticmethod
+    def list_with_customers(limit=None, before_id=None):
+        """Órdenes con el nombre del cliente ya resuelto (una sola consulta con JOIN)."""
+        return OrderModel.list_with_customers(limit=limit, before_id=before_id)
+
     @staticmethod
     def get_by_id(order_id):
-        query = "SELECT * FROM orders WHERE id = ?"
-        results = db.fetch(query, (order_id,))
+        results = OrderModel.get_by_id(order_id)
         return results[0] if results else None
 
     @staticmethod
     def update_status(order_id, new_status):
-        query = "UPDATE orders SET status = ? WHERE id = ?"
-        db.execute(query, (new_status, order_id))
+        OrderModel.update_status(order_id, new_status)
         return True
 
     @staticmethod
     def delete(order_id):
-        # Primero borramos pagos asociados para mantener integridad (si no hay CASCADE)
-        db.execute("DELETE FROM payments WHERE order_id = ?", (order_id,))
-        db.execute("DELETE FROM orders WHERE id = ?", (order_id,))
+        # Borra la orden y sus pagos en una sola transacción (e invalida el mapa de identidad)
+        OrderModel.delete(order_id)
         return True
 
 class Payment:
     """Modelo Pago conectado a SQLite."""
     @staticmethod
-    def create(order_id, amount, method="Efectivo"):
-        # 1. Registrar el pago
-        date_str = datetime.now().strftime("%Y-%m-%d %H:%M")
-        query_insert = """
-            INSERT INTO payments (order_id, amount, method, date) 
-            VALUES (?, ?, ?, ?)
-        """
-        payment_id = db.execute(query_insert, (order_id, amount, method, date_str))
-
-        # 2. Actualizar el saldo pagado de la orden
-        # Primero obtenemos la orden actual para ver totales
-        order = Order.get_by_id(order_id)
-        if order:
-            new_paid = order['paid'] + amount
-            new_status = order['status']
-            
-            # Si ya se cubrió el total, cambiamos estado
-            if new_paid >= order['total']:
-                new_status = "Pagado y Terminado"
-            
-            query_update = "UPDATE orders SET paid = ?, status = ? WHERE id = ?"
-            db.execute(query_update, (new_paid, new_status, order_id))
-            
-        return payment_id
+    def create(order_id, amount_cents, method="Efectivo"):
+        # El trigger de payments suma el pago al saldo y cambia el estado en la
+        # misma sentencia: dos terminales a la vez no pierden pagos.
+        return PaymentModel.post(order_id, amount_cents, method)
 
     @staticmethod
     def all():
@@ -139,6 +126,11 @@ class Payment:
 # 2. APLICACIÓN TKINTER (GUI)
 # =======================================================
 
+# Búsqueda de clientes en el pedido: resultados por consulta y pausa de tecleo
+CUSTOMER_SEARCH_LIMIT = 20
+CUSTOMER_SEARCH_DELAY_MS = 200
+
+
 class LavanderiaApp(tk.Tk):
     def __init__(self):
         super().__init__()
@@ -151,6 +143,12 @@ class LavanderiaApp(tk.Tk):
         self.style.configure("Treeview.Heading", font=('Helvetica', 10, 'bold'))
         self.style.configure("Treeview", font=('Helvetica', 10), rowheight=25)
         
+        # Las consultas corren en un hilo de base de datos; los resultados vuelven
+        # a este hilo por after(), así la ventana no se congela esperando a SQLite
+        self.executor = QueryExecutor()
+        self.executor.attach(self)
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
         self.notebook = ttk.Notebook(self)
         self.notebook.pack(pady=10, padx=10, expand=True, fill="both")
         
@@ -163,6 +161,21 @@ class LavanderiaApp(tk.Tk):
         self.create_order_tab() 
         self.create_payment_tab()
 
+    def on_close(self):
+        # Las escrituras ya enviadas terminan antes de cerrar; los refrescos se descartan
+        self.executor.shutdown(wait=True)
+        self.destroy()
+
+    def run_db(self, fn, *args, on_done=None, error_title="Error"):
+        """
+        Ejecuta una operación de los modelos en el hilo de base de datos.
+        on_done(resultado) corre luego en el hilo de Tk; un error se muestra en un diálogo.
+        """
+        return self.executor.submit(
+            fn, *args, on_done=on_done or (lambda result: None),
+            on_error=lambda e: messagebox.showerror(error_title, f"Error en la base de datos: {e}"),
+        )
+
     # -----------------------------
     # PESTAÑA CLIENTES
     # -----------------------------
@@ -180,22 +193,22 @@ class LavanderiaApp(tk.Tk):
         ttk.Button(btn_frame, text="Eliminar", command=self.delete_customer).pack(side='left', padx=5)
         ttk.Button(btn_frame, text="Actualizar Lista", command=self.load_customer_data).pack(side='left', padx=5)
 
-        # Tabla
-        columns = ("ID", "Nombre", "Teléfono")
-        self.customer_tree = ttk.Treeview(self.customer_frame, columns=columns, show='headings')
-        for col in columns:
-            self.customer_tree.heading(col, text=col)
-            self.customer_tree.column(col, width=100 if col == "ID" else 200)
-            
-        self.customer_tree.pack(fill='both', expand=True)
+        # Tabla: alfabética, cargada por páginas a medida que se hace scroll
+        self.customer_table = VirtualTable(
+            self.customer_frame,
+            columns=[("ID", 100), ("Nombre", 200), ("Teléfono", 200)],
+            fetch_page=CustomerModel.page_by_name,
+            row_key=lambda c: (c['name'], c['id']),
+            row_values=lambda c: (c['id'], c['name'], c['phone']),
+            executor=self.executor,
+        )
+        self.customer_tree = self.customer_table.tree
+        self.customer_table.pack(fill='both', expand=True)
         self.load_customer_data()
 
     def load_customer_data(self):
-        for item in self.customer_tree.get_children():
-            self.customer_tree.delete(item)
-        customers = Customer.get_all()
-        for c in customers:
-            self.customer_tree.insert('', 'end', values=(c['id'], c['name'], c['phone']))
+        # Solo aplica los cambios del rango ya cargado (no rearma la lista)
+        self.customer_table.refresh()
 
     def open_customer_window(self, mode):
         selected = self.customer_tree.focus()
@@ -208,10 +221,13 @@ class LavanderiaApp(tk.Tk):
                 return
             values = self.customer_tree.item(selected, 'values')
             customer_id = values[0]
-            # Consultamos a BD para tener datos frescos
-            c_db = Customer.get_by_id(customer_id)
-            if c_db: data = c_db
+            # Datos frescos de la BD, leídos en el hilo de base de datos
+            self.run_db(Customer.get_by_id, customer_id,
+                        on_done=lambda c_db: self.show_customer_window(mode, customer_id, c_db or data))
+            return
+        self.show_customer_window(mode, customer_id, data)
 
+    def show_customer_window(self, mode, customer_id, data):
         win = tk.Toplevel(self)
         win.title(f"{'Nuevo' if mode == 'new' else 'Editar'} Cliente")
         win.geometry("300x180")
@@ -233,14 +249,15 @@ class LavanderiaApp(tk.Tk):
                 messagebox.showerror("Error", "El nombre es obligatorio")
                 return
             
+            def saved(result):
+                self.load_customer_data()
+                messagebox.showinfo("Éxito", "Cliente guardado.")
+
+            win.destroy()
             if mode == "new":
-                Customer.create(name, phone)
+                self.run_db(Customer.create, name, phone, on_done=saved)
             else:
-                Customer.update(customer_id, name, phone)
-            
-            win.destroy()
-            self.load_customer_data()
-            messagebox.showinfo("Éxito", "Cliente guardado.")
+                self.run_db(Customer.update, customer_id, name, phone, on_done=saved)
 
         ttk.Button(win, text="Guardar", command=save).pack(pady=15)
 
@@ -250,8 +267,9 @@ class LavanderiaApp(tk.Tk):
             return
         cid = self.customer_tree.item(selected, 'values')[0]
         if messagebox.askyesno("Confirmar", "¿Eliminar cliente?"):
-            Customer.delete(cid)
-            self.load_customer_data()
+            # Un cliente con pedidos no se puede borrar: el error se muestra en on_error
+            self.run_db(Customer.delete, cid, on_done=lambda result: self.load_customer_data(),
+                        error_title="No se pudo eliminar el cliente")
 
     # -----------------------------
     # PESTAÑA SERVICIOS
@@ -269,24 +287,32 @@ class LavanderiaApp(tk.Tk):
         ttk.Button(btn_frame, text="Eliminar", command=self.delete_service).pack(side='left', padx=5)
         ttk.Button(btn_frame, text="Actualizar Lista", command=self.load_service_data).pack(side='left', padx=5)
 
-        self.service_tree = ttk.Treeview(self.service_frame, columns=("ID", "Nombre", "Precio"), show='headings')
-        self.service_tree.heading("ID", text="ID"); self.service_tree.column("ID", width=50)
-        self.service_tree.heading("Nombre", text="Nombre"); self.service_tree.column("Nombre", width=200)
-        self.service_tree.heading("Precio", text="Precio ($)"); self.service_tree.column("Precio", width=100)
-        self.service_tree.pack(fill='both', expand=True)
+        # El catálogo ya está en memoria (caché): las páginas se cortan de la lista
+        def service_page(after, limit):
+            services = Service.get_all()
+            if after is not None:
+                services = [s for s in services if (s['name'], s['id']) > after]
+            return services[:limit]
+
+        self.service_table = VirtualTable(
+            self.service_frame,
+            columns=[("ID", 50), ("Nombre", 200), ("Precio ($)", 100)],
+            fetch_page=service_page,
+            row_key=lambda s: (s['name'], s['id']),
+            row_values=lambda s: (s['id'], s['name'], format_cents(s['price_cents'])),
+            executor=self.executor,
+        )
+        self.service_tree = self.service_table.tree
+        self.service_table.pack(fill='both', expand=True)
         self.load_service_data()
 
     def load_service_data(self):
-        for item in self.service_tree.get_children():
-            self.service_tree.delete(item)
-        services = Service.get_all()
-        for s in services:
-            self.service_tree.insert('', 'end', values=(s['id'], s['name'], f"${s['price']:.2f}"))
+        self.service_table.refresh()
 
     def open_service_window(self, mode):
         selected = self.service_tree.focus()
         service_id = None
-        data = {"name": "", "price": 0.0} # Inicializar price como float o string vacío
+        data = {"name": "", "price_cents": 0}
         
         if mode == "edit":
             if not selected: 
@@ -294,9 +320,12 @@ class LavanderiaApp(tk.Tk):
                 return
             values = self.service_tree.item(selected, 'values')
             service_id = values[0]
-            s_db = Service.get_by_id(service_id)
-            if s_db: data = s_db
+            self.run_db(Service.get_by_id, service_id,
+                        on_done=lambda s_db: self.show_service_window(mode, service_id, s_db or data))
+            return
+        self.show_service_window(mode, service_id, data)
 
+    def show_service_window(self, mode, service_id, data):
         win = tk.Toplevel(self)
         win.title(f"{'Nuevo' if mode == 'new' else 'Editar'} Servicio")
         win.geometry("300x180")
@@ -307,20 +336,20 @@ class LavanderiaApp(tk.Tk):
 
         ttk.Label(win, text="Precio:").pack(pady=5)
         entry_price = ttk.Entry(win, width=30)
-        entry_price.pack(); entry_price.insert(0, str(data['price']))
+        entry_price.pack(); entry_price.insert(0, format_cents(data['price_cents'], symbol=""))
 
         def save():
             name = entry_name.get()
             try:
-                price = float(entry_price.get())
-                if price < 0: raise ValueError
+                price_cents = to_cents(entry_price.get())
+                if price_cents < 0: raise ValueError
             except ValueError:
                 messagebox.showerror("Error", "Precio inválido")
                 return
             
-            if mode == "new": Service.create(name, price)
-            else: Service.update(service_id, name, price)
-            win.destroy(); self.load_service_data()
+            win.destroy()
+            if mode == "new": self.run_db(Service.create, name, price_cents, on_done=lambda r: self.load_service_data())
+            else: self.run_db(Service.update, service_id, name, price_cents, on_done=lambda r: self.load_service_data())
 
         ttk.Button(win, text="Guardar", command=save).pack(pady=15)
 
@@ -328,8 +357,8 @@ class LavanderiaApp(tk.Tk):
         selected = self.service_tree.focus()
         if selected and messagebox.askyesno("Confirmar", "¿Eliminar servicio?"):
             sid = self.service_tree.item(selected, 'values')[0]
-            Service.delete(sid)
-            self.load_service_data()
+            self.run_db(Service.delete, sid, on_done=lambda result: self.load_service_data(),
+                        error_title="No se pudo eliminar el servicio")
 
     # -----------------------------
     # PESTAÑA PEDIDOS (ÓRDENES)
@@ -347,42 +376,50 @@ class LavanderiaApp(tk.Tk):
         ttk.Button(btn_frame, text="Eliminar", command=self.delete_order).pack(side='left', padx=5)
         ttk.Button(btn_frame, text="Actualizar Lista", command=self.load_order_data).pack(side='left', padx=5)
         
+        # Más recientes primero; el nombre del cliente viene en la misma consulta (sin N+1)
         cols = ("ID", "Cliente", "Total", "Pagado", "Fecha", "Estado")
-        self.order_tree = ttk.Treeview(self.order_frame, columns=cols, show='headings')
-        for c in cols:
-            self.order_tree.heading(c, text=c)
-            self.order_tree.column(c, width=100 if c != "Cliente" else 200, anchor="center")
-        
-        self.order_tree.pack(fill='both', expand=True)
+        self.order_table = VirtualTable(
+            self.order_frame,
+            columns=[(c, 100 if c != "Cliente" else 200) for c in cols],
+            fetch_page=lambda before, limit: Order.list_with_customers(limit=limit, before_id=before),
+            row_values=lambda o: (
+                o['id'], o['customer_name'], format_cents(o['total_cents']), format_cents(o['paid_cents']),
+                o['date'], o['status']
+            ),
+            anchor="center",
+            executor=self.executor,
+        )
+        self.order_tree = self.order_table.tree
+        self.order_table.pack(fill='both', expand=True)
         # Cargamos datos al inicio de la pestaña
         self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_change)
 
     def on_tab_change(self, event):
-        selected_tab = self.notebook.tab(self.notebook.select(), "text")
-        if "Pedidos" in selected_tab:
-            self.load_order_data()
-        elif "Clientes" in selected_tab:
-            self.load_customer_data()
-        elif "Servicios" in selected_tab:
-            self.load_service_data()
-        elif "Pagos" in selected_tab:
-            self.load_payment_data()
+        selected = self.notebook.nametowidget(self.notebook.select())
+        tables = {
+            self.customer_frame: (self.customer_table, self.load_customer_data),
+            self.service_frame: (self.service_table, self.load_service_data),
+            self.order_frame: (self.order_table, self.load_order_data),
+            self.payment_frame: (self.payment_table, self.load_payment_data),
+        }
+        # Al pasar rápido por varias pestañas solo se termina de cargar la visible
+        for frame, (table, load) in tables.items():
+            if frame is selected:
+                load()
+            else:
+                table.cancel()
 
     def load_order_data(self):
-        for item in self.order_tree.get_children():
-            self.order_tree.delete(item)
-        orders = Order.get_all()
-        for o in orders:
-            # Recuperar nombre del cliente para mostrar en la tabla
-            customer = Customer.get_by_id(o['customer_id'])
-            c_name = customer['name'] if customer else "Desconocido"
-            
-            self.order_tree.insert('', 'end', values=(
-                o['id'], c_name, f"${o['total']:.2f}", f"${o['paid']:.2f}", 
-                o['date'], o['status']
-            ))
+        self.order_table.refresh()
 
     def open_create_order_window(self):
+        def load():
+            # ¿Hay clientes? y el catálogo, en una sola vuelta al hilo de base de datos
+            return bool(Customer.search("", limit=1)), Service.get_all()
+
+        self.run_db(load, on_done=lambda result: self.show_create_order_window(*result))
+
+    def show_create_order_window(self, has_customers, services):
         self.current_order_items = []
         win = tk.Toplevel(self)
         win.title("Nuevo Pedido")
@@ -392,26 +429,31 @@ class LavanderiaApp(tk.Tk):
         frame_cust = ttk.LabelFrame(win, text="1. Seleccionar Cliente", padding=10)
         frame_cust.pack(fill='x', padx=10, pady=5)
         
-        customers = Customer.get_all()
-        if not customers:
+        if not has_customers:
             ttk.Label(frame_cust, text="No hay clientes registrados. Cree uno primero.").pack()
             return
         
-        cust_options = [f"{c['id']} - {c['name']}" for c in customers]
-        self.var_customer = tk.StringVar(value=cust_options[0])
-        ttk.OptionMenu(frame_cust, self.var_customer, cust_options[0], *cust_options).pack(fill='x')
+        # Búsqueda incremental: la lista se arma con Customer.search a medida que
+        # se escribe (nombre, teléfono o email), sin cargar todos los clientes.
+        ttk.Label(frame_cust, text="Escriba para buscar:").pack(anchor='w')
+        self.var_customer = tk.StringVar()
+        self.combo_customer = ttk.Combobox(frame_cust, textvariable=self.var_customer)
+        self.combo_customer.pack(fill='x')
+        self.combo_customer.bind('<KeyRelease>', self.schedule_customer_search)
+        self._customer_search_job = None
+        self.refresh_customer_options()
+        self.combo_customer.focus_set()
 
         # 2. Agregar Servicios
         frame_serv = ttk.LabelFrame(win, text="2. Agregar Servicios", padding=10)
         frame_serv.pack(fill='x', padx=10, pady=5)
-        
-        services = Service.get_all()
+
         if not services:
             ttk.Label(frame_serv, text="No hay servicios registrados.").pack()
         else:
             # Creamos un diccionario para mapear ID a Servicio fácilmente
             self.service_map = {s['id']: s for s in services}
-            serv_options = [f"{s['id']} - {s['name']} (${s['price']:.2f})" for s in services]
+            serv_options = [f"{s['id']} - {s['name']} ({format_cents(s['price_cents'])})" for s in services]
             
             self.var_service = tk.StringVar(value=serv_options[0])
             ttk.OptionMenu(frame_serv, self.var_service, serv_options[0], *serv_options).grid(row=0, column=0, sticky="ew")
@@ -434,6 +476,30 @@ class LavanderiaApp(tk.Tk):
 
         ttk.Button(win, text="GUARDAR PEDIDO", command=lambda: self.save_new_order(win)).pack(pady=10)
 
+    def schedule_customer_search(self, event):
+        # Las teclas de navegación sirven para elegir de la lista, no para buscar
+        if event.keysym in ("Up", "Down", "Return", "Escape", "Tab"):
+            return
+        # Espera a que se deje de escribir: una consulta por pausa, no por tecla
+        if self._customer_search_job:
+            self.after_cancel(self._customer_search_job)
+        self._customer_search_job = self.after(CUSTOMER_SEARCH_DELAY_MS, self.refresh_customer_options)
+
+    def refresh_customer_options(self):
+        self._customer_search_job = None
+        combo = self.combo_customer
+
+        def show(results):
+            if combo.winfo_exists():
+                combo['values'] = [
+                    f"{c['id']} - {c['name']}" + (f" ({c['phone']})" if c['phone'] else "")
+                    for c in results
+                ]
+
+        # Con la misma clave, una búsqueda nueva deja sin efecto la anterior
+        self.executor.submit(Customer.search, self.var_customer.get(), CUSTOMER_SEARCH_LIMIT,
+                             key="customer-search", on_done=show)
+
     def add_item_to_cart(self):
         try:
             qty = float(self.entry_qty.get())
@@ -443,17 +509,18 @@ class LavanderiaApp(tk.Tk):
             s_id = int(s_str.split(' - ')[0])
             service = self.service_map.get(s_id)
             
-            subtotal = service['price'] * qty
+            # Mismo redondeo por línea que usa el modelo al guardar los ítems
+            subtotal_cents = line_total(service['price_cents'], qty)
             
             self.current_order_items.append({
                 "service_id": s_id, "name": service['name'], 
-                "price": service['price'], "qty": qty, "subtotal": subtotal
+                "price_cents": service['price_cents'], "qty": qty, "subtotal_cents": subtotal_cents
             })
             
             # Actualizar tabla y total
-            self.tree_cart.insert('', 'end', values=(service['name'], qty, f"{subtotal:.2f}"))
-            total = sum(i['subtotal'] for i in self.current_order_items)
-            self.lbl_total.config(text=f"Total: ${total:.2f}")
+            self.tree_cart.insert('', 'end', values=(service['name'], qty, format_cents(subtotal_cents, symbol="")))
+            total_cents = sum(i['subtotal_cents'] for i in self.current_order_items)
+            self.lbl_total.config(text=f"Total: {format_cents(total_cents)}")
             
         except ValueError as e:
             messagebox.showerror("Error", f"Datos inválidos: {e}")
@@ -467,15 +534,24 @@ class LavanderiaApp(tk.Tk):
             return
         
         c_str = self.var_customer.get()
-        c_id = int(c_str.split(' - ')[0])
-        total = sum(i['subtotal'] for i in self.current_order_items)
-        
-        # Guardamos en BD
-        Order.create(c_id, self.current_order_items, total)
+        try:
+            c_id = int(c_str.split(' - ')[0])
+        except ValueError:
+            messagebox.showerror("Error", "Seleccione un cliente de la lista.")
+            return
+        total_cents = sum(i['subtotal_cents'] for i in self.current_order_items)
         
-        win.destroy()
-        self.load_order_data()
-        messagebox.showinfo("Éxito", "Pedido registrado en base de datos.")
+        def saved(order_id):
+            if order_id is None:
+                messagebox.showerror("Error", "No se pudo registrar el pedido.")
+                return
+            if win.winfo_exists():
+                win.destroy()
+            self.load_order_data()
+            messagebox.showinfo("Éxito", "Pedido registrado en base de datos.")
+
+        # Guardamos en BD (orden e ítems juntos), sin bloquear la ventana
+        self.run_db(Order.create, c_id, list(self.current_order_items), total_cents, on_done=saved)
 
     def change_order_status(self):
         sel = self.order_tree.focus()
@@ -495,15 +571,13 @@ class LavanderiaApp(tk.Tk):
             parent=self.order_frame
         )
         if status:
-            Order.update_status(oid, status)
-            self.load_order_data()
+            self.run_db(Order.update_status, oid, status, on_done=lambda result: self.load_order_data())
 
     def delete_order(self):
         sel = self.order_tree.focus()
         if sel and messagebox.askyesno("Confirmar", "¿Eliminar Pedido y sus pagos? Esta acción es permanente."):
             oid = self.order_tree.item(sel, 'values')[0]
-            Order.delete(oid)
-            self.load_order_data()
+            self.run_db(Order.delete, oid, on_done=lambda result: self.load_order_data())
 
     # -----------------------------
     # PESTAÑA PAGOS
@@ -519,37 +593,26 @@ class LavanderiaApp(tk.Tk):
         ttk.Button(btn_frame, text="Registrar Pago", command=self.open_create_payment_window).pack(side='left', padx=5)
         ttk.Button(btn_frame, text="Actualizar Lista", command=self.load_payment_data).pack(side='left', padx=5)
         
+        # Más recientes primero, por páginas
         cols = ("ID", "ID Orden", "Monto", "Método", "Fecha")
-        self.payment_tree = ttk.Treeview(self.payment_frame, columns=cols, show='headings')
-        for c in cols:
-            self.payment_tree.heading(c, text=c)
-            self.payment_tree.column(c, width=120, anchor="center")
-        self.payment_tree.pack(fill='both', expand=True)
+        self.payment_table = VirtualTable(
+            self.payment_frame,
+            columns=[(c, 120) for c in cols],
+            fetch_page=lambda before, limit: PaymentModel.page(before, limit, descending=True),
+            row_values=lambda p: (
+                p['id'], p['order_id'], format_cents(p['amount_cents']), p['payment'],
+                p['date'] or 'Fecha Desconocida'
+            ),
+            anchor="center",
+            executor=self.executor,
+        )
+        self.payment_tree = self.payment_table.tree
+        self.payment_table.pack(fill='both', expand=True)
         # La carga inicial está cubierta por on_tab_change, pero la llamamos por si acaso
         self.load_payment_data() 
 
     def load_payment_data(self):
-        for item in self.payment_tree.get_children():
-            self.payment_tree.delete(item)
-        payments = Payment.all()
-        for p in payments:
-            # CORRECCIÓN: Usamos .get() con valores por defecto para TODAS las claves
-            # que podrían faltar en registros antiguos, incluyendo 'method' y 'date'.
-            
-            # Recuperación robusta de datos
-            id_val = p.get('id', 'N/A')
-            order_id_val = p.get('order_id', 'N/A')
-            amount_val = p.get('amount', 0.0) # 0.0 para poder formatear
-            method_val = p.get('method', 'N/A')
-            date_val = p.get('date', 'Fecha Desconocida')
-            
-            self.payment_tree.insert('', 'end', values=(
-                id_val, 
-                order_id_val, 
-                f"${amount_val:.2f}", # Formatear el monto
-                method_val, 
-                date_val
-            ))
+        self.payment_table.refresh()
 
     def open_create_payment_window(self):
         win = tk.Toplevel(self)
@@ -569,33 +632,40 @@ class LavanderiaApp(tk.Tk):
         def save():
             try:
                 oid = int(entry_oid.get())
-                amt = float(entry_amount.get())
-                met = combo_method.get()
+                amt = to_cents(entry_amount.get())
+            except ValueError:
+                messagebox.showerror("Error", "Asegúrese de que el ID y el Monto sean números válidos.")
+                return
+            met = combo_method.get()
 
-                if amt <= 0:
-                    messagebox.showerror("Error", "El monto debe ser positivo.")
-                    return
-                
+            if amt <= 0:
+                messagebox.showerror("Error", "El monto debe ser positivo.")
+                return
+
+            def saved(result):
+                self.load_payment_data()
+                self.load_order_data() # Refrescar estado de órdenes
+                messagebox.showinfo("Éxito", "Pago registrado. ¡Estado de la orden actualizado!")
+
+            def checked(order):
                 # Validar existencia orden
-                order = Order.get_by_id(oid)
                 if not order:
                     messagebox.showerror("Error", f"ID de Orden {oid} no existe.")
                     return
-                
-                # Advertencia si excede total
-                remaining = order['total'] - order['paid']
-                if amt > remaining and remaining > 0.01:
-                    if not messagebox.askyesno("Alerta", f"El pago excede el restante (${remaining:.2f}). ¿Continuar?"):
+
+                # Advertencia si excede el saldo (lo mantienen los triggers de pagos)
+                remaining = order['balance_cents']
+                if amt > remaining and remaining > 0:
+                    if not messagebox.askyesno("Alerta", f"El pago excede el restante ({format_cents(remaining)}). ¿Continuar?"):
                         return
 
-                Payment.create(oid, amt, met)
-                win.destroy()
-                self.load_payment_data()
-                self.load_order_data() # Refrescar estado de órdenes
-                messagebox.showinfo("Éxito", "Pago registrado. ¡Estado de la orden actualizado!")
-                
-            except ValueError:
-                messagebox.showerror("Error", "Asegúrese de que el ID y el Monto sean números válidos.")
+                if win.winfo_exists():
+                    win.destroy()
+                self.run_db(Payment.create, oid, amt, met, on_done=saved,
+                            error_title="No se pudo registrar el pago")
+
+            # La orden se lee en el hilo de base de datos; la ventana no se congela
+            self.run_db(Order.get_by_id, oid, on_done=checked)
 
         ttk.Button(win, text="Guardar Pago", command=save).pack(pady=15)
 
@@ -0,0 +1,106 @@
+import asyncio
+import threading
+
+import pytest
+
+import app.models.customer as customer_module
+from app.async_database import AsyncDatabase
+
+Customer = customer_module.Customer
+
+
+@pytest.fixture
+def database(db):
+    Customer.bulk_create([{"name": f"Cliente {i:03d}"} for i in range(50)])
+    return db
+
+
+def run(database, test, connections=3):
+    async def main():
+        async with AsyncDatabase(database, connections) as adb:
+            return await test(adb)
+    return asyncio.run(main())
+
+
+def test_muchas_corrutinas_comparten_pocas_conexiones(database):
+    async def test(adb):
+        results = await asyncio.gather(*(
+            adb.fetch("SELECT name, ? AS n, (SELECT 1 FROM customers LIMIT 1) AS ok FROM customers WHERE id = ?",
+                      (i, i % 50 + 1))
+            for i in range(300)
+        ))
+        threads = await asyncio.gather(*(adb.run(lambda: threading.current_thread().name) for _ in range(30)))
+        return results, set(threads)
+
+    results, threads = run(database, test)
+    assert [r[0]["n"] for r in results] == list(range(300))
+    assert len(threads) <= 3 and all(t.startswith("async-db") for t in threads)
+
+
+def test_el_bucle_de_eventos_no_se_bloquea(database):
+    gate = threading.Event()
+
+    async def test(adb):
+        slow = asyncio.create_task(adb.run(gate.wait, 5))
+        ticks = 0
+        for _ in range(5):
+            await asyncio.sleep(0.01)
+            ticks += 1
+        gate.set()
+        await slow
+        return ticks
+
+    assert run(database, test) == 5
+
+
+def test_iter_entrega_por_lotes(database):
+    async def test(adb):
+        return [row["name"] async for row in adb.iter("SELECT name FROM customers ORDER BY id", batch_size=7)]
+
+    assert run(database, test) == [f"Cliente {i:03d}" for i in range(50)]
+
+
+def test_transaccion_confirma_o_deshace_todo(database):
+    async def test(adb):
+        async with adb.transaction(immediate=True):
+            await adb.customers.create("Ana", "555-1234")
+            await adb.execute("UPDATE customers SET phone = 'x' WHERE name = 'Cliente 000'")
+
+        with pytest.raises(RuntimeError):
+            async with adb.transaction():
+                await adb.customers.create("Beto")
+                raise RuntimeError("falla a mitad")
+
+        # Fuera de la transacción las consultas vuelven a repartirse entre los hilos
+        names = {r["name"] for r in await adb.fetch("SELECT name FROM customers")}
+        phone = await adb.fetch("SELECT phone FROM customers WHERE name = 'Cliente 000'")
+        return names, phone[0]["phone"]
+
+    names, phone = run(database, test)
+    assert "Ana" in names and "Beto" not in names
+    assert phone == "x"
+
+
+def test_transaccion_usa_un_solo_hilo(database):
+    async def test(adb):
+        async with adb.transaction():
+            inside = await asyncio.gather(*(adb.run(lambda: threading.current_thread().name) for _ in range(10)))
+            depth = await adb.run(database.in_transaction)
+        outside = await adb.run(database.in_transaction)
+        return set(inside), depth, outside
+
+    inside, depth, outside = run(database, test)
+    assert len(inside) == 1
+    assert depth is True and outside is False
+
+
+def test_modelos_async(database):
+    async def test(adb):
+        customer_id = await adb.customers.create("Carla", "555-0000")
+        customer = await adb.customers.get_by_id(customer_id)
+        page = await adb.customers.page_by_name(None, 3)
+        return customer, page
+
+    customer, page = run(database, test)
+    assert customer.name == "Carla"
+    assert [c.name for c in page] == ["Carla", "Cliente 000", "Cliente 001"]
@@ -0,0 +1,165 @@
+import pytest
+
+import app.models.service as service_module
+from app.cache import IdentityMap, ReadThroughCache, identity_map
+from app.models.customer import Customer
+from app.models.orders import Order
+from app.models.payment import Payment
+from app.models.service import Service
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+# -----------------------------
+# READ-THROUGH CON TTL
+# -----------------------------
+def test_read_through_cuenta_aciertos_y_vence():
+    clock = FakeClock()
+    cache = ReadThroughCache(ttl=10, clock=clock)
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return len(loads)
+
+    assert cache.get("k", loader) == 1
+    assert cache.get("k", loader) == 1
+    clock.now = 11
+    assert cache.get("k", loader) == 2
+
+    assert cache.stats() == {"hits": 1, "misses": 2, "hit_rate": 1 / 3, "size": 1}
+
+
+def test_invalidacion_durante_la_carga_no_guarda_dato_viejo():
+    cache = ReadThroughCache()
+
+    def loader():
+        cache.invalidate()  # otro hilo escribió mientras se consultaba
+        return "viejo"
+
+    assert cache.get("k", loader) == "viejo"
+    assert cache.stats()["size"] == 0
+
+
+# -----------------------------
+# CATÁLOGO DE SERVICIOS
+# -----------------------------
+def test_catalogo_se_sirve_desde_memoria(db):
+    lavado = Service.create("Lavado", 5000)
+    Service.create("Planchado", 4000)
+    Service.get_all()
+    misses = service_module.catalog_cache.misses
+
+    for _ in range(10):
+        assert [s["name"] for s in Service.get_all()] == ["Lavado", "Planchado"]
+        assert Service.get_by_id(str(lavado))[0]["price_cents"] == 5000
+
+    assert service_module.catalog_cache.misses == misses
+
+
+def test_escrituras_invalidan_el_catalogo(db):
+    lavado = Service.create("Lavado", 5000)
+    assert Service.get_by_id(lavado)[0]["price_cents"] == 5000
+
+    Service.update(lavado, "Lavado", 5500)
+    assert Service.get_by_id(lavado)[0]["price_cents"] == 5500
+
+    Service.delete(lavado)
+    assert Service.get_by_id(lavado) == []
+    assert Service.get_all() == []
+
+
+def test_rollback_no_deja_el_catalogo_sucio(db):
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            Service.create("Temporal", 10)
+            assert len(Service.get_all()) == 1  # se lee dentro de la transacción
+            raise RuntimeError("deshacer")
+
+    assert Service.get_all() == []
+
+
+# -----------------------------
+# MAPA DE IDENTIDAD LRU
+# -----------------------------
+def test_identity_map_lru_acotado():
+    cache = IdentityMap(maxsize=2)
+    cache.get("t", 1, lambda: "uno")
+    cache.get("t", 2, lambda: "dos")
+    cache.get("t", 1, lambda: "otra vez")  # 1 pasa a ser el más reciente
+    cache.get("t", 3, lambda: "tres")      # se descarta el 2
+
+    assert cache.get("t", 1, lambda: "recargado") == "uno"
+    assert cache.get("t", 2, lambda: "recargado") == "recargado"
+    assert cache.stats()["size"] == 2
+
+
+def test_identity_map_no_guarda_inexistentes_y_se_redimensiona():
+    cache = IdentityMap(maxsize=10)
+    assert cache.get("t", 1, lambda: None) is None
+    assert cache.stats()["size"] == 0
+
+    for i in range(10):
+        cache.get("t", i, lambda: i)
+    cache.resize(3)
+    assert cache.stats()["size"] == 3
+
+    cache.resize(0)
+    cache.get("t", 99, lambda: "x")
+    assert cache.stats()["size"] == 0
+
+
+def test_identity_map_vence_por_ttl():
+    clock = FakeClock()
+    cache = IdentityMap(ttl=5, clock=clock)
+    cache.get("orders", 1, lambda: "pagado 0")
+
+    clock.now = 4
+    assert cache.get("orders", 1, lambda: "pagado 3000") == "pagado 0"
+    # Otra terminal registró un pago: pasado el TTL se vuelve a leer
+    clock.now = 6
+    assert cache.get("orders", 1, lambda: "pagado 3000") == "pagado 3000"
+    assert cache.stats()["misses"] == 2
+
+
+def test_get_by_id_repetido_sale_del_mapa(db):
+    customer_id = Customer.create("Ana", "1")
+    first = Customer.get_by_id(customer_id)
+
+    second = Customer.get_by_id(str(customer_id))
+    assert identity_map.stats()["hits"] == 1
+
+    # Cada llamada recibe su copia: editarla no toca lo guardado en el mapa
+    assert second is not first and vars(second) == vars(first)
+    first.name = "Ana María"
+    assert Customer.get_by_id(customer_id).name == "Ana"
+
+    first.update()
+    assert Customer.get_by_id(customer_id).name == "Ana María"
+
+    first.delete()
+    assert Customer.get_by_id(customer_id) is None
+
+
+def test_pago_invalida_la_orden_en_el_mapa(db):
+    Customer.create("Ana")
+    order_id = db.execute(
+        "INSERT INTO orders (customer_id, total_cents, date, status) VALUES (1, 10000, '2025-01-01', 'Pendiente')")
+    assert Order.get_by_id(order_id)[0]["paid_cents"] == 0
+
+    payment_id = Payment.post(order_id, 3000)
+    assert Order.get_by_id(order_id)[0]["paid_cents"] == 3000
+    assert vars(Payment.get_by_id(payment_id)) == vars(Payment.get_by_id(payment_id))
+
+    Order.update_status(order_id, "Listo")
+    assert Order.get_by_id(order_id)[0]["status"] == "Listo"
+
+    Order.delete(order_id)
+    assert Order.get_by_id(order_id) == []
+    assert Payment.get_by_id(payment_id) is None
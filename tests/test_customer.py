@@ -0,0 +1,82 @@
+import sqlite3
+
+import pytest
+
+import app.models.customer as customer_module
+from app import migrations
+from app.database import STATEMENTS, Database
+
+Customer = customer_module.Customer
+
+
+@pytest.fixture
+def db(db):
+    Customer.bulk_create([
+        {"name": "Ana López", "phone": "555-1234", "email": "ana@correo.com"},
+        {"name": "José Pérez", "phone": "555-9876"},
+        {"name": "Anabel Ruiz", "email": "anabel@mail.com"},
+        {"name": "Beto 100%_real"},
+    ])
+    return db
+
+
+def names(rows):
+    return sorted(r.name for r in rows)
+
+
+def test_busqueda_por_prefijo(db):
+    assert names(Customer.search("an")) == ["Ana López", "Anabel Ruiz"]
+    assert names(Customer.search("ana lop")) == ["Ana López"]
+    assert names(Customer.search("9876")) == ["José Pérez"]
+    assert names(Customer.search("correo")) == ["Ana López"]
+
+
+def test_busqueda_ignora_acentos(db):
+    assert names(Customer.search("jose perez")) == ["José Pérez"]
+    assert names(Customer.search("LÓPEZ")) == ["Ana López"]
+
+
+def test_busqueda_respeta_limite_y_texto_vacio(db):
+    assert len(Customer.search("an", limit=1)) == 1
+    assert [r.name for r in Customer.search("", limit=2)] == ["Ana López", "Anabel Ruiz"]
+    # Comillas u operadores de FTS5 no rompen la consulta
+    assert names(Customer.search('"ana* (')) == ["Ana López", "Anabel Ruiz"]
+
+
+def test_indice_sigue_a_la_tabla(db):
+    ana = Customer.get_by_id(1)
+    ana.name = "Ana Martínez"
+    ana.update()
+    assert names(Customer.search("lopez")) == []
+    assert names(Customer.search("martinez")) == ["Ana Martínez"]
+
+    ana.delete()
+    assert names(Customer.search("ana")) == ["Anabel Ruiz"]
+    Customer.create("Carla", "444")
+    assert names(Customer.search("carla")) == ["Carla"]
+
+
+def test_no_borra_cliente_con_ordenes(db):
+    db.execute("INSERT INTO orders (customer_id, total_cents, date, status) VALUES (1, 0, '2025-01-01', 'Pendiente')")
+    with pytest.raises(sqlite3.IntegrityError):
+        Customer.get_by_id(1).delete()
+    assert Customer.get_by_id(1).name == "Ana López"
+
+
+def test_busqueda_usa_fts_sin_recorrer_clientes(db):
+    assert "SCAN customers" not in db.query_plan(STATEMENTS["customer.search_fts"], ('"ana"*', 20))
+    # Recorre el índice por nombre en orden y corta en el LIMIT
+    assert db.query_plan(STATEMENTS["customer.first_by_name"], (20,)) == [
+        "SCAN customers USING INDEX idx_customers_name"]
+
+
+def test_busqueda_con_like_sin_fts5(tmp_path, monkeypatch):
+    monkeypatch.setattr(migrations, "_fts5_available", lambda conn: False)
+    database = Database(str(tmp_path / "sin_fts.db"))
+    monkeypatch.setattr(customer_module, "db", database)
+    Customer.bulk_create([{"name": "Ana López"}, {"name": "Beto 100%_real"}, {"name": "Beto 100 real"}])
+
+    assert database.fetch_named("customer.has_fts") == []
+    assert names(Customer.search("lóp")) == ["Ana López"]
+    assert names(Customer.search("100%_")) == ["Beto 100%_real"]
+    database.close()
@@ -0,0 +1,485 @@
+import gc
+import threading
+import weakref
+
+import pytest
+
+import app.models.customer  # registra las sentencias customer.*
+from app.database import Database, PRAGMA_PROFILES
+
+
+def make_db(tmp_path):
+    return Database(str(tmp_path / "test.db"))
+
+
+# -----------------------------
+# POOL DE CONEXIONES
+# -----------------------------
+def test_reutiliza_conexion_por_hilo(tmp_path):
+    db = make_db(tmp_path)
+    conn = db.get_connection()
+
+    db.execute("INSERT INTO customers (name, phone) VALUES (?, ?)", ("Ana", "1"))
+    db.fetch("SELECT * FROM customers")
+
+    assert db.get_connection() is conn
+    db.close()
+
+
+def test_conexion_distinta_por_hilo(tmp_path):
+    db = make_db(tmp_path)
+    main_conn = db.get_connection()
+    other = []
+
+    t = threading.Thread(target=lambda: other.append(db.get_connection()))
+    t.start()
+    t.join()
+
+    assert other[0] is not main_conn
+    db.close()
+
+
+def test_reconecta_si_la_conexion_esta_cerrada(tmp_path):
+    db = make_db(tmp_path)
+    conn = db.get_connection()
+    conn.close()
+
+    assert db.get_connection() is not conn
+    assert db.fetch("SELECT 1 AS uno") == [{"uno": 1}]
+    db.close()
+
+
+def test_close_no_retiene_la_instancia(tmp_path):
+    db = make_db(tmp_path)
+    db.fetch("SELECT 1")
+    db.close()
+    ref = weakref.ref(db)
+    del db
+    gc.collect()
+    # atexit ya no la referencia una vez cerrada
+    assert ref() is None
+
+
+def test_consulta_sin_health_check_extra(tmp_path):
+    db = make_db(tmp_path)
+    db.get_connection()
+    executed = []
+    db.get_connection().set_trace_callback(executed.append)
+
+    db.fetch_named("customer.get_by_id", (1,))
+    assert len(executed) == 1 and "FROM customers" in executed[0]
+
+    # Después de un error, la siguiente consulta verifica la conexión
+    executed.clear()
+    db.fetch("SELECT * FROM tabla_inexistente")
+    db.fetch("SELECT 2")
+    assert "SELECT 1" in executed
+    db.close()
+
+
+def test_crear_instancia_no_toca_el_disco(tmp_path):
+    path = tmp_path / "lazy.db"
+    db = Database(str(path))
+    assert not path.exists()
+
+    # La primera consulta abre la conexión y aplica las migraciones
+    assert db.fetch("SELECT COUNT(*) AS n FROM customers") == [{"n": 0}]
+    assert path.exists()
+    db.close()
+
+
+def test_modelos_comparten_la_instancia_global():
+    import app.database
+    import app.models.customer, app.models.orders, app.models.payment, app.models.service
+
+    for module in (app.models.customer, app.models.orders, app.models.payment, app.models.service):
+        assert module.db is app.database.db
+
+
+def test_reintenta_la_migracion_si_fallo(tmp_path, monkeypatch):
+    import sqlite3
+    from app import migrations
+
+    real_migrate = migrations.migrate
+    calls = []
+
+    def locked_once(db):
+        calls.append(1)
+        if len(calls) == 1:
+            raise sqlite3.OperationalError("database is locked")
+        return real_migrate(db)
+
+    monkeypatch.setattr(migrations, "migrate", locked_once)
+    db = make_db(tmp_path)
+    # La primera consulta falla junto con la migración...
+    assert db.fetch("SELECT COUNT(*) AS n FROM customers") == []
+    assert not db._schema_ready
+    # ...y la siguiente, en el mismo hilo y con la misma conexión, migra y responde
+    assert db.fetch("SELECT COUNT(*) AS n FROM customers") == [{"n": 0}]
+    assert db._schema_ready
+    assert db.get_connection().execute("PRAGMA user_version").fetchone()[0] == migrations.SCHEMA_VERSION
+    db.close()
+
+
+def test_close_cierra_el_pool(tmp_path):
+    db = make_db(tmp_path)
+    conn = db.get_connection()
+    db.close()
+
+    assert db._connections == {}
+    # Tras cerrar, la siguiente consulta abre una conexión nueva
+    assert db.fetch("SELECT 1 AS uno") == [{"uno": 1}]
+    assert db.get_connection() is not conn
+    db.close()
+
+
+# -----------------------------
+# TRANSACCIONES
+# -----------------------------
+def count_customers(db):
+    return db.fetch("SELECT COUNT(*) AS n FROM customers")[0]["n"]
+
+
+def test_transaccion_confirma_todo_junto(tmp_path):
+    db = make_db(tmp_path)
+    with db.transaction():
+        db.execute("INSERT INTO customers (name) VALUES (?)", ("Ana",))
+        db.execute("INSERT INTO customers (name) VALUES (?)", ("Luis",))
+        assert db.in_transaction()
+
+    assert not db.in_transaction()
+    assert count_customers(db) == 2
+    db.close()
+
+
+def test_transaccion_se_deshace_con_excepcion(tmp_path):
+    db = make_db(tmp_path)
+    try:
+        with db.transaction():
+            db.execute("INSERT INTO customers (name) VALUES (?)", ("Ana",))
+            raise RuntimeError("fallo")
+    except RuntimeError:
+        pass
+
+    assert count_customers(db) == 0
+    db.close()
+
+
+def test_error_sql_dentro_de_transaccion_se_propaga(tmp_path):
+    db = make_db(tmp_path)
+    try:
+        with db.transaction():
+            db.execute("INSERT INTO customers (name) VALUES (?)", ("Ana",))
+            db.execute("INSERT INTO customers (name) VALUES (NULL)")
+    except Exception:
+        pass
+
+    assert count_customers(db) == 0
+    db.close()
+
+
+def test_savepoint_anidado(tmp_path):
+    db = make_db(tmp_path)
+    with db.transaction():
+        db.execute("INSERT INTO customers (name) VALUES (?)", ("Ana",))
+        try:
+            with db.transaction():
+                db.execute("INSERT INTO customers (name) VALUES (?)", ("Luis",))
+                raise RuntimeError("solo el bloque interior")
+        except RuntimeError:
+            pass
+        with db.transaction():
+            db.execute("INSERT INTO customers (name) VALUES (?)", ("Eva",))
+
+    names = [r["name"] for r in db.fetch("SELECT name FROM customers ORDER BY id")]
+    assert names == ["Ana", "Eva"]
+    db.close()
+
+
+def test_otra_conexion_no_ve_datos_sin_confirmar(tmp_path):
+    db = make_db(tmp_path)
+    seen = []
+    with db.transaction():
+        db.execute("INSERT INTO customers (name) VALUES (?)", ("Ana",))
+        t = threading.Thread(target=lambda: seen.append(count_customers(db)))
+        t.start()
+        t.join()
+
+    assert seen == [0]
+    assert count_customers(db) == 1
+    db.close()
+
+
+# -----------------------------
+# ESCRITURAS MASIVAS
+# -----------------------------
+def test_execute_many_retorna_ids_en_orden(tmp_path):
+    db = make_db(tmp_path)
+    db.execute("INSERT INTO customers (name) VALUES (?)", ("Previo",))
+
+    rows = ((f"Cliente {i}",) for i in range(1050))
+    ids = db.execute_many("INSERT INTO customers (name) VALUES (?)", rows, chunk_size=100)
+
+    assert ids == list(range(2, 1052))
+    assert db.fetch("SELECT name FROM customers WHERE id = ?", (ids[-1],)) == [{"name": "Cliente 1049"}]
+    db.close()
+
+
+def test_execute_many_es_atomico(tmp_path):
+    db = make_db(tmp_path)
+    rows = [("Ana",), (None,), ("Luis",)]
+
+    assert db.execute_many("INSERT INTO customers (name) VALUES (?)", rows, chunk_size=1) == []
+    assert count_customers(db) == 0
+    db.close()
+
+
+def test_execute_many_update_no_retorna_ids(tmp_path):
+    db = make_db(tmp_path)
+    ids = db.execute_many("INSERT INTO services (name, price_cents) VALUES (?, ?)",
+                          [("Lavado", 5000), ("Planchado", 4000)])
+
+    result = db.execute_many("UPDATE services SET price_cents = ? WHERE id = ?", [(5500, ids[0]), (4500, ids[1])])
+
+    assert result == []
+    assert [r["price_cents"] for r in db.fetch("SELECT price_cents FROM services ORDER BY id")] == [5500, 4500]
+    db.close()
+
+
+# -----------------------------
+# PERFILES DE PRAGMAS
+# -----------------------------
+def pragma(db, name):
+    return db.get_connection().execute(f"PRAGMA {name}").fetchone()[0]
+
+
+def test_perfil_durable_por_defecto(tmp_path):
+    db = make_db(tmp_path)
+
+    assert pragma(db, "journal_mode") == "wal"
+    assert pragma(db, "synchronous") == 2
+    assert pragma(db, "foreign_keys") == 1
+    assert db.verify_profile() == {}
+    db.close()
+
+
+def test_perfil_fast(tmp_path):
+    db = Database(str(tmp_path / "fast.db"), profile="fast")
+
+    assert pragma(db, "synchronous") == 1
+    assert pragma(db, "cache_size") == PRAGMA_PROFILES["fast"]["cache_size"]
+    assert db.verify_profile() == {}
+    db.close()
+
+
+def test_perfil_propio_y_verificacion(tmp_path):
+    db = Database(str(tmp_path / "custom.db"), profile={"journal_mode": "DELETE", "temp_store": "FILE"})
+    assert db.verify_profile() == {}
+
+    db.pragmas["temp_store"] = "MEMORY"
+    assert db.verify_profile() == {"temp_store": ("MEMORY", 1)}
+    db.close()
+
+
+def test_perfil_desconocido():
+    with pytest.raises(ValueError):
+        Database("no-se-usa.db", profile="turbo")
+
+
+# -----------------------------
+# CONSULTAS DE MODELOS
+# -----------------------------
+def test_ordenes_con_nombre_de_cliente(db):
+    import app.models.orders as orders_module
+    ana = db.execute("INSERT INTO customers (name) VALUES (?)", ("Ana",))
+    db.execute("PRAGMA foreign_keys = OFF")
+    for customer_id, status in ((ana, "Pendiente"), (ana, "Listo"), (999, "Pendiente")):
+        db.execute("INSERT INTO orders (customer_id, total_cents, date, status) VALUES (?, 1000, '2025-01-01', ?)",
+                   (customer_id, status))
+
+    rows = orders_module.Order.list_with_customers()
+    assert [(r["id"], r["customer_name"]) for r in rows] == [(3, "Desconocido"), (2, "Ana"), (1, "Ana")]
+
+    pending = orders_module.Order.list_with_customers(status="Pendiente", limit=1)
+    assert [r["id"] for r in pending] == [3]
+
+
+# -----------------------------
+# ÍNDICES Y PLANES DE CONSULTA
+# -----------------------------
+class PlanCheckingDatabase(Database):
+    """Database que falla si una consulta de modelo termina en un SCAN completo."""
+    def execute(self, query, params=()):
+        assert self.scans(query, params) == [], query
+        return super().execute(query, params)
+
+    def fetch(self, query, params=(), row_factory=dict):
+        assert self.scans(query, params) == [], query
+        return super().fetch(query, params, row_factory)
+
+
+def test_indices_creados(tmp_path):
+    db = make_db(tmp_path)
+    names = {r["name"] for r in db.fetch("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+    assert {"idx_orders_customer_id", "idx_orders_status_date", "idx_orders_date", "idx_payments_order_id"} <= names
+    db.close()
+
+
+def test_consultas_de_ordenes_usan_indices(tmp_path, monkeypatch):
+    import app.models.order_items as items_module
+    import app.models.orders as orders_module
+    db = PlanCheckingDatabase(str(tmp_path / "plan.db"))
+    # Order.delete también borra los ítems: su DELETE tiene que pasar por este plan
+    monkeypatch.setattr(orders_module, "db", db)
+    monkeypatch.setattr(items_module, "db", db)
+
+    orders_module.Order.get_by_customer(1)
+    orders_module.Order.get_by_status("pending")
+    orders_module.Order.list_with_customers(status="pending")
+    orders_module.Order.get_by_id(1)
+    orders_module.Order.delete(1)
+    db.close()
+
+
+def test_scans_detecta_recorrido_completo(tmp_path):
+    db = make_db(tmp_path)
+
+    assert db.scans("SELECT * FROM payments WHERE order_id = ?", (1,)) == []
+    assert db.scans("SELECT * FROM payments WHERE amount_cents > ?", (1,)) == ["SCAN payments"]
+    db.close()
+
+
+# -----------------------------
+# SENTENCIAS CON NOMBRE
+# -----------------------------
+def test_sentencias_con_nombre_cuentan_aciertos(tmp_path):
+    from app.database import register_statements
+    register_statements({"test.count_customers": "SELECT COUNT(*) AS n FROM customers"})
+    db = make_db(tmp_path)
+
+    for _ in range(5):
+        assert db.fetch_named("test.count_customers") == [{"n": 0}]
+
+    stats = db.statement_stats()
+    assert (stats["hits"], stats["misses"]) == (4, 1)
+    assert stats["hit_rate"] == 0.8
+    db.close()
+
+
+def test_cada_conexion_prepara_sus_sentencias(tmp_path):
+    from app.database import register_statements
+    register_statements({"test.count_customers": "SELECT COUNT(*) AS n FROM customers"})
+    db = make_db(tmp_path)
+    db.fetch_named("test.count_customers")
+
+    t = threading.Thread(target=lambda: db.fetch_named("test.count_customers"))
+    t.start()
+    t.join()
+
+    assert db.statement_stats()["misses"] == 2
+    db.close()
+
+
+def test_clave_registrada_no_cambia_de_sql():
+    from app.database import register_statements
+    register_statements({"test.fijo": "SELECT 1"})
+    register_statements({"test.fijo": "SELECT 1"})
+
+    with pytest.raises(ValueError):
+        register_statements({"test.fijo": "SELECT 2"})
+
+
+def test_cache_de_sentencias_alcanza_para_el_registro(tmp_path):
+    from app.database import STATEMENTS, register_statements
+    register_statements({f"test.sentencia_{i}": f"SELECT {i}" for i in range(300)})
+    db = make_db(tmp_path)
+
+    for i in range(300):
+        db.fetch_named(f"test.sentencia_{i}")
+    for i in range(300):
+        db.fetch_named(f"test.sentencia_{i}")
+
+    assert db.statement_stats()["hits"] == 300
+    for i in range(300):
+        del STATEMENTS[f"test.sentencia_{i}"]
+    db.close()
+
+
+def test_order_delete_borra_sus_pagos(db):
+    import app.models.orders as orders_module
+    db.execute("INSERT INTO customers (name) VALUES ('Ana')")
+    order_id = orders_module.Order.create(1, None, "2025-01-01")
+    db.execute("INSERT INTO payments (order_id, amount_cents) VALUES (?, 1000)", (order_id,))
+
+    orders_module.Order.delete(order_id)
+
+    assert db.fetch("SELECT COUNT(*) AS n FROM payments") == [{"n": 0}]
+    assert orders_module.Order.get_by_id(order_id) == []
+
+
+# -----------------------------
+# STREAMING Y PAGINACIÓN
+# -----------------------------
+def test_iter_fetch_entrega_todo_por_lotes(tmp_path):
+    db = make_db(tmp_path)
+    db.execute_many("INSERT INTO customers (name) VALUES (?)", ((f"C{i}",) for i in range(1234)))
+
+    rows = db.iter_fetch("SELECT id, name FROM customers ORDER BY id", batch_size=100)
+    first = next(rows)
+    # Mientras el generador está suspendido se pueden hacer otras consultas
+    assert count_customers(db) == 1234
+
+    rest = list(rows)
+    assert first == {"id": 1, "name": "C0"}
+    assert len(rest) == 1233 and rest[-1]["name"] == "C1233"
+    db.close()
+
+
+def test_paginacion_por_clave_en_modelos(db):
+    import app.models.customer as customer_module
+    customer_module.Customer.bulk_create({"name": f"C{i}"} for i in range(25))
+
+    seen, after = [], None
+    while True:
+        page = customer_module.Customer.page(after, limit=10)
+        if not page:
+            break
+        seen.extend(r["id"] for r in page)
+        after = page[-1]["id"]
+
+    assert seen == list(range(1, 26))
+
+
+# -----------------------------
+# TIPOS DE FILA
+# -----------------------------
+def test_fetch_con_row_factory(tmp_path):
+    from app.models.records import CustomerRecord
+    db = make_db(tmp_path)
+    db.execute("INSERT INTO customers (name, phone) VALUES ('Ana', '1')")
+    query = "SELECT id, name, phone, email, created_at, updated_at FROM customers"
+
+    assert db.fetch(query, row_factory=tuple) == [(1, "Ana", "1", None, None, None)]
+    record = db.fetch(query, row_factory=CustomerRecord.factory)[0]
+    assert (record.name, record["name"], record.get("falta", "x")) == ("Ana", "Ana", "x")
+    assert dict(record)["phone"] == "1"
+    assert not hasattr(record, "__dict__")
+    # El cursor reutilizado vuelve a entregar diccionarios por defecto
+    assert db.fetch(query)[0]["name"] == "Ana"
+    assert next(db.iter_fetch(query, row_factory=tuple)) == (1, "Ana", "1", None, None, None)
+    db.close()
+
+
+def test_after_transaction_espera_al_commit(tmp_path):
+    db = make_db(tmp_path)
+    calls = []
+
+    db.after_transaction(lambda: calls.append("inmediato"))
+    with db.transaction():
+        with db.transaction():
+            db.after_transaction(lambda: calls.append("al terminar"))
+        assert calls == ["inmediato"]
+
+    assert calls == ["inmediato", "al terminar"]
+    db.close()
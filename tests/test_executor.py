@@ -0,0 +1,95 @@
+import threading
+from concurrent.futures import wait
+
+import pytest
+
+import app.models.customer as customer_module
+from app.executor import QueryExecutor
+
+Customer = customer_module.Customer
+
+
+@pytest.fixture
+def executor():
+    executor = QueryExecutor()
+    yield executor
+    executor.shutdown()
+
+
+def wait_and_deliver(executor, future):
+    wait([future], timeout=5)
+    # El callback que encola el resultado corre justo después de completarse el Future
+    for _ in range(100):
+        if executor.deliver():
+            return
+        threading.Event().wait(0.01)
+
+
+def test_resultados_se_entregan_en_el_hilo_que_sondea(executor):
+    seen = []
+    future = executor.submit(lambda: threading.current_thread().name,
+                             on_done=lambda name: seen.append((name, threading.current_thread().name)))
+    wait_and_deliver(executor, future)
+    worker, caller = seen[0]
+    assert worker.startswith("db")
+    assert caller == threading.current_thread().name
+
+
+def test_errores_van_a_on_error(executor):
+    errors = []
+    future = executor.submit(lambda: 1 / 0, on_done=errors.append, on_error=errors.append)
+    wait_and_deliver(executor, future)
+    assert len(errors) == 1 and isinstance(errors[0], ZeroDivisionError)
+
+
+def test_trabajo_con_la_misma_clave_reemplaza_al_anterior(executor):
+    gate = threading.Event()
+    executor.submit(gate.wait)  # ocupa el hilo de base de datos
+    seen = []
+    first = executor.submit(lambda: "vieja", key="tabla", on_done=seen.append)
+    second = executor.submit(lambda: "nueva", key="tabla", on_done=seen.append)
+    assert first.cancelled()
+    assert executor.pending("tabla")
+    gate.set()
+    wait_and_deliver(executor, second)
+    assert seen == ["nueva"]
+    assert not executor.pending("tabla")
+
+
+def test_resultado_de_trabajo_cancelado_se_descarta(executor):
+    started, gate = threading.Event(), threading.Event()
+    seen = []
+
+    def slow():
+        started.set()
+        gate.wait()
+        return "tarde"
+
+    future = executor.submit(slow, key="tabla", on_done=seen.append)
+    started.wait(5)
+    executor.cancel("tabla")  # ya está corriendo: no se puede detener, pero no se entrega
+    gate.set()
+    future.result(timeout=5)
+    threading.Event().wait(0.05)
+    assert executor.deliver() == 0
+    assert seen == []
+
+
+def test_consultas_de_modelos_en_el_hilo_de_base_de_datos(executor, db):
+    created = executor.submit(Customer.create, "Ana", "555-1234")
+    assert created.result(timeout=5)
+    # Un solo hilo: lo enviado después de una escritura la ve
+    rows = executor.submit(Customer.page_by_name).result(timeout=5)
+    assert [r.name for r in rows] == ["Ana"]
+
+
+def test_shutdown_termina_escrituras_y_descarta_refrescos():
+    executor = QueryExecutor()
+    gate = threading.Event()
+    executor.submit(gate.wait)
+    write = executor.submit(lambda: "escrito")
+    refresh = executor.submit(lambda: "refresco", key="tabla")
+    threading.Timer(0.05, gate.set).start()
+    executor.shutdown(wait=True)
+    assert write.result() == "escrito"
+    assert refresh.cancelled()
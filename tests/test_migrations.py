@@ -0,0 +1,143 @@
+import sqlite3
+
+from app import migrations
+from app.database import Database
+
+# Esquemas que crearon versiones anteriores de database.py y setup_db.py
+LEGACY_DATABASE_PY = [
+    "CREATE TABLE customers (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, phone TEXT)",
+    "CREATE TABLE services (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, price REAL NOT NULL)",
+    """CREATE TABLE orders (id INTEGER PRIMARY KEY AUTOINCREMENT, customer_id INTEGER NOT NULL,
+       total REAL NOT NULL, date TEXT NOT NULL, status TEXT NOT NULL, paid REAL DEFAULT 0.0)""",
+    """CREATE TABLE payments (id INTEGER PRIMARY KEY AUTOINCREMENT, order_id INTEGER NOT NULL,
+       amount REAL NOT NULL, method TEXT NOT NULL, date TEXT NOT NULL)""",
+    "INSERT INTO customers (name, phone) VALUES ('Ana', '1')",
+    "INSERT INTO orders (customer_id, total, date, status, paid) VALUES (1, 100, '2025-01-01 10:00', 'Pendiente', 40)",
+    "INSERT INTO payments (order_id, amount, method, date) VALUES (1, 40, 'Tarjeta', '2025-01-01 10:05')",
+]
+
+LEGACY_SETUP_DB_PY = [
+    """CREATE TABLE customers (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, phone TEXT,
+       email TEXT, created_at TEXT, updated_at TEXT)""",
+    "CREATE TABLE services (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, price REAL NOT NULL)",
+    """CREATE TABLE orders (id INTEGER PRIMARY KEY AUTOINCREMENT, customer_id INTEGER, service_id INTEGER,
+       date TEXT, status TEXT default 'pending')""",
+    """CREATE TABLE payments (id INTEGER PRIMARY KEY AUTOINCREMENT, order_id INTEGER NOT NULL,
+       amount REAL NOT NULL, payment TEXT, created_at TEXT, updated_at TEXT)""",
+    "INSERT INTO customers (name) VALUES ('Ana')",
+    "INSERT INTO orders (customer_id, service_id, date) VALUES (1, NULL, '2025-01-01')",
+    "INSERT INTO payments (order_id, amount, payment, created_at) VALUES (1, 40, 'Efectivo', '2025-01-02T09:30:00.123')",
+]
+
+
+def legacy_db(path, statements):
+    conn = sqlite3.connect(path)
+    for statement in statements:
+        conn.execute(statement)
+    conn.commit()
+    conn.close()
+    return Database(str(path))
+
+
+def columns(db, table):
+    return {r["name"] for r in db.fetch(f"PRAGMA table_info({table})")}
+
+
+def version(db):
+    return db.fetch("PRAGMA user_version")[0]["user_version"]
+
+
+def test_base_nueva_queda_en_la_ultima_version(tmp_path):
+    db = Database(str(tmp_path / "nueva.db"))
+
+    assert version(db) == migrations.SCHEMA_VERSION
+    assert {"method", "date", "created_at", "updated_at"} <= columns(db, "payments")
+    assert {"service_id", "total_cents", "paid_cents"} <= columns(db, "orders")
+    assert not {"total", "paid"} & columns(db, "orders")
+    db.close()
+
+
+def test_migra_esquema_de_database_py(tmp_path):
+    db = legacy_db(tmp_path / "viejo.db", LEGACY_DATABASE_PY)
+
+    assert version(db) == migrations.SCHEMA_VERSION
+    assert {"email", "created_at", "updated_at"} <= columns(db, "customers")
+    assert "service_id" in columns(db, "orders")
+    assert db.fetch("SELECT total_cents, paid_cents FROM orders") == [{"total_cents": 10000, "paid_cents": 4000}]
+    db.close()
+
+
+def test_migra_esquema_de_setup_db_py_en_el_lugar(tmp_path):
+    db = legacy_db(tmp_path / "viejo.db", LEGACY_SETUP_DB_PY)
+
+    assert "payment" not in columns(db, "payments")
+    assert db.fetch("SELECT method, date FROM payments") == [{"method": "Efectivo", "date": "2025-01-02 09:30"}]
+    # El pagado se recalcula desde los pagos al crear los triggers de saldo
+    assert db.fetch("SELECT total_cents, paid_cents FROM orders") == [{"total_cents": 0, "paid_cents": 4000}]
+    db.close()
+
+
+def test_importes_pasan_a_centavos_enteros(tmp_path):
+    legacy = LEGACY_DATABASE_PY + [
+        "INSERT INTO services (name, price) VALUES ('Lavado', 19.99)",
+        "INSERT INTO payments (order_id, amount, method, date) VALUES (1, 0.1, 'Efectivo', '2025-01-01 10:06')",
+    ]
+    db = legacy_db(tmp_path / "viejo.db", legacy)
+
+    assert db.fetch("SELECT price_cents, typeof(price_cents) AS t FROM services") == [
+        {"price_cents": 1999, "t": "integer"}]
+    assert [r["amount_cents"] for r in db.fetch("SELECT amount_cents FROM payments ORDER BY id")] == [4000, 10]
+    assert "amount" not in columns(db, "payments")
+    assert "price" not in columns(db, "services")
+    db.close()
+
+
+def test_migraciones_idempotentes(tmp_path, capsys):
+    db = Database(str(tmp_path / "nueva.db"))
+    capsys.readouterr()
+
+    # Una segunda instancia sobre la misma base no vuelve a ejecutar pasos
+    again = Database(str(tmp_path / "nueva.db"))
+    assert "Migración" not in capsys.readouterr().out
+    assert again.migrate() == migrations.SCHEMA_VERSION
+
+    # Reaplicar los pasos a mano tampoco falla (todos son idempotentes)
+    with again.transaction() as conn:
+        for _, _, step in migrations.MIGRATIONS:
+            step(conn)
+    db.close()
+    again.close()
+
+
+def test_paso_fallido_no_avanza_la_version(tmp_path, monkeypatch):
+    def broken(conn):
+        conn.execute("CREATE TABLE extra (id INTEGER)")
+        raise sqlite3.OperationalError("fallo a mitad del paso")
+
+    db = Database(str(tmp_path / "nueva.db"))
+    monkeypatch.setattr(migrations, "MIGRATIONS", migrations.MIGRATIONS + [(99, "roto", broken)])
+    monkeypatch.setattr(migrations, "SCHEMA_VERSION", 99)
+
+    try:
+        db.migrate()
+    except sqlite3.OperationalError:
+        pass
+
+    # db reintentaría la migración rota en cada consulta: se lee el archivo directo
+    raw = sqlite3.connect(db.db_path)
+    assert raw.execute("PRAGMA user_version").fetchone()[0] == migrations.MIGRATIONS[-2][0]
+    assert raw.execute("SELECT name FROM sqlite_master WHERE name = 'extra'").fetchall() == []
+    raw.close()
+    db.close()
+
+
+def test_modelo_payment_funciona_tras_migrar(tmp_path, monkeypatch):
+    import app.models.payment as payment_module
+    db = legacy_db(tmp_path / "viejo.db", LEGACY_SETUP_DB_PY)
+    monkeypatch.setattr(payment_module, "db", db)
+
+    payment_id = payment_module.Payment.create(1, 1050, "Tarjeta")
+    pay = payment_module.Payment.get_by_id(payment_id)
+
+    assert (pay.order_id, pay.amount_cents, pay.payment) == (1, 1050, "Tarjeta")
+    db.close()
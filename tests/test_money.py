@@ -0,0 +1,37 @@
+import pytest
+
+from app.money import as_cents, format_cents, line_total, to_cents
+
+
+def test_to_cents_sin_error_de_flotante():
+    assert to_cents("12.50") == 1250
+    assert to_cents("12,5") == 1250
+    assert to_cents("$ 3") == 300
+    assert to_cents(0.1) == 10
+    assert to_cents(19.99) == 1999
+    assert to_cents("0.005") == 1
+
+
+def test_to_cents_rechaza_texto_invalido():
+    for value in ("", "abc", "nan", "inf"):
+        with pytest.raises(ValueError):
+            to_cents(value)
+
+
+def test_as_cents_rechaza_flotantes():
+    assert as_cents(1050) == 1050
+    for value in (10.5, "1050", True):
+        with pytest.raises(TypeError):
+            as_cents(value)
+
+
+def test_line_total_redondea_una_vez():
+    assert line_total(333, 1.5) == 500
+    assert line_total(1000, 3) == 3000
+
+
+def test_format_cents():
+    assert format_cents(123456) == "$1234.56"
+    assert format_cents(5) == "$0.05"
+    assert format_cents(-50) == "-$0.50"
+    assert format_cents(1999, symbol="") == "19.99"
@@ -0,0 +1,93 @@
+import pytest
+
+import app.models.orders as orders_module
+
+Order = orders_module.Order
+
+
+@pytest.fixture
+def db(db):
+    db.execute("INSERT INTO customers (name) VALUES ('Ana')")
+    db.execute("INSERT INTO services (name, price_cents) VALUES ('Lavado', 1000)")
+    db.execute("INSERT INTO services (name, price_cents) VALUES ('Planchado', 250)")
+    return db
+
+
+def cart(*lines):
+    """Ítems con el formato del carrito de la GUI."""
+    return [
+        {"service_id": s_id, "name": name, "price_cents": price_cents, "qty": qty}
+        for s_id, name, price_cents, qty in lines
+    ]
+
+
+def test_orden_con_items_y_total_en_sql(db):
+    order_id = Order.create_with_items(
+        1, cart((1, "Lavado", 1000, 2), (2, "Planchado", 250, 4)), "2025-01-01 10:00")
+
+    order = Order.get_by_id(order_id)[0]
+    assert order.total_cents == 3000
+    assert order.paid_cents == 0
+    assert [(i.description, i.quantity) for i in Order.items(order_id)] == [
+        ("Lavado", 2), ("Planchado", 4)]
+
+
+def test_orden_con_items_es_atomica(db):
+    items = cart((1, "Lavado", 1000, 1))
+    items.append({"service_id": 2, "price_cents": 250, "qty": 1})  # falta 'name'
+
+    assert Order.create_with_items(1, items, "2025-01-01 10:00") is None
+    assert db.fetch("SELECT COUNT(*) AS n FROM orders") == [{"n": 0}]
+    assert db.fetch("SELECT COUNT(*) AS n FROM order_items") == [{"n": 0}]
+
+
+def test_carrito_vacio_no_crea_orden(db):
+    assert Order.create_with_items(1, [], "2025-01-01 10:00") is None
+    assert db.fetch("SELECT COUNT(*) AS n FROM orders") == [{"n": 0}]
+
+
+def test_recalcular_totales(db):
+    order_id = Order.create_with_items(1, cart((1, "Lavado", 1000, 1)), "2025-01-01 10:00")
+    legacy_id = Order.create(1, 2, "2025-01-01 11:00")
+    db.execute("UPDATE orders SET total_cents = 0")
+
+    Order.recompute_totals()
+
+    assert Order.get_by_id(order_id)[0].total_cents == 1000
+    # Las órdenes sin ítems no se tocan
+    assert Order.get_by_id(legacy_id)[0].total_cents == 0
+
+
+def test_facturacion_por_servicio(db):
+    Order.create_with_items(1, cart((1, "Lavado", 1000, 2), (2, "Planchado", 250, 1)), "2025-01-01")
+    Order.create_with_items(1, cart((1, "Lavado", 1000, 1)), "2025-01-02")
+
+    report = Order.revenue_by_service()
+
+    assert [(r.description, r.quantity, r.revenue_cents, r.orders) for r in report] == [
+        ("Lavado", 3, 3000, 2), ("Planchado", 1, 250, 1)]
+
+
+def test_importe_de_linea_redondeado_al_centavo(db):
+    # 1.5 kg a $3.33: 499.5 centavos se redondea una sola vez, en la línea
+    order_id = Order.create_with_items(1, cart((1, "Lavado por kilo", 333, 1.5)), "2025-01-01")
+
+    assert Order.items(order_id)[0].line_total_cents == 500
+    assert Order.get_by_id(order_id)[0].total_cents == 500
+
+
+def test_borrar_orden_borra_sus_items(db):
+    order_id = Order.create_with_items(1, cart((1, "Lavado", 1000, 1)), "2025-01-01")
+
+    Order.delete(order_id)
+
+    assert db.fetch("SELECT COUNT(*) AS n FROM order_items") == [{"n": 0}]
+
+
+def test_borrar_servicio_conserva_el_detalle(db):
+    order_id = Order.create_with_items(1, cart((2, "Planchado", 250, 2)), "2025-01-01")
+
+    db.execute("DELETE FROM services WHERE id = 2")
+
+    item = Order.items(order_id)[0]
+    assert (item.service_id, item.description, item.unit_price_cents) == (None, "Planchado", 250)
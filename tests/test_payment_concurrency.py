@@ -0,0 +1,140 @@
+import threading
+
+import pytest
+
+from app.migrations import PAID_STATUS
+from app.models.orders import Order
+from app.models.payment import Payment
+
+
+@pytest.fixture
+def db(db):
+    db.execute("INSERT INTO customers (name) VALUES ('Ana')")
+    return db
+
+
+def create_order(db, total_cents):
+    return db.execute(
+        "INSERT INTO orders (customer_id, total_cents, date, status) VALUES (1, ?, '2025-01-01 10:00', 'Pendiente')",
+        (total_cents,),
+    )
+
+
+def order(db, order_id):
+    return db.fetch("SELECT paid_cents, status FROM orders WHERE id = ?", (order_id,))[0]
+
+
+def test_post_actualiza_saldo_y_estado(db):
+    order_id = create_order(db, 10000)
+
+    Payment.post(order_id, 6000, "Tarjeta")
+    assert order(db, order_id) == {"paid_cents": 6000, "status": "Pendiente"}
+
+    Payment.post(order_id, 4000)
+    assert order(db, order_id) == {"paid_cents": 10000, "status": PAID_STATUS}
+
+
+def test_centavos_cubren_el_total_exacto(db):
+    # Con REAL, 0.1 + 0.2 < 0.3 dejaba la orden pendiente por un error de redondeo
+    order_id = create_order(db, 30)
+
+    Payment.post(order_id, 10)
+    Payment.post(order_id, 20)
+
+    assert order(db, order_id) == {"paid_cents": 30, "status": PAID_STATUS}
+
+
+def test_post_rechaza_montos_no_enteros(db):
+    order_id = create_order(db, 10000)
+
+    with pytest.raises(TypeError):
+        Payment.post(order_id, 10.5)
+
+    assert db.fetch("SELECT COUNT(*) AS n FROM payments") == [{"n": 0}]
+
+
+def test_post_a_orden_inexistente_no_registra_nada(db):
+    with pytest.raises(Exception):
+        Payment.post(999, 10)
+
+    assert db.fetch("SELECT COUNT(*) AS n FROM payments") == [{"n": 0}]
+
+
+def test_pagos_concurrentes_no_se_pierden(db):
+    threads_count, payments_per_thread = 16, 25
+    order_id = create_order(db, threads_count * payments_per_thread)
+    errors = []
+    start = threading.Barrier(threads_count)
+
+    def worker():
+        start.wait()
+        try:
+            for _ in range(payments_per_thread):
+                Payment.post(order_id, 1)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(threads_count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    total_paid = threads_count * payments_per_thread
+    assert order(db, order_id) == {"paid_cents": total_paid, "status": PAID_STATUS}
+    assert db.fetch("SELECT COUNT(*) AS n, SUM(amount_cents) AS s FROM payments") == [{"n": total_paid, "s": total_paid}]
+
+
+# -----------------------------
+# TRIGGERS DE SALDO
+# -----------------------------
+def test_editar_pago_ajusta_saldo_y_reabre_la_orden(db):
+    order_id = create_order(db, 10000)
+    payment_id = Payment.post(order_id, 10000)
+    assert order(db, order_id) == {"paid_cents": 10000, "status": PAID_STATUS}
+
+    pay = Payment.get_by_id(payment_id)
+    pay.amount_cents = 7000
+    pay.update()
+    assert order(db, order_id) == {"paid_cents": 7000, "status": "Pendiente"}
+
+    Payment.post(order_id, 3000)
+    assert order(db, order_id) == {"paid_cents": 10000, "status": PAID_STATUS}
+
+
+def test_mover_pago_de_orden(db):
+    first, second = create_order(db, 5000), create_order(db, 5000)
+    pay = Payment.get_by_id(Payment.post(first, 5000))
+
+    pay.order_id = second
+    pay.update()
+
+    assert order(db, first) == {"paid_cents": 0, "status": "Pendiente"}
+    assert order(db, second) == {"paid_cents": 5000, "status": PAID_STATUS}
+
+
+def test_borrar_pago_descuenta_el_saldo(db):
+    order_id = create_order(db, 10000)
+    Payment.post(order_id, 4000)
+    pay = Payment.get_by_id(Payment.post(order_id, 6000))
+
+    pay.delete()
+
+    assert order(db, order_id) == {"paid_cents": 4000, "status": "Pendiente"}
+
+
+def test_verify_balances_encuentra_y_corrige(db):
+    order_id = create_order(db, 10000)
+    Payment.post(order_id, 10000)
+    assert Order.verify_balances() == []
+
+    db.execute("UPDATE orders SET paid_cents = 0, status = 'Pendiente' WHERE id = ?", (order_id,))
+    assert Order.balance(order_id) == 10000
+
+    mismatches = Order.verify_balances()
+
+    assert [tuple(m) for m in mismatches] == [(order_id, 0, 10000)]
+    assert order(db, order_id) == {"paid_cents": 10000, "status": PAID_STATUS}
+    assert Order.balance(order_id) == 0
+    assert Order.verify_balances() == []
@@ -1,14 +1,15 @@
 from app.models.payment import Payment
+from app.money import format_cents
 from datetime import datetime
 
 print("--- PRUEBA DE PAGO ---")
 
 # 1. Crear un pago de prueba
-# Usamos order_id=1, monto=50.50, tipo='Efectivo'
+# Usamos order_id=1, monto=$50.50 (en centavos), tipo='Efectivo'
 print("Creando pago...")
 payment_id = Payment.create(
     order_id=1, 
-    amount=50.50, 
+    amount_cents=5050, 
     payment="Efectivo"
 )
 print(f"Pago creado ID: {payment_id}")
@@ -23,7 +24,7 @@ if pay:
     print("Pago obtenido:")
     print(f"  ID: {pay.id}")
     print(f"  Order ID: {pay.order_id}")
-    print(f"  Monto: {pay.amount}")
+    print(f"  Monto: {format_cents(pay.amount_cents)}")
     print(f"  Tipo: {pay.payment}")
     print(f"  Creado en: {pay.created_at}")
 else:
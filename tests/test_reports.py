@@ -0,0 +1,157 @@
+import io
+
+import pytest
+
+from app import reports
+from app.database import STATEMENTS
+
+
+@pytest.fixture
+def db(db):
+    db.execute("INSERT INTO customers (name) VALUES ('Ana')")
+    db.execute("INSERT INTO customers (name) VALUES ('Beto')")
+    return db
+
+
+def order(db, customer_id, total_cents, date, status="Pendiente"):
+    return db.execute(
+        "INSERT INTO orders (customer_id, total_cents, date, status) VALUES (?, ?, ?, ?)",
+        (customer_id, total_cents, date, status))
+
+
+def pay(db, order_id, amount_cents, date, method="Efectivo"):
+    db.execute("INSERT INTO payments (order_id, amount_cents, method, date) VALUES (?, ?, ?, ?)",
+               (order_id, amount_cents, method, date))
+
+
+def test_ingresos_por_dia_y_metodo(db):
+    first = order(db, 1, 10000, "2025-01-01 09:00")
+    pay(db, first, 3000, "2025-01-01 10:00")
+    pay(db, first, 2000, "2025-01-01 18:00")
+    pay(db, first, 1500, "2025-01-01 19:00", "Tarjeta")
+    pay(db, first, 500, "2025-01-03 08:00", "Tarjeta")
+
+    rows = list(reports.revenue_by_day("2025-01-01", "2025-01-02"))
+
+    assert [tuple(r) for r in rows] == [
+        ("2025-01-01", "Efectivo", 2, 5000, 6500),
+        ("2025-01-01", "Tarjeta", 1, 1500, 6500),
+    ]
+    assert len(list(reports.revenue_by_day())) == 3
+
+
+def test_antiguedad_de_cuentas_por_cobrar(db):
+    order(db, 1, 10000, "2025-06-20 10:00")                      # 10 días
+    partial = order(db, 1, 5000, "2025-05-15 10:00")             # 46 días
+    pay(db, partial, 2000, "2025-05-20 10:00")
+    order(db, 2, 7000, "2025-01-01 10:00")                       # 180 días
+    order(db, 2, 9000, "2025-01-01 10:00", "Cancelado")
+    paid = order(db, 2, 1000, "2025-01-01 10:00")
+    pay(db, paid, 1000, "2025-01-02 10:00")
+
+    buckets = reports.ar_aging("2025-06-30")
+
+    assert [tuple(b) for b in buckets] == [
+        ("0-30", 1, 10000), ("31-60", 1, 3000), ("61-90", 0, 0), ("90+", 1, 7000)]
+
+    by_customer = list(reports.ar_aging_by_customer("2025-06-30"))
+    assert [tuple(r) for r in by_customer] == [
+        (1, "Ana", 10000, 3000, 0, 0, 13000),
+        (2, "Beto", 0, 0, 0, 7000, 7000),
+    ]
+
+
+def test_mejores_clientes_con_ranking(db):
+    ana, beto = order(db, 1, 10000, "2025-01-01"), order(db, 2, 10000, "2025-01-01")
+    pay(db, ana, 6000, "2025-01-02 10:00")
+    pay(db, ana, 2000, "2025-01-03 10:00")
+    pay(db, beto, 2000, "2025-01-02 10:00")
+
+    rows = list(reports.top_customers(limit=5))
+
+    assert [(r.rank, r.customer_name, r.orders, r.spend_cents) for r in rows] == [
+        (1, "Ana", 1, 8000), (2, "Beto", 1, 2000)]
+    assert rows[0].share == pytest.approx(0.8)
+    assert [r.customer_name for r in reports.top_customers(limit=1)] == ["Ana"]
+    assert list(reports.top_customers(date_from="2025-01-03"))[0].spend_cents == 2000
+
+
+def test_reportes_usan_indices(db):
+    # La ventana recorre su resultado intermedio, pero payments se lee solo del índice
+    revenue = " ".join(db.query_plan(STATEMENTS["report.revenue_by_day"], ("2025-01-01", "2025-02-01")))
+    assert "COVERING INDEX idx_payments_date_method" in revenue
+    assert "SCAN payments" not in revenue
+    plan = " ".join(db.query_plan(STATEMENTS["report.ar_aging_by_customer"], ("2025-06-30",)))
+    assert "idx_orders_open_balance" in plan
+
+
+def test_linea_de_comandos_en_csv(db):
+    first = order(db, 1, 10000, "2025-01-01 09:00")
+    pay(db, first, 1250, "2025-01-01 10:00")
+    out = io.StringIO()
+
+    reports.main(["revenue"], out=out)
+
+    assert out.getvalue().splitlines() == [
+        "day,method,payments,revenue,day_total",
+        "2025-01-01,Efectivo,1,12.50,12.50",
+    ]
+
+
+# -----------------------------
+# TABLAS DE RESUMEN
+# -----------------------------
+def rollup_matches_source(db):
+    """Las tablas de resumen coinciden con lo que daría recalcularlas."""
+    revenue = db.fetch("SELECT day, method, payments, revenue_cents FROM daily_revenue ORDER BY day, method", row_factory=tuple)
+    expected = db.fetch("""
+        SELECT substr(date, 1, 10), method, COUNT(*), SUM(amount_cents) FROM payments
+        GROUP BY 1, 2 ORDER BY 1, 2""", row_factory=tuple)
+    statuses = db.fetch("SELECT status, orders FROM status_counts ORDER BY status", row_factory=tuple)
+    expected_statuses = db.fetch(
+        "SELECT status, COUNT(*) FROM orders GROUP BY status ORDER BY status", row_factory=tuple)
+    return revenue == expected and statuses == expected_statuses
+
+
+def test_resumenes_se_mantienen_con_triggers(db):
+    first = order(db, 1, 5000, "2025-01-01 09:00")
+    second = order(db, 2, 8000, "2025-01-01 09:30")
+    pay(db, first, 5000, "2025-01-01 10:00")
+    pay(db, second, 3000, "2025-01-01 11:00", "Tarjeta")
+    assert rollup_matches_source(db)
+    assert [tuple(r) for r in reports.status_counts()] == [("Pagado y Terminado", 1), ("Pendiente", 1)]
+
+    # Editar un pago (fecha y monto), borrar otro y cambiar estados
+    db.execute("UPDATE payments SET amount_cents = 8000, date = '2025-01-02 08:00' WHERE order_id = ?", (second,))
+    db.execute("DELETE FROM payments WHERE order_id = ?", (first,))
+    db.execute("UPDATE orders SET status = 'Entregado' WHERE id = ?", (second,))
+    assert rollup_matches_source(db)
+
+    db.execute("DELETE FROM orders WHERE id = ?", (first,))
+    assert rollup_matches_source(db)
+    assert [tuple(r) for r in reports.status_counts()] == [("Entregado", 1)]
+
+
+def test_tablero_lee_pocas_filas(db):
+    first = order(db, 1, 10000, "2025-01-01 09:00")
+    pay(db, first, 1000, "2025-01-01 10:00")
+    pay(db, first, 2000, "2025-01-01 11:00")
+    pay(db, first, 3000, "2025-01-02 10:00", "Tarjeta")
+
+    assert [tuple(r) for r in reports.revenue_for_day("2025-01-01")] == [("2025-01-01", "Efectivo", 2, 3000)]
+    assert reports.revenue_total("2025-01-01", "2025-01-02") == (3, 6000)
+    assert db.scans(STATEMENTS["dashboard.revenue"], ("2025-01-01", "2025-01-02")) == []
+
+
+def test_rebuild_corrige_resumenes(db):
+    first = order(db, 1, 10000, "2025-01-01 09:00")
+    pay(db, first, 1000, "2025-01-01 10:00")
+    db.execute("DELETE FROM daily_revenue")
+    db.execute("UPDATE status_counts SET orders = 99")
+    assert not rollup_matches_source(db)
+
+    out = io.StringIO()
+    reports.main(["rebuild"], out=out)
+
+    assert rollup_matches_source(db)
+    assert "reconstruidas" in out.getvalue()
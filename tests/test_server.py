@@ -0,0 +1,139 @@
+import http.client
+import json
+import threading
+
+import pytest
+
+from app.server import serve
+
+
+@pytest.fixture(scope="module")
+def server():
+    # Usa la base temporal de LAVANDERIA_DB (ver conftest.py)
+    server = serve(port=0, readers=2)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(server):
+    conn = http.client.HTTPConnection(*server.server_address, timeout=5)
+
+    def request(method, path, body=None, headers=None):
+        data = json.dumps(body) if body is not None else None
+        conn.request(method, path, body=data, headers=headers or {})
+        response = conn.getresponse()
+        raw = response.read()
+        return response.status, (json.loads(raw) if raw else None), response
+
+    yield request
+    conn.close()
+
+
+def test_alta_y_consulta_de_cliente(client):
+    status, body, _ = client("POST", "/customers", {"name": "Servidor Ana", "phone": "555-0101"})
+    assert status == 201
+    customer_id = body["id"]
+
+    status, body, _ = client("GET", f"/customers/{customer_id}")
+    assert status == 200 and body["name"] == "Servidor Ana"
+
+    status, _, _ = client("PUT", f"/customers/{customer_id}", {"phone": "555-0202"})
+    assert status == 200
+    assert client("GET", f"/customers/{customer_id}")[1]["phone"] == "555-0202"
+
+    status, body, _ = client("GET", "/customers?q=servidor")
+    assert status == 200 and [c["id"] for c in body] == [customer_id]
+
+
+def test_errores(client):
+    assert client("GET", "/customers/999999")[0] == 404
+    assert client("GET", "/nada")[0] == 404
+    assert client("DELETE", "/customers")[0] == 405
+    assert client("POST", "/customers", {})[0] == 400
+    # Los importes van en centavos enteros: un float se rechaza
+    assert client("POST", "/services", {"name": "Planchado", "price_cents": 12.5})[0] == 400
+
+
+def test_escritura_fallida_no_responde_200(client):
+    customer_id = client("POST", "/customers", {"name": "Servidor Dora"})[1]["id"]
+    service_id = client("POST", "/services", {"name": "Servidor Tintorería", "price_cents": 900})[1]["id"]
+    client("POST", "/orders", {"customer_id": customer_id, "date": "2025-03-02 10:00",
+                               "items": [{"service_id": service_id}]})
+
+    # Sin /batch: la restricción se reporta como conflicto y no cambia nada
+    assert client("PUT", f"/customers/{customer_id}", {"name": None})[0] == 409
+    assert client("DELETE", f"/customers/{customer_id}")[0] == 409
+    assert client("GET", f"/customers/{customer_id}")[1]["name"] == "Servidor Dora"
+
+
+def test_orden_con_items_y_pago(client):
+    customer_id = client("POST", "/customers", {"name": "Servidor Beto"})[1]["id"]
+    service_id = client("POST", "/services", {"name": "Servidor Lavado", "price_cents": 1500})[1]["id"]
+
+    status, body, _ = client("POST", "/orders", {
+        "customer_id": customer_id, "date": "2025-03-01 10:00",
+        "items": [{"service_id": service_id, "qty": 2}],
+    })
+    assert status == 201
+    order_id = body["id"]
+
+    assert client("POST", "/payments", {"order_id": order_id, "amount_cents": 3000})[0] == 201
+    order = client("GET", f"/orders/{order_id}")[1]
+    assert order["total_cents"] == 3000 and order["balance_cents"] == 0
+    assert [i["line_total_cents"] for i in order["items"]] == [3000]
+
+    listed = client("GET", "/orders?limit=1")[1]
+    assert listed[0]["id"] == order_id and listed[0]["customer_name"] == "Servidor Beto"
+    assert client("GET", "/reports/dashboard")[0] == 200
+
+
+def test_catalogo_con_etag(client):
+    client("POST", "/services", {"name": "Servidor Secado", "price_cents": 800})
+    status, services, response = client("GET", "/services")
+    etag = response.getheader("ETag")
+    assert status == 200 and etag
+
+    status, body, _ = client("GET", "/services", headers={"If-None-Match": etag})
+    assert status == 304 and body is None
+
+    # Cualquier cambio del catálogo cambia el ETag
+    client("PUT", f"/services/{services[0]['id']}", {"price_cents": services[0]["price_cents"] + 1})
+    assert client("GET", "/services", headers={"If-None-Match": etag})[0] == 200
+
+
+def test_batch_es_atomico(client):
+    customer_id = client("POST", "/customers", {"name": "Servidor Carla"})[1]["id"]
+
+    status, body, _ = client("POST", "/batch", {"requests": [
+        {"method": "PUT", "path": f"/customers/{customer_id}", "body": {"phone": "111"}},
+        {"method": "GET", "path": f"/customers/{customer_id}"},
+    ]})
+    assert status == 200
+    assert [r["status"] for r in body["responses"]] == [200, 200]
+    assert body["responses"][1]["body"]["phone"] == "111"
+
+    status, body, _ = client("POST", "/batch", {"requests": [
+        {"method": "PUT", "path": f"/customers/{customer_id}", "body": {"phone": "222"}},
+        {"method": "POST", "path": "/payments", "body": {"order_id": 999999, "amount_cents": 100}},
+    ]})
+    assert status == 404 and body["index"] == 1
+    assert client("GET", f"/customers/{customer_id}")[1]["phone"] == "111"
+
+
+def test_servidor_con_commit_agrupado():
+    server = serve(port=0, readers=1, group_commit=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        conns = [http.client.HTTPConnection(*server.server_address, timeout=5) for _ in range(4)]
+        for i, conn in enumerate(conns):
+            conn.request("POST", "/customers", body=json.dumps({"name": f"Grupo {i}"}))
+        statuses = [conn.getresponse().status for conn in conns]
+        assert statuses == [201] * 4
+        assert server.writer.stats()["operations"] >= 4
+    finally:
+        server.shutdown()
+        server.server_close()
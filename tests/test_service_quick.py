@@ -1,9 +1,9 @@
 from app.models.service import Service
 
-# Crear servicios de ejemplo
-Service.create("Lavado", 50)
-Service.create("Planchado", 40)
-Service.create("Lavado y planchado", 80)
+# Crear servicios de ejemplo (precios en centavos)
+Service.create("Lavado", 5000)
+Service.create("Planchado", 4000)
+Service.create("Lavado y planchado", 8000)
 
 # Mostrar todos
 print(Service.get_all())
@@ -0,0 +1,86 @@
+import pytest
+
+import app.models.customer as customer_module
+from app.virtual_table import KeysetPager, plan_refresh, refresh_window
+
+Customer = customer_module.Customer
+
+
+@pytest.fixture
+def db(db):
+    Customer.bulk_create([{"name": f"Cliente {i:03d}"} for i in range(250)])
+    return db
+
+
+def customer_pager(page_size=100):
+    return KeysetPager(Customer.page_by_name, lambda c: (c.name, c.id), page_size)
+
+
+def test_paginas_siguientes_sin_repetir(db):
+    pager = customer_pager()
+    seen = []
+    while not pager.exhausted:
+        seen += [c.name for c in pager.next_page()]
+    assert seen == [f"Cliente {i:03d}" for i in range(250)]
+    assert pager.loaded == 250
+    assert pager.next_page() == []
+
+
+def test_reload_relee_solo_lo_cargado(db):
+    pager = customer_pager()
+    pager.next_page()
+    Customer.create("Cliente 000a", None)
+    rows = pager.reload()
+    assert len(rows) == 100
+    assert rows[1].name == "Cliente 000a"
+    assert not pager.exhausted
+    # La página siguiente continúa desde la última fila releída
+    assert pager.next_page()[0].name == "Cliente 099"
+
+
+def test_reload_desde_el_medio_descarta_lo_de_abajo(db):
+    pager = customer_pager()
+    rows = pager.next_page() + pager.next_page() + pager.next_page()
+    Customer.create("Cliente 150a", None)
+
+    reloaded = pager.reload(after=pager.row_key(rows[149]), offset=150, limit=50)
+    assert [c.name for c in reloaded[:2]] == ["Cliente 150", "Cliente 150a"]
+    assert pager.loaded == 200 and not pager.exhausted
+    assert pager.next_page()[0].name == "Cliente 199"
+
+
+def test_refresh_window_acotada_a_lo_visible():
+    assert refresh_window(0.0, 1.0, 0, 100) == (0, 100)
+    assert refresh_window(0.0, 0.1, 200, 100) == (0, 120)
+    # Con 5000 filas cargadas y la vista por la mitad, se releen ~200 y no 5000
+    assert refresh_window(0.5, 0.504, 5000, 100) == (2400, 220)
+
+
+def test_plan_refresh_sin_cambios_no_hace_nada():
+    rows = [("1", ("a",)), ("2", ("b",))]
+    assert plan_refresh(rows, list(rows)) == []
+
+
+def test_plan_refresh_altas_bajas_cambios_y_movimientos():
+    current = [("1", ("a",)), ("2", ("b",)), ("3", ("c",))]
+    rows = [("3", ("c",)), ("1", ("A",)), ("4", ("d",))]
+    ops = plan_refresh(current, rows)
+    assert ("delete", "2") in ops
+    assert ("insert", 2, "4", ("d",)) in ops
+    assert ("update", "1", ("A",)) in ops
+    assert ("move", 0, "3") in ops
+
+    # Aplicar las operaciones a una lista deja el orden nuevo
+    order, values = [iid for iid, _ in current], dict(current)
+    for op in ops:
+        if op[0] == "delete":
+            order.remove(op[1])
+        elif op[0] == "insert":
+            order.insert(op[1], op[2])
+            values[op[2]] = op[3]
+        elif op[0] == "update":
+            values[op[1]] = op[2]
+        else:
+            order.remove(op[2])
+            order.insert(op[1], op[2])
+    assert [(iid, values[iid]) for iid in order] == rows
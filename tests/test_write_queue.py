@@ -0,0 +1,75 @@
+import gc
+import threading
+import weakref
+
+import pytest
+
+from app.write_queue import WriteQueue
+
+
+@pytest.fixture
+def db(db):
+    db.execute("INSERT INTO customers (name) VALUES ('Ana')")
+    db.execute("INSERT INTO services (name, price_cents) VALUES ('Lavado', 1500)")
+    return db
+
+
+def make_order(db, total_cents=10000):
+    return db.execute("INSERT INTO orders (customer_id, total_cents, date, status) "
+                      "VALUES (1, ?, '2025-01-01 10:00', 'Pendiente')", (total_cents,))
+
+
+def test_futures_dan_los_ids_en_orden(db):
+    order_id = make_order(db, 1000000)
+    with WriteQueue(db, max_batch=50, max_delay_ms=20) as queue:
+        futures = [queue.payment(order_id, 100) for _ in range(200)]
+        ids = [f.result(timeout=5) for f in futures]
+        stats = queue.stats()
+
+    assert ids == sorted(ids) and len(set(ids)) == 200
+    assert db.fetch("SELECT paid_cents FROM orders WHERE id = ?", (order_id,))[0]["paid_cents"] == 20000
+    # Se agruparon: muchas menos transacciones que operaciones
+    assert stats["operations"] == 200 and stats["batches"] <= 10
+
+
+def test_orden_con_items_encolada(db):
+    with WriteQueue(db) as queue:
+        items = [{"service_id": 1, "name": "Lavado", "price_cents": 1500, "qty": 2}]
+        order_id = queue.order(1, items, "2025-01-02 09:00").result(timeout=5)
+    assert db.fetch("SELECT total_cents FROM orders WHERE id = ?", (order_id,))[0]["total_cents"] == 3000
+
+
+def test_una_falla_no_arrastra_al_grupo(db):
+    order_id = make_order(db)
+    gate = threading.Event()
+    with WriteQueue(db, max_batch=10, max_delay_ms=50) as queue:
+        queue.submit(gate.wait, 5)  # retiene al escritor para que las tres caigan en el mismo grupo
+        good = queue.payment(order_id, 100)
+        bad = queue.payment(999999, 100)  # la orden no existe: el FK lo rechaza
+        also_good = queue.payment(order_id, 200)
+        gate.set()
+        assert good.result(timeout=5) and also_good.result(timeout=5)
+        with pytest.raises(Exception):
+            bad.result(timeout=5)
+        assert queue.stats()["failures"] == 1
+    assert db.fetch("SELECT COUNT(*) AS n FROM payments")[0]["n"] == 2
+
+
+def test_close_confirma_lo_pendiente(db):
+    order_id = make_order(db, 1000000)
+    queue = WriteQueue(db, max_batch=1000, max_delay_ms=1000)
+    futures = [queue.payment(order_id, 1) for _ in range(100)]
+    queue.close()
+    assert all(f.done() and not f.exception() for f in futures)
+    assert db.fetch("SELECT COUNT(*) AS n FROM payments")[0]["n"] == 100
+    with pytest.raises(RuntimeError):
+        queue.payment(order_id, 1)
+
+
+def test_cola_cerrada_no_queda_retenida(db):
+    with WriteQueue(db) as queue:
+        queue.flush(timeout=5)
+    ref = weakref.ref(queue)
+    del queue
+    gc.collect()
+    assert ref() is None
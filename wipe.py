@@ -1,5 +1,4 @@
-from app.database import Database
+from app.database import db
 
-db = Database()
 db.execute("DELETE FROM customers;")
 print("Tabla 'customers' limpiada.")